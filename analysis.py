@@ -0,0 +1,217 @@
+import re
+from datetime import datetime
+from dates import DateExtractor
+from extraction import ContentExtractor
+from metrics import timed
+from urls import normalize_url, resolve_link, LinkFilter
+from urllib.parse import urlsplit
+
+# Forum post links either sit in one of these containers (tag -> classes) or have a forum-like URL
+POST_CONTAINERS = {
+    'div': frozenset(['post', 'thread', 'topic', 'message', 'discussion']),
+    'article': frozenset(['forum-post']),
+}
+FORUM_URL_PATTERN = re.compile('topic|thread|discussion|post|forum')
+
+class PageAnalysis:
+    """What PageAnalyzer found on a page.
+
+    links is non-empty for listing pages to expand. markdown is set for
+    pages to save. status is 'outdated' or 'unchanged' for pages that are
+    neither. spans holds stage timings, link_counts the link_stats
+    increments and messages the progress notes, for the caller to record
+    and print (worker processes shouldn't write to the console).
+    has_content is False for a static page that needs the browser to
+    render, and None when that wasn't checked.
+    """
+
+    def __init__(self, links=(), markdown=None, status=None, spans=None, link_counts=None, messages=None,
+                 has_content=None):
+        self.links = list(links)
+        self.markdown = markdown
+        self.status = status
+        self.spans = spans or {}
+        self.link_counts = link_counts or {}
+        self.messages = messages or []
+        self.has_content = has_content
+
+
+class PageAnalyzer:
+    """The CPU-bound half of processing a page: parse, find links, check dates, build Markdown.
+
+    It holds no files, connections or locks, so it can be pickled and run in
+    a worker process. Timings and link counts are returned with the result
+    instead of being recorded.
+    """
+
+    def __init__(self, parser='html.parser', link_filter=None, cutoff_date=None, days_limit=None,
+                 extractor=None, date_extractor=None):
+        self.parser = parser
+        self.link_filter = link_filter or LinkFilter()
+        self.cutoff_date = cutoff_date
+        self.days_limit = days_limit
+        self.extractor = extractor or ContentExtractor()
+        self.date_extractor = date_extractor or DateExtractor()
+
+    def analyze(self, html, url, final_url=None, depth=1, max_depth=2, unchanged=False, soup=None,
+                check_content=False):
+        """Decide whether a fetched page is expanded, saved or skipped.
+
+        Pages that have links and sit above max_depth are expanded. Leaf
+        pages are rendered to Markdown unless their content is unchanged or
+        older than the cutoff.
+        Args:
+            html (str): The page source
+            url (str): The URL the page was requested as
+            final_url (str): The URL after redirects, used to resolve links
+            unchanged (bool): The content hash matches the saved copy
+            soup (BeautifulSoup): The page if it was already parsed
+            check_content (bool): Also set has_content, for static pages that may need the browser
+        Returns:
+            PageAnalysis
+        """
+        spans = {}
+        counts = {}
+        messages = []
+        base_url = final_url or url
+        if soup is None:
+            from bs4 import BeautifulSoup
+            with timed(spans, 'parse'):
+                soup = BeautifulSoup(html, self.parser)
+        # Checked before extraction, which removes boilerplate from the soup
+        has_content = self.has_content(soup, base_url) if check_content else None
+        analysis = self._analyze(soup, url, base_url, depth, max_depth, unchanged, spans, counts, messages)
+        analysis.has_content = has_content
+        return analysis
+
+    def _analyze(self, soup, url, base_url, depth, max_depth, unchanged, spans, counts, messages):
+        # Links are only needed to decide whether to expand the page
+        links = []
+        if depth < max_depth:
+            with timed(spans, 'links'):
+                links = self.extract_links(soup, base_url, counts)
+        if links and self.cutoff_date:
+            with timed(spans, 'dates'):
+                links = self.prune_outdated_links(soup, base_url, links, counts, messages)
+            if not links:
+                return PageAnalysis(status='outdated', spans=spans, link_counts=counts, messages=messages)
+        if links:
+            messages.append(f"Found {len(links)} links to scrape at depth {depth}")
+            return PageAnalysis(links, spans=spans, link_counts=counts, messages=messages)
+        if unchanged:
+            return PageAnalysis(status='unchanged', spans=spans, link_counts=counts, messages=messages)
+        if self.cutoff_date:
+            with timed(spans, 'dates'):
+                page_date = self.date_extractor.page_date(soup)
+            if page_date is not None and page_date < self.cutoff_date:
+                messages.append(f"Skipping {url}: last activity {page_date:%Y-%m-%d} is older than {self.days_limit} days")
+                return PageAnalysis(status='outdated', spans=spans, link_counts=counts, messages=messages)
+
+        markdown, render_spans = self.render(soup, url)
+        spans.update(render_spans)
+        return PageAnalysis(markdown=markdown, spans=spans, link_counts=counts, messages=messages)
+
+    def has_content(self, soup, url):
+        """Check whether a parsed page has content or post links worth extracting without JavaScript."""
+        if self.extractor.find_main_content(soup):
+            return True
+        body = soup.find('body')
+        if not body:
+            return False
+        if any(len(element.get_text().strip()) > 20 for element in self.extractor.collect_text_elements(body)):
+            return True
+        return bool(self.extract_post_links(soup, url))
+
+    def extract_post_links(self, soup, base_url):
+        """Extract forum post links from a page.
+
+        A link is a post link if it sits inside a forum post container or its
+        URL looks like a forum post. Links are returned in document order.
+        Args:
+            soup (BeautifulSoup): The parsed HTML content
+            base_url (str): The base URL of the page
+        Returns:
+            list: List of extracted post URLs
+        """
+        base_netloc = urlsplit(normalize_url(base_url)).netloc
+        post_links = {}
+        for a in soup.find_all('a', href=True):
+            href = a['href']
+            if not (FORUM_URL_PATTERN.search(href.lower()) or _in_post_container(a)):
+                continue
+            link = resolve_link(href, base_url)
+            if link is not None and self.link_filter.allows(link, base_netloc):
+                post_links[link] = None
+        return list(post_links)
+
+    def extract_links(self, soup, url, counts):
+        """Extract all followable links from a page in one pass over its anchors.
+
+        Links are resolved against the page URL, canonicalized and deduplicated.
+        Different spellings of the same page collapse into one link.
+        """
+        base_netloc = urlsplit(normalize_url(url)).netloc
+        links = {}
+        discovered = 0
+        filtered = 0
+        for a in soup.find_all('a', href=True):
+            link = resolve_link(a['href'], url)
+            if link is None or not self.link_filter.allows(link, base_netloc):
+                filtered += 1
+                continue
+            discovered += 1
+            links[link] = None
+        _add_counts(counts, discovered=discovered, filtered=filtered, collapsed=discovered - len(links))
+        return list(links)
+
+    def prune_outdated_links(self, soup, url, links, counts, messages):
+        """Drop links whose post or listing row is dated before the cutoff.
+
+        When every dated link on the page is too old the page is pruned
+        entirely, including undated links such as pagination, since listings
+        further on only hold older posts.
+        """
+        link_dates = self.date_extractor.link_dates(soup, lambda href: resolve_link(href, url))
+        dated = [link for link in links if link in link_dates]
+        if not dated:
+            return links
+        outdated = {link for link in dated if link_dates[link] < self.cutoff_date}
+        if len(outdated) == len(dated):
+            messages.append(f"Every post on {url} is older than {self.days_limit} days, not following its links")
+            _add_counts(counts, outdated=len(links))
+            return []
+        _add_counts(counts, outdated=len(outdated))
+        return [link for link in links if link not in outdated]
+
+    def render(self, soup, url, scraped_at=None):
+        """Build the Markdown for a parsed page. Returns (markdown, spans)."""
+        spans = {}
+        with timed(spans, 'select'):
+            scanned = self.extractor.scan(soup)
+        with timed(spans, 'markdown'):
+            markdown = self.extractor.render_markdown(scanned, url, scraped_at or datetime.now())
+        return markdown, spans
+
+
+def _in_post_container(element):
+    for parent in element.parents:
+        classes = POST_CONTAINERS.get(parent.name)
+        if classes and not classes.isdisjoint(parent.get('class') or ()):
+            return True
+    return False
+
+
+def _add_counts(counts, **values):
+    for key, value in values.items():
+        counts[key] = counts.get(key, 0) + value
+
+
+def analyze_page(analyzer, html, url, final_url, depth, max_depth, unchanged, check_content=False):
+    """PageAnalyzer.analyze as a module-level function, for process pools."""
+    return analyzer.analyze(html, url, final_url, depth, max_depth, unchanged, check_content=check_content)
+
+
+def render_page(analyzer, html, url, scraped_at):
+    """Parse a page and render its Markdown, for re-extracting archived pages in a process pool."""
+    from bs4 import BeautifulSoup
+    return analyzer.render(BeautifulSoup(html, analyzer.parser), url, scraped_at)[0]
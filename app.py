@@ -2,62 +2,216 @@ import streamlit as st
 import pandas as pd
 import os
 from scraper import WebScraper
-import json
+from driver_pool import get_driver_pool
+from fetcher import BROWSER_PROFILES, BrowserProfile
+from library import SORT_ORDERS
+from archive import reextract
+from output_stores import get_output_stores
+from analysis import PageAnalyzer
+from extraction import available_parser
+from urls import normalize_url, LinkFilter, DEFAULT_IGNORED_PATHS, DEFAULT_IGNORED_EXTENSIONS
 from datetime import datetime, timedelta
-import time
-import threading
-import schedule
+from scheduler import get_scheduler
+from config_store import get_config_store
+from metrics import STAGES, get_metrics, get_page_history, log_metrics_to, start_metrics_server
 
 
-class ScraperUI:
+def get_driver_pool_for(settings):
+    """One pool of warm browsers per process, shared by every session and the scheduler."""
+    return get_driver_pool(
+        max_size=settings.get('browser_pool_size', 2),
+        max_pages=settings.get('browser_max_pages', 100)
+    )
+
+
+class SourceRunner:
+    """Scrapes configured sources; shared by the dashboard and the scheduler.
+
+    Holds nothing but the process-wide source and settings stores. The output
+    directory, its stores and the browser pool are looked up from the current
+    settings on every run, so a runner handed to the scheduler keeps following
+    settings changed later in any session.
+    """
+
     def __init__(self):
-        self.config_file = "scraper_config.json"
+        # Sources and settings are shared with the scheduler thread and cached in memory
+        self.sources_config = get_config_store("scraper_config.json", default=[])
+        self.settings_config = get_config_store("scraper_settings.json")
         self.load_sources()
-        self.scheduler = None
-        self.start_scheduler()
-        
+
     def load_sources(self):
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r') as f:
-                self.sources = json.load(f)
-        else:
-            self.sources = []
-            
-    def save_sources(self):
-        with open(self.config_file, 'w') as f:
-            json.dump(self.sources, f)
-
-    def start_scheduler(self):
-        if self.scheduler is None:
-            self.scheduler = threading.Thread(target=self.run_scheduler, daemon=True)
-            self.scheduler.start()
-
-    def run_scheduler(self):
-        while True:
-            self.check_and_scrape_sources()
-            time.sleep(60)  # Check every minute
-
-    def check_and_scrape_sources(self):
-        current_time = datetime.now()
-        for source in self.sources:
-            if 'interval_hours' not in source or not source['interval_hours']:
-                continue
-
-            last_scraped = datetime.strptime(source['last_scraped'], '%Y-%m-%d %H:%M:%S') if source['last_scraped'] else None
-            if last_scraped is None or current_time - last_scraped >= timedelta(hours=source['interval_hours']):
-                # Load scraper settings
-                settings = {}
-                if os.path.exists("scraper_settings.json"):
-                    with open("scraper_settings.json", 'r') as f:
-                        settings = json.load(f)
-
-                scraper = WebScraper(days_limit=source['days_limit'] if source['days_limit'] > 0 else None)
-                max_depth = settings.get('max_depth', 2) if settings.get('follow_links', False) else 1
-                result = scraper.scrape_url(source['url'], max_depth=max_depth)
-
-                if result:
-                    source['last_scraped'] = current_time.strftime('%Y-%m-%d %H:%M:%S')
-                    self.save_sources()
+        self.sources = self.sources_config.get()
+
+    def add_source(self, source):
+        with self.sources_config.modify() as sources:
+            sources.append(source)
+        self.load_sources()
+
+    def remove_source(self, url):
+        with self.sources_config.modify() as sources:
+            sources[:] = [source for source in sources if source['url'] != url]
+        self.load_sources()
+
+    def mark_scraped(self, url, scraped_at):
+        """Record a successful scrape, changing only that source's entry."""
+        with self.sources_config.modify() as sources:
+            for source in sources:
+                if source['url'] == url:
+                    source['last_scraped'] = scraped_at.strftime('%Y-%m-%d %H:%M:%S')
+
+    def fetch_mode_for(self, source, settings):
+        """Pick the fetch backend for a source, honoring the global JavaScript setting."""
+        if not settings.get('enable_js', True):
+            return 'static'
+        return source.get('fetch_mode', 'auto')
+
+    def use_async_crawl(self, source, settings):
+        """The asyncio crawler only fetches plain HTTP, so it's limited to static sources."""
+        return settings.get('async_crawl', False) and self.fetch_mode_for(source, settings) == 'static'
+
+    def scrape_source(self, source, settings, progress_callback=None, resume=False, skip_fetched_within=None):
+        """Scrape a configured source with the current settings.
+
+        A source is only crawled by one run at a time in this process; while
+        another run (manual or scheduled) has it, nothing is scraped.
+        Returns:
+            tuple: (WebScraper, list of files written), or (None, None) if the source is already being scraped
+        """
+        output_dir = settings.get('output_dir', 'scraped_data')
+        stores = get_output_stores(output_dir)
+        crawl_id = normalize_url(source['url'])
+        if not stores.crawl_store.claim(crawl_id):
+            return None, None
+        try:
+            return self._scrape_claimed_source(source, settings, stores, progress_callback, resume,
+                                               skip_fetched_within)
+        finally:
+            stores.crawl_store.release(crawl_id)
+
+    def _scrape_claimed_source(self, source, settings, stores, progress_callback, resume, skip_fetched_within):
+        scraper = WebScraper(
+            output_dir=stores.output_dir,
+            days_limit=source['days_limit'] if source['days_limit'] > 0 else None,
+            fetch_mode=self.fetch_mode_for(source, settings),
+            wait_strategy=source.get('wait_strategy', 'ready'),
+            wait_timeout=settings.get('wait_time', 5),
+            browser_profile=source.get('browser_profile'),
+            driver_pool=get_driver_pool_for(settings),
+            crawl_store=stores.crawl_store,
+            library=stores.library,
+            archive=stores.archive(create=True) if settings.get('archive_html') else None,
+            parser=settings.get('parser', 'html.parser'),
+            link_filter=LinkFilter.from_settings(settings)
+        )
+        # Use settings for recursive scraping
+        max_depth = settings.get('max_depth', 2) if settings.get('follow_links', False) else 1
+        # Sitemaps and feeds replace link following when the site has them
+        discover = settings.get('discover_sitemaps', True)
+        since = datetime.strptime(source['last_scraped'], '%Y-%m-%d %H:%M:%S') if source.get('last_scraped') else None
+        try:
+            if self.use_async_crawl(source, settings):
+                result = scraper.crawl_async(
+                    source['url'],
+                    progress_callback=progress_callback,
+                    max_depth=max_depth,
+                    concurrency=settings.get('async_concurrency', 100),
+                    per_host_limit=settings.get('per_host_limit', 2),
+                    host_delay=settings.get('host_delay', 0.5),
+                    resume=resume,
+                    skip_fetched_within=skip_fetched_within,
+                    discover=discover,
+                    since=since
+                )
+            elif settings.get('pipeline_crawl', False):
+                result = scraper.crawl_pipelined(
+                    source['url'],
+                    progress_callback=progress_callback,
+                    max_depth=max_depth,
+                    workers=settings.get('crawl_workers', 4),
+                    per_host_limit=settings.get('per_host_limit', 2),
+                    host_delay=settings.get('host_delay', 0.5),
+                    resume=resume,
+                    skip_fetched_within=skip_fetched_within,
+                    parse_workers=settings.get('parse_workers') or None,
+                    discover=discover,
+                    since=since
+                )
+            else:
+                result = scraper.scrape_url(
+                    source['url'],
+                    progress_callback=progress_callback,
+                    max_depth=max_depth,
+                    workers=settings.get('crawl_workers', 4),
+                    per_host_limit=settings.get('per_host_limit', 2),
+                    host_delay=settings.get('host_delay', 0.5),
+                    resume=resume,
+                    skip_fetched_within=skip_fetched_within,
+                    discover=discover,
+                    since=since
+                )
+        finally:
+            # The crawl stats stay readable; only the HTTP session is released
+            scraper.close()
+        return scraper, result
+
+    def scrape_succeeded(self, scraper, result):
+        """A re-scrape that found every page unchanged or too old still counts as a successful run."""
+        if scraper is None:
+            return False
+        crawl_stats = scraper.crawl_stats
+        # Sitemaps and feeds that list nothing new since the last run count too
+        return (bool(result) or crawl_stats.get('unchanged', 0) > 0 or crawl_stats.get('outdated', 0) > 0
+                or crawl_stats.get('discovered') == 0)
+
+    def run_scheduled_source(self, url):
+        """Scheduler job: scrape one source with the current settings.
+        Returns:
+            bool: Whether the scrape succeeded
+        """
+        source = next((source for source in self.sources_config.get() if source['url'] == url), None)
+        if source is None or not source.get('interval_hours'):
+            return False
+        settings = self.settings_config.get()
+
+        started = datetime.now()
+        # Resume an interrupted run, and don't refetch pages saved within this interval
+        scraper, result = self.scrape_source(
+            source, settings,
+            resume=True,
+            skip_fetched_within=source['interval_hours'] * 3600
+        )
+        if not self.scrape_succeeded(scraper, result):
+            return False
+
+        self.mark_scraped(url, started)
+        return True
+
+
+class ScraperUI(SourceRunner):
+    def __init__(self):
+        super().__init__()
+        settings = self.settings_config.get()
+        self.driver_pool = get_driver_pool_for(settings)
+        # Crawl frontiers and the library index live in the output directory. Streamlit rebuilds
+        # this object on every rerun, so they're opened once per process and directory
+        self.output_dir = settings.get('output_dir', 'scraped_data')
+        stores = get_output_stores(self.output_dir)
+        self.crawl_store = stores.crawl_store
+        self.library = stores.library
+        # Raw HTML is archived only when enabled, but an existing archive can always be re-extracted
+        self.archive = stores.archive(create=settings.get('archive_html', False))
+        # One scheduler per process, however many dashboard sessions are open. It outlives this
+        # session, so it gets a runner of its own rather than a method bound to this object
+        self.scheduler = get_scheduler(SourceRunner().run_scheduled_source,
+                                       workers=settings.get('scheduler_workers', 2))
+        self.scheduler.sync(self.sources)
+        # Crawl metrics are process-wide too; sinks are only attached once
+        self.metrics = get_metrics()
+        self.page_history = get_page_history()
+        if settings.get('metrics_log'):
+            log_metrics_to(settings['metrics_log'])
+        if settings.get('metrics_port'):
+            start_metrics_server(settings['metrics_port'])
 
     def run(self):
         st.title("Web Scraper Dashboard")
@@ -65,27 +219,49 @@ class ScraperUI:
         # Sidebar with configuration
         with st.sidebar:
             st.header("Settings")
-            wait_time = st.slider("Page Load Wait Time", 1, 10, 5, 
-                help="Seconds to wait for page loading")
+            sidebar_settings = self.settings_config.get()
+            wait_time = st.slider("Page Load Wait Time", 1, 10, sidebar_settings.get('wait_time', 5),
+                help="Maximum seconds to wait for a browser-rendered page to become ready")
+            if wait_time != sidebar_settings.get('wait_time', 5):
+                self.settings_config.update({'wait_time': wait_time})
+
+            pool_stats = self.driver_pool.stats()
+            st.caption(f"Browsers: {pool_stats['in_use']} busy, {pool_stats['idle']} idle (max {pool_stats['max_size']})")
+            scheduler_stats = self.scheduler.stats()
+            st.caption(f"Scheduler: {scheduler_stats['scheduled']} scheduled, {scheduler_stats['due']} due, "
+                       f"{scheduler_stats['running']}/{scheduler_stats['workers']} running, "
+                       f"lag {scheduler_stats['lag']:.0f}s")
             
             st.header("Add New Source")
             new_url = st.text_input("URL")
             days_limit = st.number_input("Days to scrape (leave 0 for all)", min_value=0)
             interval_hours = st.number_input("Scraping Interval (hours, 0 for manual only)", 
                 min_value=0, value=0, help="How often to automatically scrape this source")
+            fetch_mode = st.selectbox("Fetch Mode", ["auto", "static", "browser"],
+                help="auto: plain HTTP first, browser only when the page needs JavaScript")
+            wait_strategy = st.selectbox("Page Ready Check", ["ready", "selector", "network_idle", "fixed"],
+                help="How to tell a browser-rendered page has finished loading: document ready, "
+                     "a content element appears, no network activity, or a fixed wait")
+            browser_profile = st.selectbox("Browser Profile", list(BROWSER_PROFILES),
+                index=list(BROWSER_PROFILES).index('text'),
+                help="text: block images, media, fonts and ads, and read the page as soon as its DOM is ready; "
+                     "full: load everything, for sites that break without it")
             if st.button("Add Source"):
                 if new_url:
-                    self.sources.append({
+                    self.add_source({
                         "url": new_url,
                         "days_limit": days_limit,
                         "interval_hours": interval_hours,
+                        "fetch_mode": fetch_mode,
+                        "wait_strategy": wait_strategy,
+                        "browser_profile": browser_profile,
                         "last_scraped": None
                     })
-                    self.save_sources()
+                    self.scheduler.sync(self.sources)
                     st.success("Source added!")
 
         # Main area tabs
-        tab1, tab2, tab3 = st.tabs(["Sources", "Library", "Settings"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Sources", "Library", "Metrics", "Settings"])
 
         # Sources Tab
         with tab1:
@@ -99,6 +275,8 @@ class ScraperUI:
                     with col1:
                         st.write(f"Days Limit: {source['days_limit'] or 'All'}")
                         st.write(f"Scraping Interval: {source['interval_hours']} hours" if source.get('interval_hours', 0) > 0 else "Manual scraping only")
+                        st.write(f"Fetch Mode: {source.get('fetch_mode', 'auto')} (ready check: {source.get('wait_strategy', 'ready')}, "
+                                 f"browser profile: {BrowserProfile.from_config(source.get('browser_profile')).name})")
                         if source['last_scraped']:
                             st.write(f"Last Scraped: {source['last_scraped']}")
                             if source.get('interval_hours', 0) > 0:
@@ -106,14 +284,15 @@ class ScraperUI:
                                 next_scrape = last_scraped + timedelta(hours=source['interval_hours'])
                                 st.write(f"Next Scheduled: {next_scrape.strftime('%Y-%m-%d %H:%M:%S')}")
                     with col2:
-                        if st.button("Scrape", key=f"scrape_{idx}"):
+                        scrape_clicked = st.button("Scrape", key=f"scrape_{idx}")
+                        resume_clicked = False
+                        if self.crawl_store.is_resumable(normalize_url(source['url'])):
+                            resume_clicked = st.button("Resume", key=f"resume_{idx}",
+                                help="Continue the interrupted crawl of this source where it left off")
+                        if scrape_clicked or resume_clicked:
                             # Load scraper settings
-                            settings = {}
-                            if os.path.exists("scraper_settings.json"):
-                                with open("scraper_settings.json", 'r') as f:
-                                    settings = json.load(f)
-                                
-                            scraper = WebScraper(days_limit=source['days_limit'] if source['days_limit'] > 0 else None)
+                            settings = self.settings_config.get()
+
                             progress_bar = st.progress(0)
                             status = st.empty()
                             
@@ -124,58 +303,213 @@ class ScraperUI:
                                 else:
                                     status.text("Complete!")
                                     
-                            # Use settings for recursive scraping
-                            max_depth = settings.get('max_depth', 2) if settings.get('follow_links', False) else 1
-                            result = scraper.scrape_url(
-                                source['url'], 
-                                progress_callback=update_progress,
-                                max_depth=max_depth
-                            )
+                            scraper, result = self.scrape_source(source, settings, progress_callback=update_progress,
+                                                                 resume=resume_clicked)
                             
-                            if result:
-                                source['last_scraped'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                                self.save_sources()
-                                st.success("Scraped successfully!")
+                            if scraper is None:
+                                progress_bar.empty()
+                                st.warning("This source is already being scraped, probably by the scheduler. "
+                                           "Try again when that run finishes.")
+                            elif self.scrape_succeeded(scraper, result):
+                                self.mark_scraped(source['url'], datetime.now())
+                                crawl_stats = scraper.crawl_stats
+                                st.success(f"Scraped successfully! Saved {len(result)} page(s).")
+                                st.caption(f"Pages: {crawl_stats.get('new', 0)} new, {crawl_stats.get('refreshed', 0)} refreshed, "
+                                           f"{crawl_stats.get('unchanged', 0)} unchanged, "
+                                           f"{crawl_stats.get('outdated', 0)} older than the days limit")
+                                if 'discovered' in crawl_stats:
+                                    st.caption(f"Sitemaps and feeds: {crawl_stats['discovered']} new or changed page(s) to crawl")
+                                link_stats = crawl_stats.get('links', {})
+                                st.caption(f"Links: {link_stats.get('discovered', 0)} followable, "
+                                           f"{link_stats.get('filtered', 0)} filtered out, "
+                                           f"{link_stats.get('collapsed', 0)} duplicates collapsed, "
+                                           f"{link_stats.get('outdated', 0)} skipped as too old")
+                                backends = [page['backend'] for page in scraper.page_stats]
+                                st.caption(f"Pages fetched: {backends.count('static')} static, {backends.count('browser')} browser")
+                                waits = [page['wait_seconds'] for page in scraper.page_stats if page['backend'] == 'browser']
+                                if waits:
+                                    st.caption(f"Page ready wait: avg {sum(waits) / len(waits):.2f}s, max {max(waits):.2f}s")
+                                blocked = [page for page in scraper.page_stats if page.get('requests_blocked') is not None]
+                                if blocked:
+                                    st.caption(f"Browser requests blocked: {sum(page['requests_blocked'] for page in blocked)}, "
+                                               f"downloaded: {sum(page['bytes_loaded'] for page in blocked) / 1024:.0f} KiB")
                             else:
                                 st.error("Scraping failed!")
                     with col3:
                         if st.button("Remove", key=f"remove_{idx}"):
-                            self.sources.pop(idx)
-                            self.save_sources()
+                            self.remove_source(source['url'])
+                            self.scheduler.sync(self.sources)
                             st.experimental_rerun()
 
+            with st.expander("Scheduler"):
+                scheduler_stats = self.scheduler.stats()
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Queue Depth", scheduler_stats['scheduled'])
+                col2.metric("Due Now", scheduler_stats['due'])
+                col3.metric("Running", f"{scheduler_stats['running']}/{scheduler_stats['workers']}")
+                col4.metric("Lag", f"{scheduler_stats['lag']:.0f}s",
+                    help=f"Longest wait of a due source for a free worker. Last dispatch lag: {scheduler_stats['last_lag']:.1f}s")
+                if scheduler_stats['next_due']:
+                    st.caption(f"Next run due: {scheduler_stats['next_due']}")
+                queue = self.scheduler.queue()
+                if queue:
+                    st.dataframe(pd.DataFrame(queue), use_container_width=True, hide_index=True)
+                history = self.scheduler.history()
+                if history:
+                    st.subheader("Recent Runs")
+                    st.dataframe(pd.DataFrame(history), use_container_width=True, hide_index=True)
+                else:
+                    st.caption("No scheduled runs yet.")
+
         # Library Tab
         with tab2:
             st.header("Scraped Content")
-            if os.path.exists("scraped_data"):
-                files = sorted(os.listdir("scraped_data"), reverse=True)
-                files = [f for f in files if f.endswith('.md')]
-                
-                if not files:
-                    st.info("No scraped content yet!")
-                    
-                for file in files:
-                    with st.expander(f"{file} ({time.ctime(os.path.getctime(os.path.join('scraped_data', file)))})"):
-                        with open(os.path.join("scraped_data", file), 'r') as f:
-                            content = f.read()
-                            st.markdown(content)
-                            st.download_button(
-                                "Download",
-                                content,
-                                file_name=file,
-                                mime="text/markdown",
-                                key=f"download_{file}"
-                            )
+            # Files copied into the output directory by hand are picked up on first use or on request
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                rescan_clicked = st.button("Rescan Folder",
+                    help=f"Index Markdown files in '{self.output_dir}' added outside the scraper")
+            with col2:
+                rebuild_clicked = st.button("Rebuild Index",
+                    help="Discard the library and search index and rebuild them from every file in the output directory")
+            with col3:
+                reextract_clicked = st.button("Re-extract from Archive", disabled=self.archive is None,
+                    help="Regenerate archived pages' Markdown with the current extraction rules, without fetching them again")
+            if rescan_clicked:
+                added, removed = self.library.sync()
+                st.success(f"Indexed {added} new document(s), removed {removed} missing")
+            elif rebuild_clicked:
+                with st.spinner("Rebuilding index..."):
+                    added = self.library.rebuild()
+                st.success(f"Indexed {added} document(s)")
+            elif reextract_clicked:
+                progress_bar = st.progress(0)
+                analyzer = PageAnalyzer(available_parser(self.settings_config.get().get('parser', 'html.parser')))
+                rewritten = reextract(self.archive, self.library, analyzer,
+                                      progress_callback=lambda done: progress_bar.progress(done))
+                st.success(f"Re-extracted {rewritten} document(s)")
+            elif self.library.count() == 0:
+                self.library.sync()
+
+            domains = self.library.domains()
+            query = st.text_input("Search", key="library_query",
+                help="Find documents containing all of these words. End a word with * to match a prefix")
+            col1, col2, col3 = st.columns([2, 2, 1])
+            with col1:
+                domain = st.selectbox("Domain", ["All"] + domains, key="library_domain")
+                domain = None if domain == "All" else domain
+            with col2:
+                if query:
+                    date_range = st.date_input("Scraped between", value=(), key="library_dates")
+                else:
+                    sort = st.selectbox("Sort by", list(SORT_ORDERS), key="library_sort")
+            with col3:
+                page_size = st.selectbox("Per page", [25, 50, 100], key="library_page_size")
+
+            if query:
+                since, until = (tuple(date_range) + (None, None))[:2]
+                total, _ = self.library.search(query, domain, since, until, limit=0)
+            else:
+                total = self.library.count(domain)
+            if not total:
+                st.info("No matching documents." if query else "No scraped content yet!")
+            else:
+                page_count = (total + page_size - 1) // page_size
+                page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1,
+                                       key="library_page")
+                offset = (page - 1) * page_size
+                if query:
+                    _, documents = self.library.search(query, domain, since, until, offset=offset, limit=page_size)
+                    columns = ['title', 'domain', 'scraped_at', 'snippet', 'url']
+                else:
+                    documents = self.library.page(offset, page_size, sort, domain)
+                    columns = ['title', 'domain', 'scraped_at', 'size', 'url']
+                st.caption(f"Showing {offset + 1}-{offset + len(documents)} of {total} documents")
+                st.dataframe(pd.DataFrame(documents, columns=columns), use_container_width=True, hide_index=True)
+
+                # Only the selected document's body is read from disk
+                labels = {doc['filename']: f"{doc['title'] or doc['filename']} ({doc['scraped_at']})"
+                          for doc in documents}
+                selected = st.selectbox("Open document", [None] + list(labels),
+                                        format_func=lambda name: "Select a document..." if name is None else labels[name],
+                                        key="library_open")
+                if selected:
+                    content = self.library.read(selected)
+                    if content is None:
+                        st.error("This file no longer exists. Use Rescan Folder to update the library.")
+                    else:
+                        st.download_button(
+                            "Download",
+                            content,
+                            file_name=selected,
+                            mime="text/markdown",
+                            key=f"download_{selected}"
+                        )
+                        st.markdown(content)
         
-        # Settings Tab
+        # Metrics Tab
         with tab3:
+            st.header("Crawl Metrics")
+            snapshot = self.metrics.snapshot()
+            counters = snapshot['counters']
+            pages = counters.get('pages', {})
+            errors = counters.get('errors', {})
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Pages", sum(pages.values()))
+            col2.metric("Errors", sum(errors.values()))
+            col3.metric("Fetched", f"{sum(counters.get('bytes_fetched', {}).values()) / 2 ** 20:.1f} MiB")
+            col4.metric("Written", f"{sum(counters.get('bytes_written', {}).values()) / 2 ** 20:.1f} MiB")
+            st.caption(f"Since {datetime.fromtimestamp(self.metrics.started):%Y-%m-%d %H:%M:%S}")
+
+            stages = snapshot['stages']
+            if stages:
+                st.subheader("Where the Time Goes")
+                stage_names = [stage for stage in STAGES if stage in stages] + \
+                    [stage for stage in stages if stage not in STAGES]
+                stage_frame = pd.DataFrame({
+                    'stage': stage_names,
+                    'total_seconds': [round(stages[stage]['seconds'], 3) for stage in stage_names],
+                    'calls': [stages[stage]['count'] for stage in stage_names],
+                    'avg_ms': [round(1000 * stages[stage]['seconds'] / stages[stage]['count'], 2)
+                               for stage in stage_names],
+                })
+                st.bar_chart(stage_frame.set_index('stage')['total_seconds'])
+                st.dataframe(stage_frame, use_container_width=True, hide_index=True)
+            else:
+                st.info("No pages crawled since the dashboard started.")
+
+            col1, col2, col3 = st.columns(3)
+            for column, name, label in ((col1, 'pages', 'Pages by Outcome'), (col2, 'links', 'Links'),
+                                        (col3, 'errors', 'Errors by Type')):
+                with column:
+                    st.subheader(label)
+                    rows = [{'kind': key.split('=', 1)[-1], 'count': value}
+                            for key, value in sorted(counters.get(name, {}).items())]
+                    if rows:
+                        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+                    else:
+                        st.caption("None yet.")
+
+            recent = self.page_history.recent(200)
+            if recent:
+                st.subheader("Recent Pages")
+                st.dataframe(pd.DataFrame([
+                    dict({'time': record['time'], 'url': record['url'], 'status': record['status'],
+                          'seconds': record['seconds']}, **record['spans'])
+                    for record in recent
+                ]), use_container_width=True, hide_index=True)
+            with st.expander("Prometheus Metrics"):
+                st.code(self.metrics.render_prometheus(), language="text")
+            if st.button("Reset Metrics"):
+                self.metrics.reset()
+                st.experimental_rerun()
+
+        # Settings Tab
+        with tab4:
             st.header("Scraper Settings")
             
             # Load current settings
-            settings = {}
-            if os.path.exists("scraper_settings.json"):
-                with open("scraper_settings.json", 'r') as f:
-                    settings = json.load(f)
+            settings = self.settings_config.get()
             
             # Output Directory Configuration
             output_dir = st.text_input(
@@ -189,8 +523,7 @@ class ScraperUI:
                 try:
                     os.makedirs(output_dir, exist_ok=True)
                     settings['output_dir'] = output_dir
-                    with open("scraper_settings.json", 'w') as f:
-                        json.dump(settings, f)
+                    self.settings_config.update({'output_dir': output_dir})
                     st.success(f"Directory '{output_dir}' is ready for use")
                 except Exception as e:
                     st.error(f"Failed to create directory: {str(e)}")
@@ -200,40 +533,95 @@ class ScraperUI:
                 settings['output_dir'] = output_dir
                 # Create directory if it doesn't exist
                 os.makedirs(output_dir, exist_ok=True)
-                with open("scraper_settings.json", 'w') as f:
-                    json.dump(settings, f)
+                self.settings_config.update({'output_dir': output_dir})
                 st.success("Settings saved successfully!")
             st.header("Advanced Settings")
-            enable_js = st.checkbox("Enable JavaScript", value=True, 
-                help="Enable JavaScript processing (required for dynamic content)")
+            enable_js = st.checkbox("Enable JavaScript", value=settings.get('enable_js', True),
+                help="Enable JavaScript processing (required for dynamic content). When off, pages are fetched with plain HTTP only")
             follow_links = st.checkbox("Follow Links", value=False, 
                 help="Follow and scrape linked pages (for forum posts)")
             max_depth = st.number_input("Max Depth", min_value=1, max_value=10, value=2,
                 help="Maximum depth for following links")
             
+            html_parser = st.selectbox("HTML Parser", ["html.parser", "lxml"],
+                index=["html.parser", "lxml"].index(settings.get('parser', 'html.parser')),
+                help="lxml parses large pages faster but must be installed")
+            crawl_workers = st.number_input("Concurrent Workers", min_value=1, max_value=32,
+                value=settings.get('crawl_workers', 4),
+                help="Number of pages fetched in parallel while following links")
+            per_host_limit = st.number_input("Max Requests per Host", min_value=1, max_value=16,
+                value=settings.get('per_host_limit', 2),
+                help="Maximum concurrent requests to a single host")
+            host_delay = st.number_input("Delay per Host (seconds)", min_value=0.0, max_value=60.0,
+                value=float(settings.get('host_delay', 0.5)), step=0.1,
+                help="Minimum time between requests to the same host")
+            discover_sitemaps = st.checkbox("Discover Pages from Sitemaps and Feeds",
+                value=settings.get('discover_sitemaps', True),
+                help="When following links, first look for new or changed pages in the site's robots.txt, "
+                     "sitemaps and RSS/Atom feeds, and only follow links if it has none")
+            async_crawl = st.checkbox("Async Crawling for Static Sources", value=settings.get('async_crawl', False),
+                help="Crawl sources using the static fetch mode with the asyncio crawler")
+            pipeline_crawl = st.checkbox("Pipelined Crawling", value=settings.get('pipeline_crawl', False),
+                help="Fetch, parse and write pages in separate stages, parsing in worker processes on every core")
+            parse_workers = st.number_input("Parse Workers", min_value=0, max_value=64,
+                value=settings.get('parse_workers', 0),
+                help="Worker processes for pipelined crawling; 0 uses one per CPU core (applies after restart)")
+            async_concurrency = st.number_input("Async Concurrency", min_value=1, max_value=5000,
+                value=settings.get('async_concurrency', 100),
+                help="Maximum number of pages in flight for async crawls")
+            archive_html = st.checkbox("Archive Raw HTML", value=settings.get('archive_html', False),
+                help="Keep the HTML of scraped pages in compressed archive files, so Markdown can be re-extracted later without refetching")
+            browser_pool_size = st.number_input("Browser Pool Size", min_value=1, max_value=10,
+                value=settings.get('browser_pool_size', 2),
+                help="Maximum number of Chrome instances kept warm and shared by all scrapes (applies after restart)")
+            scheduler_workers = st.number_input("Scheduler Workers", min_value=1, max_value=16,
+                value=settings.get('scheduler_workers', 2),
+                help="Number of sources the scheduler scrapes at the same time (applies after restart)")
+            browser_max_pages = st.number_input("Pages per Browser", min_value=1, max_value=10000,
+                value=settings.get('browser_max_pages', 100),
+                help="Restart each Chrome instance after it has loaded this many pages (applies after restart)")
+            metrics_log = st.text_input("Metrics Log File", value=settings.get('metrics_log', ''),
+                help="Append per-page stage timings to this JSON lines file; leave empty to disable (applies after restart)")
+            metrics_port = st.number_input("Metrics Port", min_value=0, max_value=65535,
+                value=settings.get('metrics_port', 0),
+                help="Serve metrics for Prometheus at http://127.0.0.1:<port>/metrics; 0 disables it (applies after restart)")
+            
             # Add link filtering options
             st.subheader("Link Filtering")
-            filter_same_domain = st.checkbox("Stay on Same Domain", value=True,
+            filter_same_domain = st.checkbox("Stay on Same Domain", value=settings.get('filter_same_domain', True),
                 help="Only follow links from the same domain as the source URL")
             ignored_paths = st.text_input("Ignored Paths (comma-separated)",
-                value="login,logout,signup,register,search",
+                value=','.join(settings.get('ignored_paths', DEFAULT_IGNORED_PATHS)),
                 help="Paths to ignore when following links")
             ignored_extensions = st.text_input("Ignored File Extensions (comma-separated)",
-                value=".css,.js,.png,.jpg,.jpeg,.gif,.pdf",
+                value=','.join(settings.get('ignored_extensions', DEFAULT_IGNORED_EXTENSIONS)),
                 help="File extensions to ignore when following links")
     
             # Save settings when changed
             if st.button("Save Settings", key="save_advanced_settings"):
-                settings = {
+                self.settings_config.update({
                     "enable_js": enable_js,
                     "follow_links": follow_links,
                     "max_depth": max_depth,
+                    "parser": html_parser,
+                    "crawl_workers": crawl_workers,
+                    "per_host_limit": per_host_limit,
+                    "host_delay": host_delay,
+                    "discover_sitemaps": discover_sitemaps,
+                    "async_crawl": async_crawl,
+                    "async_concurrency": async_concurrency,
+                    "pipeline_crawl": pipeline_crawl,
+                    "archive_html": archive_html,
+                    "parse_workers": parse_workers,
+                    "browser_pool_size": browser_pool_size,
+                    "browser_max_pages": browser_max_pages,
+                    "scheduler_workers": scheduler_workers,
+                    "metrics_log": metrics_log.strip(),
+                    "metrics_port": metrics_port,
                     "filter_same_domain": filter_same_domain,
-                    "ignored_paths": ignored_paths.split(','),
-                    "ignored_extensions": ignored_extensions.split(',')
-                }
-                with open("scraper_settings.json", 'w') as f:
-                    json.dump(settings, f)
+                    "ignored_paths": [path.strip() for path in ignored_paths.split(',') if path.strip()],
+                    "ignored_extensions": [ext.strip() for ext in ignored_extensions.split(',') if ext.strip()]
+                })
                 st.success("Settings saved!")
 
 if __name__ == "__main__":
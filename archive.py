@@ -0,0 +1,195 @@
+import gzip
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+from analysis import render_page
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    content_hash TEXT,
+    output_file TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_records_output ON records (output_file);
+"""
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Start a new segment file once the current one reaches this size
+SEGMENT_SIZE = 64 * 2 ** 20
+
+# Segment numbers are unique within the process, so two archives opened in one second never share a file
+_segment_numbers = itertools.count(1)
+
+
+class PageArchive:
+    """Raw page source kept in compressed, append-only segment files.
+
+    Each record is one JSON line (URL, fetch metadata and HTML) compressed
+    as its own gzip member and appended to the current segment. A segment is
+    therefore a valid .jsonl.gz file, and any record can be read on its own
+    from the offset and length kept in an SQLite index. Every process writes
+    to segments of its own, so a crawl and the dashboard can archive at the
+    same time.
+    """
+
+    def __init__(self, directory, segment_size=SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._segment = None
+        self._segment_file = None
+        self._lock = threading.Lock()
+
+    def append(self, url, fetched, content_hash=None):
+        """Archive a fetched page. Returns the record id."""
+        fetched_at = datetime.now().strftime(DATE_FORMAT)
+        line = json.dumps({
+            'url': url,
+            'final_url': fetched.url,
+            'fetched_at': fetched_at,
+            'backend': fetched.backend,
+            'status_code': fetched.status_code,
+            'etag': fetched.etag,
+            'last_modified': fetched.last_modified,
+            'content_hash': content_hash,
+            'html': fetched.html,
+        }) + '\n'
+        data = gzip.compress(line.encode('utf-8'), compresslevel=6)
+        with self._lock:
+            segment_file = self._writable_segment()
+            offset = segment_file.tell()
+            segment_file.write(data)
+            segment_file.flush()
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO records (url, domain, fetched_at, segment, offset, length, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, urlparse(url).netloc, fetched_at, self._segment, offset, len(data), content_hash)
+                )
+            return cursor.lastrowid
+
+    def set_output(self, record_id, output_file):
+        """Remember which Markdown file was extracted from a record."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE records SET output_file = ? WHERE id = ?",
+                               (os.path.basename(output_file), record_id))
+
+    def read(self, record_id):
+        """Return a record as a dict, or None if it doesn't exist."""
+        with self._lock:
+            row = self._conn.execute("SELECT segment, offset, length FROM records WHERE id = ?",
+                                     (record_id,)).fetchone()
+        return self._read_at(*row) if row else None
+
+    def extracted(self, domain=None):
+        """Return (record id, output file) for the newest record behind each Markdown file."""
+        where = "WHERE output_file IS NOT NULL" + (" AND domain = ?" if domain else "")
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT MAX(id), output_file FROM records {where} GROUP BY output_file ORDER BY MAX(id)",
+                (domain,) if domain else ()
+            ).fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            self._conn.close()
+
+    def _writable_segment(self):
+        """Return the open segment, starting a new one when there is none or it is full; the caller holds the lock."""
+        if self._segment_file is not None and self._segment_file.tell() < self.segment_size:
+            return self._segment_file
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._segment = f"pages-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{next(_segment_numbers):04d}.jsonl.gz"
+        self._segment_file = open(os.path.join(self.directory, self._segment), 'ab')
+        return self._segment_file
+
+    def _read_at(self, segment, offset, length):
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        return json.loads(gzip.decompress(data).decode('utf-8'))
+
+
+def reextract(archive, library, analyzer, domain=None, pool=None, progress_callback=None):
+    """Regenerate every archived page's Markdown with the current extraction rules.
+
+    Files are rewritten in place (atomically) with their original scrape
+    date, and the library is updated. Nothing is fetched.
+    Args:
+        archive (PageArchive): The archive to read from
+        library (LibraryIndex): The library of the output directory holding the files
+        analyzer (PageAnalyzer): Extraction settings to apply
+        domain (str): Only re-extract pages from this domain
+        pool (Executor): Render pages in this pool (e.g. the parse process pool) instead of inline
+        progress_callback (callable): Called with the fraction of records done
+    Returns:
+        int: Number of files rewritten
+    """
+    records = archive.extracted(domain)
+    rewritten = 0
+    batch_size = 64
+    for start in range(0, len(records), batch_size):
+        batch = []
+        for record_id, output_file in records[start:start + batch_size]:
+            record = archive.read(record_id)
+            if record is None or record.get('html') is None:
+                continue
+            scraped_at = datetime.strptime(record['fetched_at'], DATE_FORMAT)
+            batch.append((output_file, (analyzer, record['html'], record['url'], scraped_at)))
+        if pool is not None:
+            rendered = pool.map(render_page, *zip(*(args for _, args in batch))) if batch else []
+        else:
+            rendered = (render_page(*args) for _, args in batch)
+        for (output_file, _), markdown in zip(batch, rendered):
+            filepath = os.path.join(library.output_dir, output_file)
+            try:
+                _replace_file(filepath, markdown)
+            except OSError as e:
+                print(f"Error writing {filepath}: {str(e)}")
+                continue
+            library.add(filepath, markdown)
+            rewritten += 1
+        if progress_callback:
+            progress_callback(min(1.0, (start + batch_size) / len(records)))
+    return rewritten
+
+
+def _replace_file(filepath, content):
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.reextract.', suffix='.tmp')
+    try:
+        try:
+            os.chmod(temp_path, os.stat(filepath).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o644)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, filepath)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
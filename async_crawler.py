@@ -0,0 +1,177 @@
+import asyncio
+import time
+import aiohttp
+from urllib.parse import urlparse
+from fetcher import DEFAULT_USER_AGENT, FetchResult, conditional_headers
+from crawler import CrawlState
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AsyncCrawler:
+    """asyncio crawler for static sites with thousands of requests in flight.
+
+    Pages are fetched over one pooled aiohttp session. Each host gets its own
+    concurrency cap and minimum delay between request starts, and a global
+    semaphore bounds the number of requests in flight. A page only takes a
+    global permit once its host lets it start, so a throttled host with a
+    long queue doesn't hold permits that other hosts could use. Link
+    filtering and content extraction are delegated to the WebScraper so both
+    crawl modes produce the same output.
+    """
+
+    def __init__(self, scraper, concurrency=100, per_host_limit=8, host_delay=0.0,
+                 timeout=30, retries=3, backoff=0.5):
+        self.scraper = scraper
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.host_delay = host_delay
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.state = None
+        self._paused = False
+
+    def pause(self):
+        """Stop starting new pages; unstarted pages stay queued in the crawl store for resume."""
+        self._paused = True
+
+    def run(self, url, **kwargs):
+        """Run crawl() to completion on a fresh event loop."""
+        return asyncio.run(self.crawl(url, **kwargs))
+
+    async def crawl(self, url, progress_callback=None, depth=1, max_depth=2, visited_urls=None,
+                    resume=False, skip_fetched_within=None, seed_urls=None):
+        """Crawl from url and return the paths of all files written."""
+        self._paused = False
+        state = self.state = CrawlState(self.scraper.crawl_store, url, max_depth, visited_urls, skip_fetched_within,
+                                        self.scraper.metrics)
+        self._budget = asyncio.Semaphore(self.concurrency)
+        self._host_slots = {}
+        self._host_locks = {}
+        self._host_next_start = {}
+        pending = 0
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host_limit, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {'User-Agent': DEFAULT_USER_AGENT}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            tasks = set()
+
+            def enqueue(links):
+                for link, link_depth in links:
+                    tasks.add(asyncio.create_task(self._crawl_page(session, link, link_depth, max_depth)))
+
+            enqueue(state.start(url, depth, resume, seed_urls))
+            if progress_callback:
+                progress_callback(0.0 if state.total else 1.0)
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    outcome = task.result()
+                    if outcome is None:
+                        pending += 1  # Paused before this page started
+                        continue
+                    link, link_depth, result, error = outcome
+                    if error is not None:
+                        state.page_failed(link, error)
+                    else:
+                        links, filepath, change = result
+                        enqueue(state.page_done(link, link_depth, links, filepath, change))
+                print(f"Crawled {state.completed}/{state.total} pages")
+                if progress_callback:
+                    progress_callback(state.completed / state.total)
+
+        state.finish(pending)
+        return state.scraped_files
+
+    async def _crawl_page(self, session, url, depth, max_depth):
+        host = urlparse(url).netloc
+        try:
+            if self._paused:
+                return None
+            # Only pages that can't be expanded are sent conditionally; listing pages always need a body.
+            # The validators come from SQLite, so look them up off the event loop and before taking a permit
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(None, self.scraper.cached_validators, url)
+            if host not in self._host_slots:
+                self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+                self._host_locks[host] = asyncio.Lock()
+            async with self._host_slots[host]:
+                throttled = await self._wait_host_turn(host)
+                if self.scraper.rate_limiter is not None:
+                    delay = self.scraper.rate_limiter.reserve(host)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                        self.scraper.metrics.observe('throttle', delay)
+                        throttled += delay
+                async with self._budget:
+                    if self._paused:
+                        return None
+                    start = time.perf_counter()
+                    fetched = await self._fetch(session, url, cached if depth >= max_depth else None)
+                    fetch_seconds = time.perf_counter() - start
+            self.scraper.metrics.observe('fetch', fetch_seconds)
+            self.scraper.page_stats.append({'url': url, 'backend': 'async', 'wait_seconds': 0.0})
+
+            # Parsing is CPU-bound; keep the event loop free to service other responses
+            result = await loop.run_in_executor(
+                None, self._process_fetched, fetched, url, depth, max_depth, cached,
+                {'throttle': throttled, 'fetch': fetch_seconds} if throttled else {'fetch': fetch_seconds}
+            )
+            return url, depth, result, None
+        except Exception as e:
+            return url, depth, None, e
+
+    def _process_fetched(self, fetched, url, depth, max_depth, cached, spans):
+        """Run WebScraper.process_fetched in a worker thread, recording the page with its fetch timings."""
+        with self.scraper.metrics.page(url, **spans) as record:
+            result = self.scraper.process_fetched(fetched, url, depth, max_depth, cached)
+            record['status'] = result[2] or 'expanded'
+            return result
+
+    async def _wait_host_turn(self, host):
+        """Space out request starts to one host by at least host_delay seconds.
+        Returns:
+            float: Seconds slept
+        """
+        if not self.host_delay:
+            return 0.0
+        loop = asyncio.get_running_loop()
+        async with self._host_locks[host]:
+            delay = self._host_next_start.get(host, 0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                self.scraper.metrics.observe('throttle', delay)
+            self._host_next_start[host] = loop.time() + self.host_delay
+        return max(0.0, delay)
+
+    async def _fetch(self, session, url, validators=None):
+        """GET a page, retrying transient failures with exponential backoff.
+
+        Sends conditional headers when cached validators are given.
+        Returns:
+            FetchResult: With no body when the server answered 304 Not Modified
+        """
+        headers = conditional_headers(validators)
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        return FetchResult(str(response.url), None, 'async', 304)
+                    if response.status not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        return FetchResult(str(response.url), await response.text(), 'async', response.status,
+                                           etag=response.headers.get('ETag'),
+                                           last_modified=response.headers.get('Last-Modified'))
+                    error = aiohttp.ClientResponseError(
+                        response.request_info, response.history, status=response.status, message=response.reason
+                    )
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            await asyncio.sleep(self.backoff * 2 ** attempt)
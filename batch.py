@@ -0,0 +1,108 @@
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urls import normalize_url
+
+
+def read_urls(path):
+    """Read URLs from a file, one per line, or from stdin when path is '-'.
+
+    Blank lines and lines starting with # are skipped.
+    """
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+
+def source_jobs(sources):
+    """Turn scraper_config.json sources into batch jobs, keeping their per-source settings."""
+    jobs = []
+    for source in sources:
+        if not source.get('url'):
+            continue
+        job = {'url': source['url'], 'source': True}
+        if 'days_limit' in source:
+            job['days_limit'] = source['days_limit']
+        for key in ('fetch_mode', 'wait_strategy', 'browser_profile', 'last_scraped'):
+            if source.get(key):
+                job[key] = source[key]
+        jobs.append(job)
+    return jobs
+
+
+def dedupe_jobs(jobs):
+    """Drop jobs whose URL is a different spelling of an earlier job's URL."""
+    unique = {}
+    for job in jobs:
+        unique.setdefault(normalize_url(job['url']), job)
+    return list(unique.values())
+
+
+def job_status(files, stats):
+    """Classify a finished crawl for the manifest."""
+    if files:
+        return 'saved'
+    # Sitemaps and feeds that list nothing new since the last run
+    if stats.get('unchanged') or stats.get('discovered') == 0:
+        return 'unchanged'
+    if stats.get('outdated'):
+        return 'outdated'
+    if stats.get('errors'):
+        return 'failed'
+    return 'empty'
+
+
+class BatchRunner:
+    """Crawls a list of URLs on a pool of workers and writes one manifest line per URL.
+
+    Args:
+        scrape (callable): Takes a job dict and returns (files written, crawl stats)
+        workers (int): URLs crawled at the same time
+        manifest (str): JSON lines file to append results to, or None
+        on_result (callable): Called with each manifest record as it is written
+    """
+
+    def __init__(self, scrape, workers=4, manifest=None, on_result=None):
+        self.scrape = scrape
+        self.workers = max(1, workers)
+        self.manifest = manifest
+        self.on_result = on_result
+
+    def run(self, jobs):
+        """Crawl every job. Returns the manifest records in completion order."""
+        out = open(self.manifest, 'a', encoding='utf-8') if self.manifest else None
+        records = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(self._run_job, job) for job in jobs]
+                for future in as_completed(futures):
+                    record = future.result()
+                    records.append(record)
+                    if out is not None:
+                        out.write(json.dumps(record) + '\n')
+                        out.flush()
+                    if self.on_result:
+                        self.on_result(record)
+        finally:
+            if out is not None:
+                out.close()
+        return records
+
+    def _run_job(self, job):
+        started = datetime.now()
+        start = time.perf_counter()
+        record = {'url': job['url'], 'started': started.strftime('%Y-%m-%d %H:%M:%S')}
+        try:
+            files, stats = self.scrape(job)
+        except Exception as e:
+            record.update(status='error', files=[], error=f"{type(e).__name__}: {str(e)}")
+        else:
+            record.update(status=job_status(files, stats), files=list(files), pages=stats.get('pages', 0),
+                          errors=stats.get('errors', 0))
+        record['seconds'] = round(time.perf_counter() - start, 3)
+        return record
@@ -0,0 +1,132 @@
+"""Headless Chrome render time and download volume for each browser profile.
+
+Serves the synthetic forum with assets (stylesheet, web font, an avatar per
+post, a video, ad and analytics scripts and an iframe) from a local server,
+renders the same thread pages with every profile in BROWSER_PROFILES, and
+reports per page: render time, requests and bytes the server sent, requests
+the profile blocked, and the memory held by Chrome afterwards. Requests and
+bytes saved are given against the 'full' profile, and the Markdown of each
+profile is checked against it. Needs Chrome; no network access is needed.
+
+Usage:
+    python benchmarks/bench_browser.py [--pages N] [--browsers N] [--latency SECONDS]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analysis import PageAnalyzer, render_page  # noqa: E402
+from driver_pool import DriverPool  # noqa: E402
+from fetcher import BROWSER_PROFILES, BrowserFetcher, WaitPolicy  # noqa: E402
+from forum_site import ForumServer, ForumSite  # noqa: E402
+
+SCRAPED_AT = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def process_tree_rss_mb(root_pid):
+    """Resident memory of root_pid's descendants (the chromedriver and Chrome processes), from /proc."""
+    if not os.path.isdir('/proc'):
+        return None
+    parents = {}
+    rss = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/status') as f:
+                status = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        parents[int(entry)] = int(status.get('PPid', '0').strip())
+        rss[int(entry)] = int(status.get('VmRSS', '0 kB').split()[0])
+    total = 0
+    for pid in rss:
+        ancestor = parents.get(pid)
+        while ancestor and ancestor != root_pid:
+            ancestor = parents.get(ancestor)
+        if ancestor == root_pid:
+            total += rss[pid]
+    return total / 1024
+
+
+def run_profile(name, urls, server, browsers):
+    profile = BROWSER_PROFILES[name]
+    pool = DriverPool(max_size=browsers)
+    fetcher = BrowserFetcher(pool, WaitPolicy('ready', timeout=10), profile)
+    try:
+        # Start the browsers before timing, so launch time isn't counted as render time
+        with ThreadPoolExecutor(max_workers=browsers) as executor:
+            list(executor.map(fetcher.fetch, urls[:browsers]))
+        server.stats(reset=True)
+
+        def render(url):
+            start = time.perf_counter()
+            result = fetcher.fetch(url)
+            return result, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=browsers) as executor:
+            results = list(executor.map(render, urls))
+        elapsed = time.perf_counter() - start
+        served = server.stats()
+        rss = process_tree_rss_mb(os.getpid())
+    finally:
+        pool.close()
+    pages = len(urls)
+    return {
+        'profile': name,
+        'pages_per_sec': pages / elapsed,
+        'render_p50_ms': statistics.median(ms for _, ms in results),
+        'requests_per_page': sum(kind['requests'] for kind in served.values()) / pages,
+        'kib_per_page': sum(kind['bytes'] for kind in served.values()) / pages / 1024,
+        'blocked_per_page': sum(result.requests_blocked or 0 for result, _ in results) / pages,
+        'chrome_rss_mb': rss,
+        'served': served,
+        'html': [result.html for result, _ in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=40, help='Thread pages rendered per profile')
+    parser.add_argument('--browsers', type=int, default=2, help='Chrome instances rendering at the same time')
+    parser.add_argument('--posts', type=int, default=20, help='Posts (and avatars) per thread page')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds of server delay per request')
+    args = parser.parse_args()
+
+    site = ForumSite(threads=args.pages, posts=args.posts, assets=True)
+    analyzer = PageAnalyzer()
+    with ForumServer(site, latency=args.latency) as server:
+        urls = [server.url(f'/forum/thread/{n}.html') for n in range(args.pages)]
+        results = [run_profile(name, urls, server, args.browsers) for name in BROWSER_PROFILES]
+
+    baseline = next(result for result in results if result['profile'] == 'full')
+    expected = [render_page(analyzer, html, url, SCRAPED_AT) for html, url in zip(baseline['html'], urls)]
+    print(f"{args.pages} pages, {args.posts} posts each, {args.browsers} browser(s), "
+          f"{args.latency * 1000:.0f} ms server latency")
+    for result in results:
+        rss = f"{result['chrome_rss_mb']:.0f} MiB" if result['chrome_rss_mb'] is not None else 'n/a'
+        same = all(render_page(analyzer, html, url, SCRAPED_AT) == markdown
+                   for html, url, markdown in zip(result['html'], urls, expected))
+        print(f"\n{result['profile']}: {result['pages_per_sec']:.1f} pages/s, render p50 {result['render_p50_ms']:.0f} ms, "
+              f"Chrome RSS {rss}")
+        print(f"  served per page: {result['requests_per_page']:.1f} requests, {result['kib_per_page']:.0f} KiB; "
+              f"blocked per page: {result['blocked_per_page']:.1f}")
+        print("  by kind: " + ', '.join(f"{kind} {counts['requests']}/{counts['bytes'] // 1024} KiB"
+                                        for kind, counts in sorted(result['served'].items())))
+        if result is not baseline:
+            print(f"  saved per page vs full: {baseline['requests_per_page'] - result['requests_per_page']:.1f} requests, "
+                  f"{baseline['kib_per_page'] - result['kib_per_page']:.0f} KiB; "
+                  f"render {100 * (1 - result['render_p50_ms'] / baseline['render_p50_ms']):.0f}% faster")
+        print(f"  Markdown identical to full: {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
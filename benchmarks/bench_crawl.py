@@ -0,0 +1,203 @@
+"""End-to-end crawl throughput against a local synthetic forum.
+
+Starts the ForumSite server in a child process, crawls it with WebScraper
+from a fresh output directory, and reports pages/s, per-page latency
+percentiles, peak RSS and the time split between fetch, parse, extract and
+write, taken from the scraper's per-page metrics. Results are written as
+JSON so runs of different versions can be compared with --compare. No
+network access is needed.
+
+Usage:
+    python benchmarks/bench_crawl.py [--threads N] [--workers N] [--async | --pipeline] [--output FILE]
+    python benchmarks/bench_crawl.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import scraper as scraper_module  # noqa: E402
+from forum_site import ForumServer, ForumSite  # noqa: E402
+from metrics import MemorySink, get_metrics  # noqa: E402
+
+# Metrics compared by --compare, and whether higher is better
+COMPARED = {
+    'pages_per_sec': True,
+    'latency_p50_ms': False,
+    'latency_p95_ms': False,
+    'peak_rss_mb': False,
+}
+
+
+# Metrics stages grouped into the columns of the time split
+SPLIT = {
+    'fetch': ('fetch', 'wait'),
+    'parse': ('parse',),
+    'extract': ('select', 'markdown', 'links', 'dates'),
+    'write': ('write', 'index'),
+}
+
+
+def stage_split(records):
+    """Sum per-page spans into fetch/parse/extract/write/other seconds; politeness delays are left out."""
+    split = dict.fromkeys(SPLIT, 0.0)
+    busy = 0.0
+    for record in records:
+        spans = record['spans']
+        busy += record['seconds'] - spans.get('throttle', 0.0)
+        for column, stages in SPLIT.items():
+            split[column] += sum(spans.get(stage, 0.0) for stage in stages)
+    split['other'] = max(0.0, busy - sum(split.values()))
+    return split
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MiB, or None where the resource module is missing (Windows).
+
+    Parse workers of the pipelined engine aren't included. They are started
+    by the forkserver, so RUSAGE_CHILDREN doesn't see them either.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def round_or_none(value, digits):
+    return round(value, digits) if value is not None else None
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))] if samples else 0.0
+
+
+def run(args):
+    site = ForumSite(args.threads, args.fanout, args.posts, args.post_words, args.clutter, args.seed)
+    metrics = get_metrics()
+    metrics.reset()
+    sink = MemorySink()
+    metrics.add_sink(sink)
+    rss_before = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as output_dir, ForumServer(site, latency=args.latency) as server:
+        scraper = scraper_module.WebScraper(output_dir=output_dir, days_limit=None, fetch_mode='static',
+                                            parser=args.parser)
+        try:
+            start = time.perf_counter()
+            if args.use_async:
+                files = scraper.crawl_async(server.url('/forum/'), max_depth=3, concurrency=args.concurrency,
+                                            per_host_limit=args.concurrency, host_delay=0.0)
+            elif args.pipeline:
+                files = scraper.crawl_pipelined(server.url('/forum/'), max_depth=3, workers=args.workers,
+                                                per_host_limit=args.workers, host_delay=0.0,
+                                                parse_workers=args.parse_workers)
+            else:
+                files = scraper.scrape_url(server.url('/forum/'), max_depth=3, workers=args.workers,
+                                           per_host_limit=args.workers, host_delay=0.0)
+            elapsed = time.perf_counter() - start
+        finally:
+            metrics.remove_sink(sink)
+        stats = scraper.crawl_stats
+        scraper.close()
+
+    latencies = [record['seconds'] * 1000 for record in sink.records]
+    split = stage_split(sink.records)
+    busy = sum(split.values()) or 1.0
+    return {
+        'pages': stats.get('pages', 0),
+        'files': len(files),
+        'errors': stats.get('errors', 0),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(stats.get('pages', 0) / elapsed, 2) if elapsed else 0.0,
+        'latency_p50_ms': round(statistics.median(latencies), 2) if latencies else 0.0,
+        'latency_p95_ms': round(percentile(latencies, 95), 2),
+        'peak_rss_mb': round_or_none(peak_rss_mb(), 1),
+        'rss_before_mb': round_or_none(rss_before, 1),
+        'split_seconds': {stage: round(seconds, 3) for stage, seconds in split.items()},
+        'split_percent': {stage: round(100 * seconds / busy, 1) for stage, seconds in split.items()},
+    }
+
+
+def compare(previous_path, current):
+    with open(previous_path, 'r') as f:
+        previous = json.load(f)['results']
+    print(f"\nCompared with {previous_path}:")
+    for metric, higher_is_better in COMPARED.items():
+        old, new = previous.get(metric), current.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        verdict = 'better' if better else 'worse' if abs(change) >= 0.05 else 'same'
+        print(f"  {metric:<16} {old:>10} -> {new:<10} ({change:+.1f}%, {verdict})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=500, help='Thread pages on the synthetic forum')
+    parser.add_argument('--fanout', type=int, default=25, help='Thread links per listing page')
+    parser.add_argument('--posts', type=int, default=20, help='Posts per thread page (page weight)')
+    parser.add_argument('--post-words', type=int, default=80, help='Average words per post (page weight)')
+    parser.add_argument('--clutter', type=float, default=0.3, help='Fraction of posts followed by an ad block')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of server delay per response')
+    parser.add_argument('--workers', type=int, default=8, help='Crawl workers (threaded engine)')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Use the asyncio crawler')
+    parser.add_argument('--pipeline', action='store_true', help='Use the pipelined engine with parse processes')
+    parser.add_argument('--parse-workers', type=int, help='Parse processes with --pipeline (default: one per core)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Pages in flight with --async')
+    parser.add_argument('--parser', choices=['html.parser', 'lxml'], default='html.parser')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench_crawl.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', metavar='FILE', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    results = run(args)
+    report = {
+        'benchmark': 'crawl',
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{results['pages']} pages ({results['files']} saved, {results['errors']} errors) "
+          f"in {results['seconds']:.2f}s: {results['pages_per_sec']:.1f} pages/s")
+    print(f"Per-page latency: p50 {results['latency_p50_ms']:.1f} ms, p95 {results['latency_p95_ms']:.1f} ms")
+    if results['peak_rss_mb'] is None:
+        print("Peak RSS: not available on this platform")
+    else:
+        print(f"Peak RSS: {results['peak_rss_mb']:.1f} MiB (before crawl: {results['rss_before_mb']:.1f} MiB)"
+              + (", main process only; parse workers are not included" if args.pipeline else ""))
+    print("Time split: " + ', '.join(f"{stage} {seconds:.2f}s ({results['split_percent'][stage]:.0f}%)"
+                                     for stage, seconds in results['split_seconds'].items()))
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""Per-page parse and extract time on large synthetic forum pages.
+
+Compares the single-pass ContentExtractor against the original sequential
+find/find_all extraction, checks that both produce byte-identical Markdown,
+and reports timings for each available parser.
+
+Usage:
+    python benchmarks/bench_extraction.py [--pages N] [--posts N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from extraction import CONTENT_SELECTORS, ContentExtractor  # noqa: E402
+
+SCRAPED_AT = datetime(2024, 1, 1, 12, 0, 0)
+
+WORDS = ("forum thread reply post quote member topic discussion community answer question "
+         "update release version issue thanks great idea").split()
+
+
+def legacy_markdown(soup, url, scraped_at):
+    """The extraction code from scrape_url before the single-pass extractor."""
+    title = soup.title.string if soup.title else "Untitled"
+
+    main_content = None
+    for selector in CONTENT_SELECTORS:
+        if 'class_' in selector:
+            main_content = soup.find(selector['tag'], class_=selector['class_'])
+        elif 'id' in selector:
+            main_content = soup.find(selector['tag'], id=selector['id'])
+        else:
+            main_content = soup.find(selector['tag'])
+
+        if main_content:
+            break
+
+    if not main_content:
+        main_content = soup.find('body')
+        if main_content:
+            for element in main_content.find_all(['nav', 'header', 'footer', 'aside', 'script', 'style', 'iframe']):
+                element.decompose()
+
+            ad_indicators = ['ad', 'advertisement', 'banner', 'sidebar', 'popup', 'modal', 'newsletter']
+            for indicator in ad_indicators:
+                for element in main_content.find_all(class_=lambda x: x and indicator in x.lower()):
+                    element.decompose()
+                for element in main_content.find_all(id=lambda x: x and indicator in x.lower()):
+                    element.decompose()
+
+    markdown_content = f"# {title}\n\n"
+    markdown_content += f"Source: {url}\n"
+    markdown_content += f"Date scraped: {scraped_at.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    if main_content:
+        for element in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p']):
+            text = element.get_text().strip()
+            if text and len(text) > 20:
+                if element.name.startswith('h'):
+                    markdown_content += f"\n{'#' * int(element.name[1:])} {text}\n"
+                else:
+                    markdown_content += f"\n{text}\n"
+    return markdown_content
+
+
+def sentence(rng, n=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def clutter(rng):
+    kind = rng.choice(['class', 'id', 'tag'])
+    if kind == 'class':
+        cls = rng.choice(['ad-slot', 'Banner top', 'sidebar-left', 'newsletter', 'header-AD', 'x modal'])
+        return f'<div class="{cls}"><p>{sentence(rng)}</p><span>sponsored</span></div>'
+    if kind == 'id':
+        return f'<div id="{rng.choice(["popup-1", "Advertisement", "leftbanner"])}"><p>{sentence(rng)}</p></div>'
+    tag = rng.choice(['nav', 'aside', 'footer', 'script', 'iframe', 'style'])
+    return f'<{tag}><p>{sentence(rng)}</p></{tag}>'
+
+
+def post(rng, index):
+    parts = [f'<div class="post" id="post-{index}">',
+             f'<h{rng.randint(2, 4)}>{sentence(rng, 6)}</h{rng.randint(2, 4)}>']
+    for _ in range(rng.randint(2, 6)):
+        if rng.random() < 0.2:
+            parts.append(f'<p>{sentence(rng)} <b>{sentence(rng, 4)}</b> <span class="ad">ad</span></p>')
+        else:
+            parts.append(f'<p>{sentence(rng, rng.randint(3, 30))}</p>')
+        if rng.random() < 0.3:
+            parts.append(clutter(rng))
+    parts.append(f'<blockquote><p>{sentence(rng)}<p>{sentence(rng)}</p></p></blockquote>')
+    parts.append('</div>')
+    return ''.join(parts)
+
+
+def make_page(rng, posts, wrapper):
+    body = ''.join(post(rng, i) for i in range(posts))
+    clutter_html = ''.join(clutter(rng) for _ in range(posts // 4))
+    if wrapper == 'article':
+        body = f'<div class="content">{clutter_html}</div><article>{body}</article>'
+    elif wrapper == 'div.content':
+        body = f'<div class="wrap"><div class="main content">{body}</div></div>'
+    elif wrapper == 'div#content':
+        body = f'<div id="content">{body}</div>'
+    else:
+        body = clutter_html + body
+    return (f'<html><head><title>{sentence(rng, 5)}</title><style>p {{}}</style></head>'
+            f'<body><header><nav><a href="/">Home</a></nav></header>{body}'
+            f'<footer><p>{sentence(rng)}</p></footer></body></html>')
+
+
+def time_call(fn, repeat, setup=None):
+    """Median time of fn() over repeat runs. With setup, each run gets fn(setup()), untimed."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=8, help='Number of synthetic pages')
+    parser.add_argument('--posts', type=int, default=300, help='Posts per page')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per page')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    wrappers = ['article', 'div.content', 'div#content', 'body']
+    pages = [make_page(rng, args.posts, wrappers[i % len(wrappers)]) for i in range(args.pages)]
+    extractor = ContentExtractor()
+
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+
+    print(f"{len(pages)} pages, average {sum(map(len, pages)) // len(pages) // 1024} KiB")
+    for parser_name in parsers:
+        parse_times, legacy_times, single_times = [], [], []
+        for index, html in enumerate(pages):
+            # Extraction modifies the soup, so every run gets a fresh one, parsed outside the timing
+            parse = lambda: BeautifulSoup(html, parser_name)  # noqa: E731
+            parse_time, _ = time_call(parse, args.repeat)
+            legacy_time, legacy = time_call(
+                lambda soup: legacy_markdown(soup, 'http://forum.test/t', SCRAPED_AT), args.repeat, parse)
+            single_time, single = time_call(
+                lambda soup: extractor.to_markdown(soup, 'http://forum.test/t', SCRAPED_AT), args.repeat, parse)
+            if legacy != single:
+                print(f"MISMATCH on page {index} ({wrappers[index % len(wrappers)]}) with {parser_name}")
+                sys.exit(1)
+            parse_times.append(parse_time)
+            legacy_times.append(legacy_time)
+            single_times.append(single_time)
+
+        parse_ms = statistics.mean(parse_times) * 1000
+        legacy_ms = statistics.mean(legacy_times) * 1000
+        single_ms = statistics.mean(single_times) * 1000
+        print(f"[{parser_name}] parse {parse_ms:.1f} ms | extract: legacy {legacy_ms:.1f} ms, "
+              f"single-pass {single_ms:.1f} ms ({legacy_ms / max(single_ms, 1e-9):.1f}x) | "
+              f"parse+extract {parse_ms + single_ms:.1f} ms/page")
+    print("Output identical for all pages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Full-text search latency on a large synthetic library.
+
+Indexes N synthetic forum documents through LibraryIndex.add, the same path
+the scraper uses when it saves a page, then times ranked queries with and
+without domain and date filters.
+
+Usage:
+    python benchmarks/bench_search.py [--docs N] [--queries N]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library import LibraryIndex  # noqa: E402
+
+START = datetime(2024, 1, 1)
+
+
+def make_vocabulary(rng, size):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def make_document(rng, index, vocabulary, cum_weights, domains):
+    domain = domains[index % len(domains)]
+    scraped_at = START + timedelta(minutes=index * 5)
+    words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(150, 600))
+    paragraphs = [' '.join(words[i:i + 40]) for i in range(0, len(words), 40)]
+    title = ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=6))
+    return (f"# {title}\n\nSource: https://{domain}/thread/{index}\n"
+            f"Date scraped: {scraped_at.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            + ''.join(f"\n{paragraph}\n" for paragraph in paragraphs))
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, default=100000, help='Number of synthetic documents')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per scenario')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, 50000)
+    # Zipf-like word frequencies, like natural text
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+    domains = [f"forum{i}.test" for i in range(20)]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        library = LibraryIndex(output_dir)
+        start = time.perf_counter()
+        for index in range(args.docs):
+            library.add(f"doc_{index}.md", make_document(rng, index, vocabulary, cum_weights, domains))
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {args.docs} documents in {elapsed:.1f}s "
+              f"({args.docs / elapsed:.0f} docs/s, {os.path.getsize(library.path) / 2 ** 20:.0f} MiB)")
+
+        last_day = (START + timedelta(minutes=args.docs * 5)).date()
+        scenarios = {
+            'common word': lambda: vocabulary[rng.randint(0, 20)],
+            'mid-frequency word': lambda: vocabulary[rng.randint(200, 2000)],
+            'rare word': lambda: vocabulary[rng.randint(10000, 49999)],
+            'two words': lambda: f"{vocabulary[rng.randint(0, 500)]} {vocabulary[rng.randint(0, 500)]}",
+            'prefix': lambda: vocabulary[rng.randint(50, 500)][:3] + '*',
+        }
+        filters = {
+            'no filter': {},
+            'domain + last 30 days': lambda: {'domain': rng.choice(domains),
+                                              'since': last_day - timedelta(days=30), 'until': last_day},
+        }
+        for filter_name, make_filter in filters.items():
+            for name, make_query in scenarios.items():
+                samples = []
+                hits = []
+                for _ in range(args.queries):
+                    query = make_query()
+                    kwargs = make_filter() if callable(make_filter) else make_filter
+                    begin = time.perf_counter()
+                    total, _ = library.search(query, **kwargs)
+                    samples.append((time.perf_counter() - begin) * 1000)
+                    hits.append(total)
+                print(f"[{filter_name}] {name:<18} p50 {statistics.median(samples):6.1f} ms  "
+                      f"p95 {percentile(samples, 95):6.1f} ms  avg hits {statistics.mean(hits):.0f}")
+        library.close()
+
+
+if __name__ == '__main__':
+    main()
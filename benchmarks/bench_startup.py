@@ -0,0 +1,87 @@
+"""Cold-start time of the CLI, the dashboard's imports and an idle scheduler tick.
+
+Each scenario runs in a fresh interpreter, so nothing is cached in
+sys.modules, and is timed from process start to exit. The heavy third-party
+imports (requests, selenium, bs4) are timed on their own for reference: none
+of the scenarios should pay for them, since they are only imported when a
+page is actually fetched or parsed.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The project modules app.py imports; Streamlit itself is left out, since it isn't ours to speed up
+DASHBOARD_IMPORTS = """
+import scraper, driver_pool, crawl_store, library, archive, analysis, extraction
+import urls, scheduler, config_store, metrics, output_stores
+"""
+
+# A scheduler tick that finds nothing due: load the sources, schedule them, build a scraper, close it
+IDLE_TICK = """
+import os, sys
+from datetime import datetime
+from scheduler import get_scheduler, shutdown_scheduler
+from scraper import WebScraper
+
+sources = [{'url': 'http://127.0.0.1:9/forum/', 'interval_hours': 24,
+            'last_scraped': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]
+scheduler = get_scheduler(lambda url: True)
+scheduler.sync(sources)
+with WebScraper(output_dir=sys.argv[1]) as scraper:
+    pass
+shutdown_scheduler()
+"""
+
+# Modules that must not be imported by any scenario above
+HEAVY_MODULES = ('requests', 'selenium.webdriver', 'bs4')
+
+
+def run(args, runs):
+    """Run a command runs times. Returns the wall times in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def heavy_imports(code, *argv):
+    """Return which of HEAVY_MODULES a snippet of code leaves in sys.modules."""
+    check = code + f"\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', 'import sys\n' + check, *argv], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.strip().splitlines()
+    return output[-1] if output else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Runs per scenario')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        scenarios = [
+            ('python (empty)', [sys.executable, '-c', 'pass'], None),
+            ('main.py --help', [sys.executable, 'main.py', '--help'], 'import main'),
+            ('dashboard imports', [sys.executable, '-c', DASHBOARD_IMPORTS], DASHBOARD_IMPORTS),
+            ('idle scheduler tick', [sys.executable, '-c', IDLE_TICK, output_dir], IDLE_TICK),
+            ('requests + selenium + bs4', [sys.executable, '-c', 'import ' + ', '.join(HEAVY_MODULES)], None),
+        ]
+        print(f"{'scenario':<28}{'median ms':>10}{'min ms':>10}  heavy imports")
+        for name, command, code in scenarios:
+            samples = run(command, args.runs)
+            loaded = heavy_imports(code, output_dir) if code else ''
+            print(f"{name:<28}{statistics.median(samples):>10.1f}{min(samples):>10.1f}  {loaded or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""Synthetic forum site served over local HTTP, for crawl benchmarks.
+
+The site is generated on the fly from a seed, so every run sees the same
+pages without anything being written to disk:
+
+    /forum/                   index linking to every listing page
+    /forum/list/<n>.html      listing page with `fanout` thread links and dates
+    /forum/thread/<id>.html   thread page with `posts` posts
+
+With assets=True, pages also pull in what a real forum page does: a
+stylesheet and web font, an avatar image per post, a video, and ad and
+analytics scripts and iframes under /ads/ and /analytics/. The server
+counts requests and bytes served by kind; GET /stats returns the counts as
+JSON and /stats?reset=1 clears them.
+
+With sitemaps=True, the site also has a robots.txt pointing at a sitemap
+index (/sitemap.xml), sitemaps of up to 1000 threads each with their last
+activity as lastmod, and an RSS feed of the newest threads (/forum/index.rss)
+advertised on the index page.
+
+Usage:
+    python benchmarks/forum_site.py --threads 1000 --port 8000
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import random
+import time
+import urllib.request
+from datetime import datetime, timedelta
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("forum thread reply post quote member topic discussion community answer question update "
+         "release version issue thanks great idea firmware battery install config error driver kernel "
+         "network router setting backup restore screen keyboard mouse monitor laptop desktop server").split()
+
+# Asset path prefix -> (kind, content type, size in bytes)
+ASSETS = {
+    '/static/site.css': ('stylesheet', 'text/css', 4 * 1024),
+    '/static/font.woff2': ('font', 'font/woff2', 60 * 1024),
+    '/static/avatar/': ('image', 'image/png', 8 * 1024),
+    '/static/clip.mp4': ('media', 'video/mp4', 512 * 1024),
+    '/ads/': ('ads', 'application/javascript', 30 * 1024),
+    '/analytics/': ('ads', 'application/javascript', 20 * 1024),
+}
+
+
+class ForumSite:
+    """Generates the pages of a synthetic forum.
+
+    Args:
+        threads (int): Number of thread pages
+        fanout (int): Thread links per listing page
+        posts (int): Posts per thread page
+        post_words (int): Average words per post
+        clutter (float): Fraction of posts followed by an ad/sidebar block
+        seed (int): Seed for the generated text
+        assets (bool): Reference images, fonts, media and ad scripts from every page
+        sitemaps (bool): Serve robots.txt, sitemaps and an RSS feed
+    """
+
+    SITEMAP_SIZE = 1000
+    FEED_SIZE = 20
+
+    def __init__(self, threads=500, fanout=25, posts=20, post_words=80, clutter=0.3, seed=1, assets=False,
+                 sitemaps=False):
+        self.threads = threads
+        self.fanout = max(1, fanout)
+        self.posts = posts
+        self.post_words = post_words
+        self.clutter = clutter
+        self.seed = seed
+        self.assets = assets
+        self.sitemaps = sitemaps
+        self.listing_pages = (threads + self.fanout - 1) // self.fanout
+        self.now = datetime(2024, 6, 1, 12, 0, 0)
+
+    @property
+    def page_count(self):
+        """Pages a full crawl from the index fetches."""
+        return 1 + self.listing_pages + self.threads
+
+    def render(self, path):
+        """Return the HTML for a path, or None if there is no such page."""
+        if path in ('/forum/', '/forum/index.html'):
+            return self.index()
+        if path.startswith('/forum/list/') and path.endswith('.html'):
+            number = path[len('/forum/list/'):-len('.html')]
+            if number.isdigit() and 1 <= int(number) <= self.listing_pages:
+                return self.listing(int(number))
+        if path.startswith('/forum/thread/') and path.endswith('.html'):
+            number = path[len('/forum/thread/'):-len('.html')]
+            if number.isdigit() and int(number) < self.threads:
+                return self.thread(int(number))
+        return None
+
+    def document(self, path, base_url):
+        """Return (content type, body) for robots.txt, a sitemap or the feed, or None."""
+        if path == '/robots.txt':
+            return 'text/plain', f"User-agent: *\nDisallow: /members/\nSitemap: {base_url}/sitemap.xml\n"
+        if path == '/sitemap.xml':
+            sitemaps = ''.join(
+                f'<sitemap><loc>{base_url}/sitemaps/threads-{n}.xml</loc>'
+                f'<lastmod>{self._date(n * self.SITEMAP_SIZE):%Y-%m-%dT%H:%M:%S}+00:00</lastmod></sitemap>'
+                for n in range((self.threads + self.SITEMAP_SIZE - 1) // self.SITEMAP_SIZE)
+            )
+            return 'application/xml', ('<?xml version="1.0" encoding="UTF-8"?>'
+                                       f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{sitemaps}</sitemapindex>')
+        if path.startswith('/sitemaps/threads-') and path.endswith('.xml'):
+            number = path[len('/sitemaps/threads-'):-len('.xml')]
+            if not number.isdigit():
+                return None
+            first = int(number) * self.SITEMAP_SIZE
+            urls = ''.join(
+                f'<url><loc>{base_url}/forum/thread/{thread_id}.html</loc>'
+                f'<lastmod>{self._date(thread_id):%Y-%m-%dT%H:%M:%S}+00:00</lastmod></url>'
+                for thread_id in range(first, min(first + self.SITEMAP_SIZE, self.threads))
+            )
+            return 'application/xml', ('<?xml version="1.0" encoding="UTF-8"?>'
+                                       f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>')
+        if path == '/forum/index.rss':
+            items = ''.join(
+                f'<item><title>Thread {thread_id}</title><link>{base_url}/forum/thread/{thread_id}.html</link>'
+                f'<pubDate>{self._date(thread_id):%a, %d %b %Y %H:%M:%S} +0000</pubDate></item>'
+                for thread_id in range(min(self.FEED_SIZE, self.threads))
+            )
+            return 'application/rss+xml', (f'<?xml version="1.0"?><rss version="2.0"><channel>'
+                                           f'<title>Synthetic Forum</title>{items}</channel></rss>')
+        return None
+
+    def asset(self, path):
+        """Return (kind, content type, body) for an asset path, or None."""
+        for prefix, (kind, content_type, size) in ASSETS.items():
+            if path == prefix or (prefix.endswith('/') and path.startswith(prefix)):
+                if path.endswith('.html'):
+                    return kind, 'text/html', b'<html><body>' + b'x' * size + b'</body></html>'
+                if content_type == 'text/css':
+                    rules = b"@font-face { font-family: Forum; src: url(/static/font.woff2); } body { font-family: Forum; }"
+                    return kind, content_type, rules + b'/*' + b'x' * (size - len(rules) - 4) + b'*/'
+                if content_type == 'application/javascript':
+                    return kind, content_type, b'/*' + b'x' * (size - 4) + b'*/'
+                return kind, content_type, b'\0' * size
+        return None
+
+    def index(self):
+        pages = ''.join(f'<li><a href="/forum/list/{n}.html">Page {n}</a></li>'
+                        for n in range(1, self.listing_pages + 1))
+        feed = '<link rel="alternate" type="application/rss+xml" href="/forum/index.rss">' if self.sitemaps else ''
+        return self._page("Synthetic Forum", f'<main><h1>Synthetic Forum</h1><ul class="pages">{pages}</ul></main>',
+                          feed)
+
+    def listing(self, number):
+        rng = self._rng('list', number)
+        first = (number - 1) * self.fanout
+        rows = []
+        for thread_id in range(first, min(first + self.fanout, self.threads)):
+            rows.append(
+                f'<li class="thread-row"><a href="/forum/thread/{thread_id}.html">{self._sentence(rng, 6)}</a>'
+                f' <span class="lastpost"><time datetime="{self._date(thread_id):%Y-%m-%dT%H:%M:%S}">'
+                f'{self._date(thread_id):%b %d, %Y}</time></span></li>'
+            )
+        nav = f'<a href="/forum/list/{number + 1}.html">Next</a>' if number < self.listing_pages else ''
+        return self._page(f"Page {number}", f'<div class="content"><ul class="threads">{"".join(rows)}</ul>'
+                                            f'<div class="pagination">{nav}</div></div>')
+
+    def thread(self, thread_id):
+        rng = self._rng('thread', thread_id)
+        posted = self._date(thread_id)
+        posts = []
+        for index in range(self.posts):
+            words = max(5, int(rng.gauss(self.post_words, self.post_words / 3)))
+            paragraphs = ''.join(f'<p>{self._sentence(rng, n)}</p>' for n in self._split(rng, words))
+            avatar = f'<img src="/static/avatar/{thread_id}-{index}.png" width="48">' if self.assets else ''
+            posts.append(
+                f'<div class="post" id="post-{index}"><div class="post-header">{avatar}'
+                f'<span class="date">{posted - timedelta(hours=self.posts - index):%b %d, %Y}</span>'
+                f' <a href="/members/{rng.randint(1, 500)}/">member{rng.randint(1, 500)}</a></div>'
+                f'<h3>{self._sentence(rng, 5)}</h3>{paragraphs}</div>'
+            )
+            if rng.random() < self.clutter:
+                posts.append(f'<div class="ad-slot banner"><p>{self._sentence(rng, 12)}</p>'
+                             f'<a href="https://ads.example/{index}">Sponsored</a></div>')
+        body = (f'<nav><a href="/forum/">Forum</a></nav>'
+                f'<article><h1>{self._sentence(rng, 7)}</h1>{"".join(posts)}</article>'
+                f'<aside class="sidebar"><p>{self._sentence(rng, 20)}</p></aside>')
+        return self._page(f"Thread {thread_id}", body)
+
+    def _page(self, title, body, head=''):
+        extras = ''
+        if self.assets:
+            head += '<link rel="stylesheet" href="/static/site.css">'
+            extras = ('<video src="/static/clip.mp4" preload="auto" autoplay muted></video>'
+                      '<script src="/ads/ad.js"></script><script src="/analytics/collect.js"></script>'
+                      '<iframe src="/ads/frame.html"></iframe>')
+        return (f'<!DOCTYPE html><html><head><title>{title}</title>'
+                f'<style>body {{ font-family: sans-serif; }}</style>{head}</head>'
+                f'<body><header><p>Synthetic Forum</p></header>{body}<footer><p>Synthetic forum footer text.</p>'
+                f'<script>var analytics = 1;</script>{extras}</footer></body></html>')
+
+    def _date(self, thread_id):
+        # Newer threads first: thread i was last active i hours ago
+        return self.now - timedelta(hours=thread_id)
+
+    def _rng(self, kind, number):
+        digest = hashlib.sha256(f"{self.seed}:{kind}:{number}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], 'big'))
+
+    def _split(self, rng, words):
+        while words > 0:
+            size = min(words, rng.randint(20, 60))
+            yield size
+            words -= size
+
+    def _sentence(self, rng, n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+
+def make_handler(site, latency=0.0):
+    stats = {}
+    stats_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path, _, query = self.path.partition('?')
+            if path == '/stats':
+                with stats_lock:
+                    body = json.dumps(stats).encode('utf-8')
+                    if query == 'reset=1':
+                        stats.clear()
+                self._send(200, 'application/json', body)
+                return
+            if latency:
+                time.sleep(latency)
+            asset = site.asset(path) if site.assets else None
+            document = site.document(path, f"http://{self.headers['Host']}") if site.sitemaps else None
+            if asset is not None:
+                kind, content_type, body = asset
+                status = 200
+            elif document is not None:
+                kind, status = 'discovery', 200
+                content_type, body = document[0], document[1].encode('utf-8')
+            else:
+                html = site.render(path)
+                kind, content_type, status = 'page', 'text/html; charset=utf-8', 200 if html is not None else 404
+                body = (html if html is not None else '<html><body>Not found</body></html>').encode('utf-8')
+            with stats_lock:
+                counts = stats.setdefault(kind, {'requests': 0, 'bytes': 0})
+                counts['requests'] += 1
+                counts['bytes'] += len(body)
+            self._send(status, content_type, body)
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def _serve(site, latency, port, ready):
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(site, latency))
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class ForumServer:
+    """Serves a ForumSite from a child process, so its CPU and memory don't count against the crawler.
+
+    with ForumServer(site) as server:
+        scraper.scrape_url(server.url('/forum/'))
+    """
+
+    def __init__(self, site, latency=0.0, port=0):
+        self.site = site
+        self.latency = latency
+        self.port = port
+        self._process = None
+
+    def start(self):
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(target=_serve, args=(self.site, self.latency, self.port, ready),
+                                                daemon=True)
+        self._process.start()
+        self.port = ready.get(timeout=10)
+        return self
+
+    def url(self, path='/forum/'):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def stats(self, reset=False):
+        """Return the requests and bytes served so far, by kind of resource."""
+        with urllib.request.urlopen(self.url('/stats?reset=1' if reset else '/stats')) as response:
+            return json.loads(response.read())
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=500, help='Number of thread pages')
+    parser.add_argument('--fanout', type=int, default=25, help='Thread links per listing page')
+    parser.add_argument('--posts', type=int, default=20, help='Posts per thread page')
+    parser.add_argument('--post-words', type=int, default=80, help='Average words per post')
+    parser.add_argument('--clutter', type=float, default=0.3, help='Fraction of posts followed by an ad block')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of delay added to every response')
+    parser.add_argument('--assets', action='store_true', help='Add images, fonts, media and ad scripts to pages')
+    parser.add_argument('--sitemaps', action='store_true', help='Serve robots.txt, sitemaps and an RSS feed')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    site = ForumSite(args.threads, args.fanout, args.posts, args.post_words, args.clutter, args.seed, args.assets,
+                     args.sitemaps)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(site, args.latency))
+    print(f"Serving {site.page_count} pages at http://127.0.0.1:{server.server_address[1]}/forum/")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
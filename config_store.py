@@ -0,0 +1,148 @@
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+class ConfigStore:
+    """A JSON file kept in memory and shared by every thread in the process.
+
+    The file is parsed once and parsed again only when its modification time
+    or size changes, e.g. after it was edited by hand. Changes are applied to
+    the in-memory copy under a lock. They are written back after flush_delay
+    seconds, so a burst of changes costs one write. Writes go to a temporary
+    file that is renamed over the original, so readers never see a partial
+    file.
+    """
+
+    def __init__(self, path, default, flush_delay=0.5):
+        self.path = path
+        self.default = default
+        self.flush_delay = flush_delay
+        self._data = None
+        self._signature = None
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def get(self):
+        """Return a copy of the current contents that the caller is free to change."""
+        with self._lock:
+            self._reload_if_changed()
+            return copy.deepcopy(self._data)
+
+    @contextmanager
+    def modify(self):
+        """Change the contents in place; the change is saved shortly afterwards.
+
+        with store.modify() as sources:
+            sources.append(source)
+        """
+        with self._lock:
+            self._reload_if_changed()
+            yield self._data
+            self._mark_dirty()
+
+    def set(self, data):
+        with self._lock:
+            self._data = copy.deepcopy(data)
+            self._mark_dirty()
+
+    def update(self, values):
+        """Merge values into a dict-valued store."""
+        with self.modify() as data:
+            data.update(values)
+
+    def flush(self):
+        """Write pending changes now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            temp_path = None
+            try:
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.",
+                                                 suffix='.tmp')
+                try:
+                    os.chmod(temp_path, os.stat(self.path).st_mode & 0o777)
+                except FileNotFoundError:
+                    os.chmod(temp_path, 0o644)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self._data, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"Error saving {self.path}: {str(e)}")
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
+                self._schedule_flush()  # Try again later rather than losing the change
+                return
+            self._dirty = False
+            self._signature = self._stat()
+
+    def _reload_if_changed(self):
+        signature = self._stat()
+        if self._data is not None and (signature == self._signature or self._dirty):
+            return  # Unchanged on disk, or local changes not yet written take precedence
+        data = copy.deepcopy(self.default)
+        if signature is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading {self.path}: {str(e)}")
+                if self._data is not None:
+                    return
+        self._data = data
+        self._signature = signature
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _mark_dirty(self):
+        self._dirty = True
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_config_store(path, default=None):
+    """Return the process-wide store for a JSON file, creating it on first use.
+
+    default is the contents used while the file doesn't exist (an empty dict
+    if not given).
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ConfigStore(path, {} if default is None else default)
+        return _stores[key]
+
+
+def flush_config_stores():
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+
+atexit.register(flush_config_stores)
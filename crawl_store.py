@@ -0,0 +1,252 @@
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    max_depth INTEGER,
+    started REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    crawl TEXT NOT NULL,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    last_fetched REAL,
+    output_file TEXT,
+    PRIMARY KEY (crawl, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_urls_status ON urls (crawl, status);
+CREATE TABLE IF NOT EXISTS validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    output_file TEXT,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS discovery (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content TEXT NOT NULL,
+    fetched REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# URL statuses
+QUEUED = 'queued'
+EXPANDED = 'expanded'  # Listing page whose links were followed
+SAVED = 'saved'
+UNCHANGED = 'unchanged'  # Refetched, but identical to the last saved copy
+OUTDATED = 'outdated'  # Older than the crawl's days limit, not saved or expanded
+ERROR = 'error'
+STALE = 'stale'  # Fetched before, then queued by a run that was abandoned
+
+# Crawl states
+RUNNING = 'running'
+PAUSED = 'paused'
+FINISHED = 'finished'
+
+
+class CrawlStore:
+    """On-disk crawl frontier and seen-URL store backed by SQLite.
+
+    Each crawl is identified by its start URL. Every URL discovered by a crawl
+    is recorded with its depth, status, last fetch time and output file, so an
+    interrupted or paused crawl can pick up its frontier where it left off.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._claimed = set()  # Crawls being run in this process
+
+    def claim(self, crawl):
+        """Reserve a crawl for one run in this process.
+
+        Two runs of the same crawl share its frontier, so a second one would
+        reset the first's. Returns False if the crawl is already claimed;
+        otherwise call release() when the run is over.
+        """
+        with self._lock:
+            if crawl in self._claimed:
+                return False
+            self._claimed.add(crawl)
+            return True
+
+    def release(self, crawl):
+        with self._lock:
+            self._claimed.discard(crawl)
+
+    def start_crawl(self, crawl, max_depth, resume=False):
+        """Mark a crawl as running. A fresh (non-resumed) run starts a new seen-URL window."""
+        now = time.time()
+        with self._lock, self._conn:
+            if resume:
+                self._conn.execute(
+                    "UPDATE crawls SET state = ?, updated = ? WHERE crawl = ?", (RUNNING, now, crawl)
+                )
+            else:
+                self._conn.execute(
+                    "INSERT INTO crawls (crawl, state, max_depth, started, updated) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(crawl) DO UPDATE SET state = excluded.state, max_depth = excluded.max_depth, "
+                    "started = excluded.started, updated = excluded.updated",
+                    (crawl, RUNNING, max_depth, now, now)
+                )
+                # Anything left queued by an abandoned run is no longer part of the frontier
+                self._conn.execute(
+                    "DELETE FROM urls WHERE crawl = ? AND status = ? AND last_fetched IS NULL", (crawl, QUEUED)
+                )
+                self._conn.execute(
+                    "UPDATE urls SET status = ? WHERE crawl = ? AND status = ?", (STALE, crawl, QUEUED)
+                )
+
+    def set_state(self, crawl, state):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE crawls SET state = ?, updated = ? WHERE crawl = ?", (state, time.time(), crawl))
+
+    def get_state(self, crawl):
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM crawls WHERE crawl = ?", (crawl,)).fetchone()
+        return row[0] if row else None
+
+    def is_resumable(self, crawl):
+        """A crawl can be resumed if it was paused or interrupted with URLs still queued."""
+        if self.get_state(crawl) not in (RUNNING, PAUSED):
+            return False
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM urls WHERE crawl = ? AND status = ? LIMIT 1", (crawl, QUEUED)
+            ).fetchone()
+        return row is not None
+
+    def enqueue(self, crawl, links):
+        """Record (url, depth) pairs as queued."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO urls (crawl, url, depth, status) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(crawl, url) DO UPDATE SET depth = excluded.depth, status = excluded.status",
+                [(crawl, url, depth, QUEUED) for url, depth in links]
+            )
+
+    def record_page(self, crawl, url, status, output_file=None, new_links=()):
+        """Record the outcome of a page and queue the links it produced, in one transaction."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE urls SET status = ?, last_fetched = ?, output_file = ? "
+                "WHERE crawl = ? AND url = ?",
+                (status, time.time(), output_file, crawl, url)
+            )
+            if new_links:
+                self._conn.executemany(
+                    "INSERT INTO urls (crawl, url, depth, status) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(crawl, url) DO UPDATE SET depth = excluded.depth, status = excluded.status",
+                    [(crawl, link, depth, QUEUED) for link, depth in new_links]
+                )
+
+    def queued(self, crawl):
+        """Return the queued (url, depth) pairs of a crawl, shallowest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT url, depth FROM urls WHERE crawl = ? AND status = ? ORDER BY depth", (crawl, QUEUED)
+            ).fetchall()
+
+    def seen(self, crawl):
+        """Return every URL the current run of a crawl has queued or fetched."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT u.url FROM urls u JOIN crawls c ON c.crawl = u.crawl "
+                "WHERE u.crawl = ? AND (u.status = ? OR u.last_fetched >= c.started)", (crawl, QUEUED)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def output_files(self, crawl):
+        """Return the files written by the current run of a crawl."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT u.output_file FROM urls u JOIN crawls c ON c.crawl = u.crawl "
+                "WHERE u.crawl = ? AND u.output_file IS NOT NULL AND u.last_fetched >= c.started", (crawl,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def recently_saved(self, crawl, urls, within_seconds):
+        """Return the subset of urls saved by this crawl in the last within_seconds."""
+        since = time.time() - within_seconds
+        found = set()
+        urls = list(urls)
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT url FROM urls WHERE crawl = ? AND status IN (?, ?) AND last_fetched >= ? "
+                    f"AND url IN ({placeholders})",
+                    [crawl, SAVED, UNCHANGED, since] + chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def fetched_before(self, crawl, urls):
+        """Return the subset of urls any run of this crawl has fetched."""
+        found = set()
+        urls = list(urls)
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT url FROM urls WHERE crawl = ? AND last_fetched IS NOT NULL AND url IN ({placeholders})",
+                    [crawl] + chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def get_validators(self, url):
+        """Return the cached response metadata for a normalized URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, output_file FROM validators WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'content_hash': row[2], 'output_file': row[3]}
+
+    def save_validators(self, url, etag, last_modified, content_hash, output_file):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, content_hash, output_file, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, output_file, time.time())
+            )
+
+    def get_discovery(self, url):
+        """Return the cached robots.txt, sitemap or feed at url as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content, fetched FROM discovery WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'content': json.loads(row[2]), 'fetched': row[3]}
+
+    def save_discovery(self, url, etag, last_modified, content, fetched=None):
+        """Cache what was parsed from a robots.txt, sitemap or feed, with its validators."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO discovery (url, etag, last_modified, content, fetched) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(content), fetched or time.time())
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,290 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from urls import normalize_url
+from crawl_store import EXPANDED, SAVED, UNCHANGED, OUTDATED, ERROR, PAUSED, FINISHED
+
+
+class HostThrottle:
+    """Per-host politeness: caps concurrent requests and spaces out request starts."""
+
+    def __init__(self, per_host_limit=2, min_delay=0.5):
+        self.per_host_limit = per_host_limit
+        self.min_delay = min_delay
+        self._active = {}
+        self._next_start = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, host):
+        """Reserve a request slot for host if one is available right now."""
+        with self._lock:
+            now = time.monotonic()
+            if self._active.get(host, 0) >= self.per_host_limit:
+                return False
+            if now < self._next_start.get(host, 0):
+                return False
+            self._active[host] = self._active.get(host, 0) + 1
+            self._next_start[host] = now + self.min_delay
+            return True
+
+    def release(self, host):
+        with self._lock:
+            self._active[host] -= 1
+
+    def seconds_until_available(self, host):
+        with self._lock:
+            if self._active.get(host, 0) >= self.per_host_limit:
+                return None
+            return max(0.0, self._next_start.get(host, 0) - time.monotonic())
+
+
+class DomainRateLimiter:
+    """Token bucket per domain, shared by every crawl that uses it.
+
+    Each domain earns `rate` request tokens per second, up to `burst` saved
+    tokens. A request takes a token, and if none is left it waits for the
+    next one. Waits are reserved up front, so callers can sleep however suits
+    them (time.sleep or asyncio.sleep).
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = {}
+        self._updated = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, domain):
+        """Take a token for domain. Returns the seconds to wait before using it."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            tokens = self._tokens.get(domain, self.burst)
+            tokens = min(self.burst, tokens + (now - self._updated.get(domain, now)) * self.rate) - 1
+            self._tokens[domain] = tokens
+            self._updated[domain] = now
+        # A negative balance is the queue of callers ahead of this one
+        return max(0.0, -tokens / self.rate)
+
+    def acquire(self, domain):
+        """Block until a request to domain is allowed. Returns the seconds waited."""
+        delay = self.reserve(domain)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class CrawlState:
+    """Frontier bookkeeping shared by the threaded and asyncio crawl engines.
+
+    Tracks visited URLs and progress counts, and mirrors the frontier into the
+    scraper's CrawlStore (when it has one) so crawls survive restarts.
+    """
+
+    def __init__(self, store, crawl_id, max_depth, visited_urls=None, skip_fetched_within=None, metrics=None):
+        self.store = store
+        self.metrics = metrics
+        self.crawl_id = normalize_url(crawl_id)
+        self.max_depth = max_depth
+        self.visited_urls = visited_urls if visited_urls is not None else set()
+        self.skip_fetched_within = skip_fetched_within
+        self.scraped_files = []
+        self.completed = 0
+        self.total = 0
+        self.errors = 0
+        self.skipped = 0
+        self.changes = {'new': 0, 'refreshed': 0, 'unchanged': 0, 'outdated': 0}
+        self.discovered = None  # Pages queued from sitemaps and feeds, when the crawl was seeded with them
+
+    def summary(self):
+        summary = dict(self.changes, pages=self.completed, errors=self.errors, skipped=self.skipped)
+        if self.discovered is not None:
+            summary['discovered'] = self.discovered
+        return summary
+
+    def start(self, url, depth, resume=False, seed_urls=None):
+        """Begin or resume the crawl. Returns the initial (url, depth) frontier.
+
+        With seed_urls (e.g. found in the site's sitemaps), those pages are
+        queued as leaf pages instead of url, and no links are followed.
+        """
+        url = normalize_url(url)
+        store = self.store
+        resuming = resume and store is not None and store.is_resumable(self.crawl_id)
+        if store is not None:
+            store.start_crawl(self.crawl_id, self.max_depth, resume=resuming)
+        if resuming:
+            self.visited_urls.update(store.seen(self.crawl_id))
+            self.scraped_files.extend(store.output_files(self.crawl_id))
+            initial = [(link, link_depth) for link, link_depth in store.queued(self.crawl_id)]
+            print(f"Resuming crawl of {url} with {len(initial)} queued pages")
+        elif seed_urls is not None:
+            initial = [(link, self.max_depth) for link in self._filter_new(seed_urls, self.max_depth)]
+            self.discovered = len(initial)
+            if store is not None and initial:
+                store.enqueue(self.crawl_id, initial)
+        elif depth <= self.max_depth and url not in self.visited_urls:
+            initial = [(url, depth)]
+            if store is not None:
+                store.enqueue(self.crawl_id, initial)
+        else:
+            initial = []
+        self.visited_urls.update(link for link, _ in initial)
+        self.total += len(initial)
+        return initial
+
+    def page_done(self, url, depth, links, filepath, change=None):
+        """Record a processed page. Returns the new (url, depth) pairs to queue."""
+        self.completed += 1
+        if filepath:
+            self.scraped_files.append(filepath)
+        if change:
+            self.changes[change] += 1
+        if self.metrics is not None:
+            self.metrics.inc('pages', status=change or 'expanded')
+        new_links = [(link, depth + 1) for link in self._filter_new(links, depth + 1)]
+        self.visited_urls.update(link for link, _ in new_links)
+        self.total += len(new_links)
+        if self.store is not None:
+            if links:
+                status = EXPANDED
+            elif change == 'unchanged':
+                status = UNCHANGED
+            elif change == 'outdated':
+                status = OUTDATED
+            else:
+                status = SAVED
+            self.store.record_page(self.crawl_id, url, status, filepath, new_links)
+        return new_links
+
+    def page_failed(self, url, error):
+        self.completed += 1
+        self.errors += 1
+        print(f"Error scraping {url}: {str(error)}")
+        if self.metrics is not None:
+            self.metrics.inc('pages', status='error')
+            self.metrics.inc('errors', type=type(error).__name__)
+        if self.store is not None:
+            self.store.record_page(self.crawl_id, url, ERROR)
+
+    def finish(self, pending=0):
+        """Mark the crawl paused if pages are still pending, otherwise finished."""
+        if self.store is not None:
+            self.store.set_state(self.crawl_id, PAUSED if pending else FINISHED)
+        if pending:
+            print(f"Crawl of {self.crawl_id} paused with {pending} pages queued")
+        if any(self.changes.values()):
+            print(f"Pages: {self.changes['new']} new, {self.changes['refreshed']} refreshed, "
+                  f"{self.changes['unchanged']} unchanged, {self.changes['outdated']} too old")
+        if self.skipped:
+            print(f"Skipped {self.skipped} pages fetched within the last {self.skip_fetched_within:.0f}s")
+
+    def _filter_new(self, links, depth):
+        if depth > self.max_depth:
+            return []
+        new_links = [link for link in dict.fromkeys(links) if link not in self.visited_urls]
+        if new_links and self.store is not None and self.skip_fetched_within:
+            recent = self.store.recently_saved(self.crawl_id, new_links, self.skip_fetched_within)
+            if recent:
+                self.skipped += len(recent)
+                self.visited_urls.update(recent)
+                new_links = [link for link in new_links if link not in recent]
+        return new_links
+
+
+class CrawlEngine:
+    """Breadth-first crawler with an explicit frontier and a pool of concurrent workers.
+
+    The frontier is kept per host so a busy host never blocks pages queued for
+    another one. Pages are processed by `WebScraper.process_page`, which decides
+    whether a page is expanded into more links or saved.
+    """
+
+    def __init__(self, scraper, workers=4, per_host_limit=2, host_delay=0.5):
+        self.scraper = scraper
+        self.workers = max(1, workers)
+        self.throttle = HostThrottle(per_host_limit, host_delay)
+        self.state = None
+        self._paused = threading.Event()
+
+    def pause(self):
+        """Stop dispatching new pages; the crawl returns once in-flight pages finish.
+
+        The remaining frontier stays queued in the crawl store and is picked up
+        by the next crawl of the same URL with resume=True.
+        """
+        self._paused.set()
+
+    def crawl(self, url, progress_callback=None, depth=1, max_depth=2, visited_urls=None, fetch_mode=None,
+              resume=False, skip_fetched_within=None, seed_urls=None):
+        """Crawl from url and return the paths of all files written.
+
+        Args:
+            resume (bool): Continue a paused or interrupted crawl of url from the crawl store
+            skip_fetched_within (float): Don't refetch pages this crawl saved in the last N seconds
+            seed_urls (list): Crawl these pages instead of following links from url
+        """
+        self._paused.clear()
+        state = self.state = CrawlState(self.scraper.crawl_store, url, max_depth, visited_urls, skip_fetched_within,
+                                        self.scraper.metrics)
+        frontier = OrderedDict()
+
+        def add_to_frontier(links):
+            for link, link_depth in links:
+                frontier.setdefault(urlparse(link).netloc, deque()).append((link, link_depth))
+
+        add_to_frontier(state.start(url, depth, resume, seed_urls))
+        if progress_callback:
+            progress_callback(0.0 if state.total else 1.0)
+
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while (frontier and not self._paused.is_set()) or in_flight:
+                # Dispatch as many queued pages as workers and host limits allow
+                for host in list(frontier):
+                    if len(in_flight) >= self.workers or self._paused.is_set():
+                        break
+                    queue = frontier[host]
+                    while queue and len(in_flight) < self.workers and self.throttle.try_acquire(host):
+                        link, link_depth = queue.popleft()
+                        future = executor.submit(self.scraper.process_page, link, link_depth, max_depth, fetch_mode)
+                        in_flight[future] = (link, link_depth, host)
+                    if not queue:
+                        del frontier[host]
+
+                if not in_flight:
+                    if self._paused.is_set():
+                        break
+                    # Every queued host is cooling down; sleep until the first one is ready
+                    with self.scraper.metrics.span('throttle'):
+                        time.sleep(self._next_dispatch_delay(frontier) or 0.05)
+                    continue
+
+                timeout = None if len(in_flight) >= self.workers else self._next_dispatch_delay(frontier)
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    link, link_depth, host = in_flight.pop(future)
+                    self.throttle.release(host)
+                    try:
+                        links, filepath, change = future.result()
+                    except Exception as e:
+                        state.page_failed(link, e)
+                        continue
+                    add_to_frontier(state.page_done(link, link_depth, links, filepath, change))
+
+                if done:
+                    print(f"Crawled {state.completed}/{state.total} pages")
+                    if progress_callback:
+                        progress_callback(state.completed / state.total)
+
+        state.finish(sum(len(queue) for queue in frontier.values()))
+        return state.scraped_files
+
+    def _next_dispatch_delay(self, frontier):
+        """How long to wait for a worker before checking cooling-down hosts again."""
+        delays = [self.throttle.seconds_until_available(host) for host in frontier]
+        delays = [d for d in delays if d is not None]
+        return min(delays) if delays else None
@@ -0,0 +1,236 @@
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+# <meta> names/properties that carry a publication or update date
+DATE_META_NAMES = frozenset([
+    'article:published_time', 'article:modified_time', 'og:published_time', 'og:updated_time',
+    'date', 'pubdate', 'publishdate', 'publish-date', 'published', 'last-modified', 'timestamp',
+    'dc.date', 'dc.date.issued', 'dc.date.created', 'dc.date.modified',
+    'dcterms.date', 'dcterms.created', 'dcterms.issued', 'dcterms.modified',
+    'datepublished', 'datemodified', 'datecreated', 'sailthru.date', 'parsely-pub-date',
+])
+
+# JSON-LD and microdata properties that carry a date
+DATE_PROPERTIES = frozenset(['datePublished', 'dateModified', 'dateCreated', 'uploadDate', 'commentTime'])
+DATE_ITEMPROPS = frozenset(prop.lower() for prop in DATE_PROPERTIES)
+
+# Class fragments of forum post headers and listing columns that hold a date
+DATE_CLASS_PATTERN = re.compile(r'date|time|posted|lastpost|last-post|published|updated')
+
+# Elements that group one post or one listing row with its date
+ROW_TAGS = frozenset(['li', 'tr', 'article'])
+ROW_CLASS_PATTERN = re.compile(r'post|thread|topic|message|discussion|row|item|entry|comment|reply')
+MAX_ROW_CLIMB = 8
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+RELATIVE_UNITS = {
+    'second': 1, 'sec': 1, 'minute': 60, 'min': 60, 'hour': 3600, 'hr': 3600,
+    'day': 86400, 'week': 604800, 'month': 2592000, 'year': 31536000,
+}
+
+ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ](\d{1,2}):(\d{2})(?::(\d{2}))?(?:\.\d+)?'
+                      r'\s*(Z|[+-]\d{2}:?\d{2})?)?', re.IGNORECASE)
+RELATIVE_DATE = re.compile(r'(\d+|an?|one)\s+(second|sec|minute|min|hour|hr|day|week|month|year)s?\s+ago')
+MONTH_FIRST = re.compile(r'\b([a-z]{3})[a-z]*\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b')
+DAY_FIRST = re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?\s+([a-z]{3})[a-z]*\.?,?\s+(\d{4})\b')
+NUMERIC_DATE = re.compile(r'\b(\d{1,2})([./])(\d{1,2})\2(\d{4})\b')
+
+
+def parse_date(value, now=None):
+    """Parse a date as found on web pages into a naive local datetime, or None.
+
+    Understands ISO 8601 (with or without a time and timezone), Unix
+    timestamps, 'Jan 5, 2024' / '5 January 2024', dd.mm.yyyy and mm/dd/yyyy,
+    'today' / 'yesterday' and 'N units ago'.
+    """
+    if value is None:
+        return None
+    now = now or datetime.now()
+    text = str(value).strip().lower()
+    if not text:
+        return None
+    if text.isdigit() and len(text) in (10, 13):
+        seconds = int(text) / (1000 if len(text) == 13 else 1)
+        return datetime.fromtimestamp(seconds)
+
+    match = ISO_DATE.search(text)
+    if match:
+        return _from_iso(match)
+    if 'yesterday' in text:
+        return now - timedelta(days=1)
+    if 'today' in text or 'just now' in text:
+        return now
+    match = RELATIVE_DATE.search(text)
+    if match:
+        amount = 1 if match.group(1) in ('a', 'an', 'one') else int(match.group(1))
+        return now - timedelta(seconds=amount * RELATIVE_UNITS[match.group(2)])
+    match = MONTH_FIRST.search(text)
+    if match and match.group(1) in MONTHS:
+        return _safe_date(int(match.group(3)), MONTHS[match.group(1)], int(match.group(2)))
+    match = DAY_FIRST.search(text)
+    if match and match.group(2) in MONTHS:
+        return _safe_date(int(match.group(3)), MONTHS[match.group(2)], int(match.group(1)))
+    match = NUMERIC_DATE.search(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(3)), int(match.group(4))
+        # Dots are day-first (European); slashes are month-first unless that can't be a date
+        if match.group(2) == '.' or first > 12:
+            return _safe_date(year, second, first)
+        return _safe_date(year, first, second)
+    return None
+
+
+def _from_iso(match):
+    year, month, day, hour, minute, second, zone = match.groups()
+    parsed = _safe_date(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    if parsed is None or not zone:
+        return parsed
+    if zone == 'z':
+        offset = timedelta(0)
+    else:
+        sign = -1 if zone[0] == '-' else 1
+        digits = zone[1:].replace(':', '')
+        offset = sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+    return parsed.replace(tzinfo=timezone(offset)).astimezone().replace(tzinfo=None)
+
+
+def _safe_date(year, month, day, hour=0, minute=0, second=0):
+    try:
+        return datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+
+
+class DateExtractor:
+    """Finds publication dates in a parsed page.
+
+    Dates come from <time datetime>, date <meta> tags, JSON-LD, microdata
+    (itemprop="datePublished" ...) and forum post headers (elements whose
+    class looks like 'date', 'posted', 'lastpost' ...). Dates more than a
+    day in the future are ignored as noise.
+    """
+
+    def page_date(self, soup):
+        """Return the newest date on the page (its last activity), or None."""
+        now = datetime.now()
+        newest = None
+        for element in soup.find_all(self._is_date_element):
+            for parsed in self._element_dates(element, now):
+                if newest is None or parsed > newest:
+                    newest = parsed
+        return newest
+
+    def link_dates(self, soup, resolve):
+        """Map links to the newest date of the post or listing row they sit in.
+
+        Args:
+            soup (BeautifulSoup): The parsed page
+            resolve (callable): Turns an href into a canonical link, or None to skip it
+        Returns:
+            dict: link -> datetime, for links inside a dated row
+        """
+        rows = self.row_dates(soup)
+        if not rows:
+            return {}
+        dates = {}
+        for a in soup.find_all('a', href=True):
+            for row in self._rows_of(a):
+                if id(row) not in rows:
+                    continue
+                link = resolve(a['href'])
+                if link is not None and (link not in dates or rows[id(row)] > dates[link]):
+                    dates[link] = rows[id(row)]
+                break
+        return dates
+
+    def row_dates(self, soup):
+        """Map each post/listing row containing a date to the newest date in it, keyed by id(row).
+
+        Rows are li/tr/article elements and elements whose class looks like a
+        post, thread or listing item. A date counts for every row it is nested
+        in, up to MAX_ROW_CLIMB levels up.
+        """
+        now = datetime.now()
+        rows = {}
+        for element in soup.find_all(self._is_date_element):
+            if element.name in ('meta', 'script') and element.parent is not None and element.parent.name == 'head':
+                continue  # Page-level dates don't belong to a row
+            dates = list(self._element_dates(element, now))
+            if not dates:
+                continue
+            newest = max(dates)
+            for row in self._rows_of(element):
+                if id(row) not in rows or newest > rows[id(row)]:
+                    rows[id(row)] = newest
+        return rows
+
+    def _rows_of(self, element):
+        """Yield the row elements containing element, nearest first."""
+        parent = element.parent
+        for _ in range(MAX_ROW_CLIMB):
+            if parent is None or parent.name in ('body', 'html', '[document]'):
+                return
+            if parent.name in ROW_TAGS:
+                yield parent
+            else:
+                classes = parent.get('class')
+                if classes and ROW_CLASS_PATTERN.search(' '.join(classes).lower()):
+                    yield parent
+            parent = parent.parent
+
+    def _is_date_element(self, element):
+        name = element.name
+        if name == 'time':
+            return True
+        if name == 'meta':
+            key = element.get('property') or element.get('name') or element.get('itemprop') or ''
+            return key.lower() in DATE_META_NAMES
+        if name == 'script':
+            return element.get('type') == 'application/ld+json'
+        if element.get('itemprop', '').lower() in DATE_ITEMPROPS:
+            return True
+        if element.has_attr('data-time') or element.has_attr('data-timestamp'):
+            return True
+        classes = element.get('class')
+        return bool(classes) and bool(DATE_CLASS_PATTERN.search(' '.join(classes).lower()))
+
+    def _element_dates(self, element, now):
+        if element.name == 'script':
+            values = list(self._json_ld_dates(element.string))
+        else:
+            values = [element.get(attribute) for attribute in ('datetime', 'content', 'data-time', 'data-timestamp',
+                                                               'title')
+                      if element.get(attribute)]
+            if not values and element.name != 'meta':
+                # Only the element's own short text, not a whole post body
+                text = element.get_text(' ', strip=True)
+                if text and len(text) <= 80:
+                    values.append(text)
+        latest = now + timedelta(days=1)
+        for value in values:
+            parsed = parse_date(value, now)
+            if parsed is not None and parsed <= latest:
+                yield parsed
+
+    def _json_ld_dates(self, text):
+        if not text:
+            return
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                for key, value in item.items():
+                    if key in DATE_PROPERTIES and isinstance(value, str):
+                        yield value
+                    elif isinstance(value, (dict, list)):
+                        stack.append(value)
@@ -0,0 +1,230 @@
+import gzip
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from dates import parse_date
+from fetcher import DEFAULT_USER_AGENT, conditional_headers
+from urls import normalize_url
+
+# A cached robots.txt is used for this long before it is fetched again
+ROBOTS_MAX_AGE = 24 * 3600
+
+# Sitemap indexes can nest and list thousands of sitemaps; stop after this many documents per run
+MAX_DOCUMENTS = 200
+
+FEED_TYPES = frozenset(['application/rss+xml', 'application/atom+xml'])
+LINK_TAG = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+ATTRIBUTE = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+XML_ROOTS = (b'<?xml', b'<urlset', b'<sitemapindex', b'<rss', b'<feed', b'<rdf')
+
+
+def xml_date(value):
+    """Parse a sitemap lastmod (W3C datetime) or feed pubDate (RFC 822) into a naive local datetime, or None."""
+    if not value or not value.strip():
+        return None
+    try:
+        parsed = parsedate_to_datetime(value.strip())
+    except (TypeError, ValueError):
+        return parse_date(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def parse_document(data):
+    """Parse a sitemap, sitemap index, RSS or Atom feed (gzipped or not).
+
+    Returns:
+        dict: 'sitemaps' and 'pages' lists of [url, ISO date or None];
+        both are empty if data isn't one of those documents
+    """
+    content = {'sitemaps': [], 'pages': []}
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    try:
+        root = ElementTree.fromstring(data)
+    except ElementTree.ParseError:
+        return content
+    kind = _local_name(root.tag)
+    if kind == 'sitemapindex':
+        for element in root:
+            fields = _fields(element)
+            if _local_name(element.tag) == 'sitemap' and fields.get('loc'):
+                content['sitemaps'].append(_entry(fields['loc'], fields.get('lastmod')))
+    elif kind == 'urlset':
+        for element in root:
+            fields = _fields(element)
+            if _local_name(element.tag) == 'url' and fields.get('loc'):
+                content['pages'].append(_entry(fields['loc'], fields.get('lastmod')))
+    elif kind in ('rss', 'rdf'):
+        for element in root.iter():
+            if _local_name(element.tag) != 'item':
+                continue
+            fields = _fields(element)
+            if fields.get('link'):
+                content['pages'].append(_entry(fields['link'], fields.get('pubdate') or fields.get('date')
+                                               or fields.get('updated')))
+    elif kind == 'feed':
+        for element in root:
+            if _local_name(element.tag) != 'entry':
+                continue
+            link = None
+            for child in element:
+                if _local_name(child.tag) == 'link' and child.get('rel', 'alternate') == 'alternate':
+                    link = child.get('href')
+                    break
+            fields = _fields(element)
+            if link:
+                content['pages'].append(_entry(link, fields.get('updated') or fields.get('published')))
+    return content
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1].lower()
+
+
+def _fields(element):
+    return {_local_name(child.tag): (child.text or '').strip() for child in element}
+
+
+def _entry(url, date_text):
+    date = xml_date(date_text)
+    return [url.strip(), date.isoformat(timespec='seconds') if date else None]
+
+
+def feed_links(html, base_url):
+    """Return the RSS and Atom feeds a page advertises with <link rel="alternate">."""
+    feeds = []
+    for tag in LINK_TAG.findall(html):
+        attributes = {name.lower(): next((value for value in values if value), '')
+                      for name, *values in ATTRIBUTE.findall(tag)}
+        if 'alternate' in attributes.get('rel', '').lower().split() and \
+                attributes.get('type', '').lower() in FEED_TYPES and attributes.get('href'):
+            feeds.append(urljoin(base_url, attributes['href']))
+    return feeds
+
+
+class SiteDiscovery:
+    """Finds a site's pages from robots.txt, sitemaps and RSS/Atom feeds instead of by following links.
+
+    Sitemaps come from robots.txt (or /sitemap.xml if it lists none), and
+    feeds from the start page's <link rel="alternate"> tags; a start URL that
+    is itself a sitemap or feed is used directly. Every document is cached in
+    the crawl store with its validators: robots.txt is fetched again once a
+    day, sitemaps and feeds are requested conditionally, and a sitemap whose
+    lastmod in its index is older than the cached copy isn't requested at all.
+
+    Args:
+        session (requests.Session): Session to fetch with
+        store (CrawlStore): Where fetched documents are cached, or None
+        rate_limiter (DomainRateLimiter): Applied to every request, if given
+        timeout (float): Seconds to wait for each document
+    """
+
+    def __init__(self, session, store=None, rate_limiter=None, timeout=30):
+        self.session = session
+        self.store = store
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.requests = 0
+
+    def discover(self, url):
+        """List the pages below url found in the site's sitemaps and feeds.
+
+        Only pages on the start URL's host whose path is under the start
+        URL's directory, and that robots.txt allows, are returned.
+        Returns:
+            list: (page URL, last modified datetime or None) pairs, or None if
+            no sitemap or feed lists any page below url
+        """
+        start = normalize_url(url)
+        parts = urlsplit(start)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        prefix = parts.path[:parts.path.rfind('/') + 1] or '/'
+
+        robots = self._document(origin + '/robots.txt', self._parse_robots, max_age=ROBOTS_MAX_AGE)
+        robot_rules = RobotFileParser()
+        robot_rules.parse(robots.get('lines', []))
+        start_page = self._document(start, self._parse_start_page)
+        documents = robots.get('sitemaps') or [origin + '/sitemap.xml']
+        documents = [[document, None] for document in documents] + [[feed, None] for feed in start_page.get('feeds', [])]
+        pages = {}
+        self._collect(start_page, documents, pages)
+
+        seen = {start}
+        while documents and len(seen) <= MAX_DOCUMENTS:
+            document, lastmod = documents.pop(0)
+            if document in seen:
+                continue
+            seen.add(document)
+            fresh_since = datetime.fromisoformat(lastmod) if lastmod else None
+            self._collect(self._document(document, self._parse_xml, fresh_since=fresh_since), documents, pages)
+        if any(document not in seen for document, _ in documents):
+            print(f"Stopped discovery of {url} after {MAX_DOCUMENTS} sitemaps and feeds")
+
+        found = []
+        for page, date in pages.items():
+            page_parts = urlsplit(page)
+            if page_parts.netloc != parts.netloc or not page_parts.path.startswith(prefix):
+                continue
+            if not robot_rules.can_fetch(DEFAULT_USER_AGENT, page):
+                continue
+            found.append((page, datetime.fromisoformat(date) if date else None))
+        return found or None
+
+    def _collect(self, content, documents, pages):
+        documents.extend(content.get('sitemaps', []))
+        for page, date in content.get('pages', []):
+            try:
+                page = normalize_url(page)
+            except ValueError:
+                continue
+            # A page listed twice (e.g. in a sitemap and a feed) keeps its newest date
+            if page not in pages or (date and (pages[page] is None or date > pages[page])):
+                pages[page] = date
+
+    def _document(self, url, parse, max_age=None, fresh_since=None):
+        """Fetch and parse a document, or reuse the cached copy. Returns the parsed content ({} if unavailable)."""
+        cached = self.store.get_discovery(url) if self.store is not None else None
+        if cached is not None:
+            age = time.time() - cached['fetched']
+            if (max_age is not None and age < max_age) or \
+                    (fresh_since is not None and cached['fetched'] >= fresh_since.timestamp()):
+                return cached['content']
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(urlsplit(url).netloc)
+        try:
+            self.requests += 1
+            response = self.session.get(url, timeout=self.timeout, headers=conditional_headers(cached))
+        except Exception as e:
+            print(f"Could not fetch {url} for discovery: {str(e)}")
+            return cached['content'] if cached is not None else {}
+        if response.status_code == 304 and cached is not None:
+            content = cached['content']
+        elif response.status_code in (404, 410) or response.ok:
+            content = parse(response) if response.ok else {}
+        else:
+            print(f"Could not fetch {url} for discovery: HTTP {response.status_code}")
+            return cached['content'] if cached is not None else {}
+        if self.store is not None:
+            self.store.save_discovery(url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                                      content)
+        return content
+
+    def _parse_robots(self, response):
+        lines = response.text.splitlines()
+        sitemaps = [line.split(':', 1)[1].strip() for line in lines
+                    if line.lower().startswith('sitemap:') and line.split(':', 1)[1].strip()]
+        return {'lines': lines, 'sitemaps': sitemaps}
+
+    def _parse_xml(self, response):
+        return parse_document(response.content)
+
+    def _parse_start_page(self, response):
+        if response.content.lstrip()[:16].lower().startswith(XML_ROOTS):
+            return parse_document(response.content)
+        return {'feeds': feed_links(response.text, response.url)}
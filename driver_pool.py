@@ -0,0 +1,204 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from fetcher import create_chrome_driver
+
+
+class _PooledDriver:
+    def __init__(self, driver, key):
+        self.driver = driver
+        self.key = key
+        self.pages = 0
+        self.last_used = time.monotonic()
+
+
+class DriverPool:
+    """A bounded pool of warm Chrome drivers shared by every scraper in the process.
+
+    Drivers are checked out for one page at a time and returned afterwards.
+    A driver is replaced when it fails a health check, after it has served
+    `max_pages` pages, or when it has sat idle longer than `idle_timeout` seconds.
+
+    Drivers are started for a BrowserProfile and only handed out for
+    profiles with the same key. `max_size` bounds the drivers of all
+    profiles together; when the pool is full, an idle driver of another
+    profile is quit to make room.
+    """
+
+    def __init__(self, max_size=2, max_pages=100, idle_timeout=300, driver_factory=create_chrome_driver):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.idle_timeout = idle_timeout
+        self.driver_factory = driver_factory
+        self._idle = {}  # Profile key -> idle _PooledDrivers
+        self._in_use = {}
+        self._starting = 0
+        self._lock = threading.Condition()
+        self._closed = False
+        self._reaper = threading.Thread(target=self._reap_idle, daemon=True)
+        self._reaper.start()
+
+    def checkout(self, timeout=None, profile=None):
+        """Take a healthy driver for profile from the pool, starting one if below capacity.
+
+        Blocks until a driver is free when the pool is at capacity.
+        Returns:
+            WebDriver or None: None if the pool is closed, the wait timed out
+            or Chrome could not be started.
+        """
+        key = profile.key if profile is not None else None
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            # Health checks and quitting talk to Chrome, so both happen after the lock is released
+            pooled = evicted = None
+            with self._lock:
+                if self._closed:
+                    return None
+                idle = self._idle.get(key)
+                if idle:
+                    # Counted as in use while it is checked, so its slot isn't given away
+                    pooled = idle.pop()
+                    self._in_use[id(pooled.driver)] = pooled
+                else:
+                    if len(self._in_use) + self._starting + self._idle_count() >= self.max_size:
+                        # Full, but a driver of another profile may be idle; its slot is needed more here
+                        for other in self._idle.values():
+                            if other:
+                                evicted = other.pop(0)
+                                break
+                    if len(self._in_use) + self._starting + self._idle_count() < self.max_size:
+                        # Reserve the slot so other threads see the pool as full while Chrome starts
+                        self._starting += 1
+                        break
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._lock.wait(remaining)
+                    continue
+            if self._is_healthy(pooled.driver):
+                return pooled.driver
+            with self._lock:
+                self._in_use.pop(id(pooled.driver), None)
+                self._lock.notify()
+            self._quit(pooled.driver)
+
+        if evicted is not None:
+            self._quit(evicted.driver)
+        driver = None
+        try:
+            driver = self.driver_factory(profile)
+        finally:
+            with self._lock:
+                self._starting -= 1
+                if driver is not None:
+                    self._in_use[id(driver)] = _PooledDriver(driver, key)
+                self._lock.notify()
+        return driver
+
+    def checkin(self, driver, healthy=True):
+        """Return a driver to the pool, recycling it if it crashed or is worn out."""
+        with self._lock:
+            pooled = self._in_use.pop(id(driver), None)
+            if pooled is None:
+                return
+            pooled.pages += 1
+            pooled.last_used = time.monotonic()
+            retire = self._closed or not healthy or pooled.pages >= self.max_pages
+            if not retire:
+                self._idle.setdefault(pooled.key, []).append(pooled)
+            self._lock.notify()
+        if retire:
+            self._quit(driver)
+
+    @contextmanager
+    def driver(self, timeout=None, profile=None):
+        """Check out a driver for the duration of a with-block."""
+        driver = self.checkout(timeout, profile)
+        if driver is None:
+            raise RuntimeError("Chrome driver not initialized properly")
+        try:
+            yield driver
+        except Exception:
+            self.checkin(driver, healthy=self._is_healthy(driver))
+            raise
+        else:
+            self.checkin(driver)
+
+    def evict_idle(self):
+        """Quit drivers that have been idle longer than idle_timeout."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                expired.extend(p for p in idle if now - p.last_used >= self.idle_timeout)
+                idle[:] = [p for p in idle if now - p.last_used < self.idle_timeout]
+        for pooled in expired:
+            self._quit(pooled.driver)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'idle': self._idle_count(),
+                'in_use': len(self._in_use) + self._starting,
+            }
+
+    def close(self):
+        """Quit all idle drivers; drivers still checked out are quit on checkin."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+            self._lock.notify_all()
+        for pooled_drivers in idle.values():
+            for pooled in pooled_drivers:
+                self._quit(pooled.driver)
+
+    def _reap_idle(self):
+        while not self._closed:
+            time.sleep(max(1, self.idle_timeout / 2))
+            self.evict_idle()
+
+    def _idle_count(self):
+        return sum(len(idle) for idle in self._idle.values())
+
+    def _is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error shutting down Chrome driver: {str(e)}")
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_driver_pool(**kwargs):
+    """Return the process-wide driver pool, creating it on first use.
+
+    Keyword arguments configure the pool the first time it is created and
+    are ignored afterwards.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool._closed:
+            _shared_pool = DriverPool(**kwargs)
+        return _shared_pool
+
+
+def shutdown_driver_pool():
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is not None:
+            _shared_pool.close()
+            _shared_pool = None
+
+
+atexit.register(shutdown_driver_pool)
@@ -0,0 +1,171 @@
+import re
+
+# Common article selectors, in order of preference
+CONTENT_SELECTORS = [
+    {'tag': 'article'},
+    {'tag': 'main'},
+    {'tag': 'div', 'class_': 'article-content'},
+    {'tag': 'div', 'class_': 'post-content'},
+    {'tag': 'div', 'class_': 'entry-content'},
+    {'tag': 'div', 'id': 'article-body'},
+    {'tag': 'div', 'class_': 'content'},
+    {'tag': 'div', 'id': 'content'}
+]
+
+# Elements stripped from the page body when no content area is found
+NON_CONTENT_TAGS = frozenset(['nav', 'header', 'footer', 'aside', 'script', 'style', 'iframe'])
+
+# Class or ID fragments that mark ads and other clutter
+AD_INDICATORS = ['ad', 'advertisement', 'banner', 'sidebar', 'popup', 'modal', 'newsletter']
+
+TEXT_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p'])
+
+
+def available_parser(preferred):
+    """Return preferred if its parser library is installed, otherwise 'html.parser'."""
+    if preferred == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("lxml is not installed, falling back to html.parser")
+            return 'html.parser'
+    return preferred or 'html.parser'
+
+
+class ContentExtractor:
+    """Turns a parsed page into the scraper's Markdown in as few tree walks as possible.
+
+    Selecting the content area takes one walk over the document, and cleaning
+    plus collecting headings and paragraphs takes one walk over that area. The
+    output is the same as running the selector `find` calls, the ad-removal
+    `find_all` scans and the heading/paragraph `find_all` one after another.
+    """
+
+    def __init__(self, selectors=CONTENT_SELECTORS, ad_indicators=AD_INDICATORS):
+        # tag name -> [(priority, attribute, value)]
+        self.selectors_by_tag = {}
+        self.selector_count = len(selectors)
+        for priority, selector in enumerate(selectors):
+            if 'class_' in selector:
+                rule = (priority, 'class', selector['class_'])
+            elif 'id' in selector:
+                rule = (priority, 'id', selector['id'])
+            else:
+                rule = (priority, None, None)
+            self.selectors_by_tag.setdefault(selector['tag'], []).append(rule)
+        self.ad_pattern = re.compile('|'.join(re.escape(indicator) for indicator in ad_indicators))
+
+    def scan(self, soup):
+        """Find the title, body and highest-priority content area in one walk.
+        Returns:
+            tuple: (title, content area, body), each a Tag or None
+        """
+        from bs4 import Tag
+
+        title = None
+        body = None
+        best = None
+        best_priority = self.selector_count
+        for element in soup.descendants:
+            if not isinstance(element, Tag):
+                continue
+            if title is None and element.name == 'title':
+                title = element
+            elif body is None and element.name == 'body':
+                body = element
+            rules = self.selectors_by_tag.get(element.name)
+            if not rules:
+                continue
+            for priority, attribute, value in rules:
+                if priority >= best_priority:
+                    break
+                if attribute is None:
+                    matched = True
+                elif attribute == 'class':
+                    matched = self._class_matches(element.get('class'), value)
+                else:
+                    matched = element.get(attribute) == value
+                if matched:
+                    best, best_priority = element, priority
+                    break
+            if best_priority == 0 and title is not None:
+                break  # Nothing can beat the top selector, and the body isn't needed
+        return title, best, body
+
+    def find_main_content(self, soup):
+        return self.scan(soup)[1]
+
+    def collect_text_elements(self, root, clean=False):
+        """Walk root once, collecting headings and paragraphs in document order.
+
+        With clean=True, non-content elements and elements whose class or id
+        looks like an ad are decomposed, and nothing inside them is collected.
+        """
+        from bs4 import Tag
+
+        collected = []
+        removed = []
+        stack = list(reversed(root.contents))
+        while stack:
+            element = stack.pop()
+            if not isinstance(element, Tag):
+                continue
+            if clean and self._is_clutter(element):
+                removed.append(element)
+                continue
+            if element.name in TEXT_TAGS:
+                collected.append(element)
+            stack.extend(reversed(element.contents))
+        for element in removed:
+            element.decompose()
+        return collected
+
+    def to_markdown(self, soup, url, scraped_at):
+        """Build the Markdown document for a page."""
+        return self.render_markdown(self.scan(soup), url, scraped_at)
+
+    def render_markdown(self, scanned, url, scraped_at):
+        """Build the Markdown document from the result of scan(), so both steps can be timed separately."""
+        title_tag, main_content, body = scanned
+        title = title_tag.string if title_tag else "Untitled"
+
+        # If no specific content area found, fall back to body but try to clean it
+        clean = False
+        if not main_content:
+            main_content = body
+            clean = True
+
+        markdown_content = f"# {title}\n\n"
+        markdown_content += f"Source: {url}\n"
+        markdown_content += f"Date scraped: {scraped_at.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+        if main_content:
+            # Extract text from content elements, maintaining hierarchy
+            for element in self.collect_text_elements(main_content, clean=clean):
+                text = element.get_text().strip()
+                if text and len(text) > 20:  # Filter out very short snippets
+                    if element.name[0] == 'h':
+                        markdown_content += f"\n{'#' * int(element.name[1:])} {text}\n"
+                    else:
+                        markdown_content += f"\n{text}\n"
+        return markdown_content
+
+    def _is_clutter(self, element):
+        if element.name in NON_CONTENT_TAGS:
+            return True
+        classes = element.get('class')
+        if classes:
+            if isinstance(classes, str):
+                classes = [classes]
+            if any(value and self.ad_pattern.search(value.lower()) for value in classes):
+                return True
+        element_id = element.get('id')
+        return bool(element_id and self.ad_pattern.search(element_id.lower()))
+
+    @staticmethod
+    def _class_matches(classes, value):
+        if not classes:
+            return False
+        if isinstance(classes, str):
+            return classes == value
+        return value in classes or ' '.join(classes) == value
@@ -0,0 +1,363 @@
+import fnmatch
+import json
+import os
+import time
+
+# requests and selenium are imported when their backend is first used, so
+# importing this module (e.g. for `main.py --help` or the dashboard) stays fast
+
+FETCH_MODES = ('auto', 'static', 'browser')
+WAIT_STRATEGIES = ('ready', 'selector', 'network_idle', 'fixed')
+PAGE_LOAD_STRATEGIES = ('normal', 'eager', 'none')
+
+# URL patterns, in the wildcard syntax of Chrome's Network.setBlockedURLs, for each resource type a profile can block
+RESOURCE_PATTERNS = {
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*', '*.bmp*'],
+    'media': ['*.mp4*', '*.webm*', '*.ogg*', '*.ogv*', '*.mp3*', '*.m4a*', '*.wav*', '*.m3u8*', '*.mpd*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'stylesheet': ['*.css*'],
+}
+
+# Ad, tracking and analytics hosts and paths
+AD_PATTERNS = [
+    '*doubleclick.net*', '*googlesyndication.com*', '*googleadservices.com*', '*adservice.google.*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*googletagservices.com*', '*amazon-adsystem.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*scorecardresearch.com*', '*quantserve.com*', '*taboola.com*',
+    '*outbrain.com*', '*criteo.com*', '*criteo.net*', '*adnxs.com*', '*pubmatic.com*', '*rubiconproject.com*',
+    '*hotjar.com*', '*/ads/*', '*/analytics/*',
+]
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0 Safari/537.36"
+)
+
+
+class FetchResult:
+    """A fetched page and the backend that served it."""
+
+    def __init__(self, url, html, backend, status_code=None, wait_seconds=0.0, etag=None, last_modified=None,
+                 requests_blocked=None, bytes_loaded=None):
+        self.url = url
+        self.html = html
+        self.backend = backend
+        self.status_code = status_code
+        self.wait_seconds = wait_seconds
+        self.etag = etag
+        self.last_modified = last_modified
+        # Browser only: requests the profile blocked, and bytes the browser did download
+        self.requests_blocked = requests_blocked
+        self.bytes_loaded = bytes_loaded
+
+    @property
+    def not_modified(self):
+        """True when a conditional request was answered with 304 and there is no body."""
+        return self.status_code == 304
+
+
+def conditional_headers(validators):
+    """Build If-None-Match / If-Modified-Since headers from cached validators."""
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+class BrowserProfile:
+    """How Chrome loads the pages of a source.
+
+    Only the text of a page is kept, so most of what a full page load waits
+    for is thrown away. A profile blocks resource types and URL patterns,
+    picks the page-load strategy ('eager' returns once the DOM is ready,
+    without waiting for images, stylesheets and iframes) and caps the page
+    load: after page_load_timeout seconds loading is stopped and whatever
+    has rendered is used.
+
+    The strategy and timeout are fixed when Chrome starts, so the driver
+    pool keeps drivers per profile key. Blocked URLs are set for each page.
+    """
+
+    def __init__(self, name='custom', block=(), block_patterns=(), page_load_strategy='normal', page_load_timeout=30):
+        self.name = name
+        self.block = tuple(kind for kind in block if kind in RESOURCE_PATTERNS)
+        self.block_patterns = tuple(block_patterns)
+        self.page_load_strategy = page_load_strategy if page_load_strategy in PAGE_LOAD_STRATEGIES else 'normal'
+        self.page_load_timeout = page_load_timeout
+
+    @classmethod
+    def from_config(cls, value):
+        """Build a profile from a source's browser_profile setting.
+
+        The setting is a preset name, or a dict that overrides fields of the
+        preset named by its 'preset' key. Unknown or missing values give the
+        'text' preset.
+        """
+        if isinstance(value, dict):
+            preset = BROWSER_PROFILES.get(value.get('preset'), BROWSER_PROFILES['text'])
+            return cls(name=value.get('name', 'custom'),
+                       block=value.get('block', preset.block),
+                       block_patterns=value.get('block_patterns', preset.block_patterns),
+                       page_load_strategy=value.get('page_load_strategy', preset.page_load_strategy),
+                       page_load_timeout=value.get('page_load_timeout', preset.page_load_timeout))
+        return BROWSER_PROFILES.get(value, BROWSER_PROFILES['text'])
+
+    @property
+    def key(self):
+        """Drivers started for profiles with the same key are interchangeable."""
+        return (self.page_load_strategy, self.page_load_timeout)
+
+    @property
+    def ready_states(self):
+        """document.readyState values at which the page counts as loaded."""
+        return ('complete',) if self.page_load_strategy == 'normal' else ('interactive', 'complete')
+
+    def blocked_urls(self, page_url):
+        """Return the URL patterns to block while loading page_url, never including one the page itself matches."""
+        patterns = [pattern for kind in self.block for pattern in RESOURCE_PATTERNS[kind]]
+        patterns.extend(self.block_patterns)
+        return [pattern for pattern in patterns if not fnmatch.fnmatchcase(page_url, pattern)]
+
+
+BROWSER_PROFILES = {
+    # Everything a browser would load, as before profiles existed
+    'full': BrowserProfile('full'),
+    # What text extraction needs: no images, media, fonts or ads, and no waiting for subresources
+    'text': BrowserProfile('text', block=('image', 'media', 'font'), block_patterns=AD_PATTERNS,
+                           page_load_strategy='eager', page_load_timeout=15),
+}
+
+
+class WaitPolicy:
+    """Decides how long to wait after a browser page load before reading the DOM.
+
+    Strategies:
+        ready: wait until document.readyState is 'complete'
+        selector: wait until any of the given CSS selectors is present
+        network_idle: wait until no new resources have loaded for idle_time seconds
+        fixed: sleep for the full timeout (the old behaviour)
+    Every strategy gives up after `timeout` seconds and proceeds with whatever has
+    loaded. If the browser can't evaluate the readiness check, the policy falls
+    back to a fixed sleep of `timeout` seconds.
+    """
+
+    def __init__(self, strategy='ready', timeout=5, selectors=None, idle_time=0.5, poll_interval=0.1):
+        self.strategy = strategy if strategy in WAIT_STRATEGIES else 'ready'
+        self.timeout = timeout
+        self.selectors = selectors or []
+        self.idle_time = idle_time
+        self.poll_interval = poll_interval
+
+    def wait(self, driver, ready_states=('complete',)):
+        """Block until the page is ready. Returns the number of seconds waited.
+
+        ready_states are the document.readyState values the 'ready' and
+        'network_idle' strategies accept; with an eager page load,
+        'interactive' is enough.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        start = time.monotonic()
+        try:
+            if self.strategy == 'fixed':
+                time.sleep(self.timeout)
+            elif self.strategy == 'selector' and self.selectors:
+                WebDriverWait(driver, self.timeout, poll_frequency=self.poll_interval).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ', '.join(self.selectors)))
+                )
+            elif self.strategy == 'network_idle':
+                self._wait_network_idle(driver, start, ready_states)
+            else:
+                WebDriverWait(driver, self.timeout, poll_frequency=self.poll_interval).until(
+                    lambda d: d.execute_script("return document.readyState") in ready_states
+                )
+        except TimeoutException:
+            pass  # Hard timeout reached, use whatever has rendered so far
+        except WebDriverException as e:
+            print(f"Readiness check failed ({str(e)}), falling back to a fixed wait")
+            time.sleep(max(0.0, self.timeout - (time.monotonic() - start)))
+        return time.monotonic() - start
+
+    def _wait_network_idle(self, driver, start, ready_states):
+        last_count = -1
+        idle_since = time.monotonic()
+        while time.monotonic() - start < self.timeout:
+            state, count = driver.execute_script(
+                "return [document.readyState, performance.getEntriesByType('resource').length]"
+            )
+            now = time.monotonic()
+            if count != last_count:
+                last_count = count
+                idle_since = now
+            elif state in ready_states and now - idle_since >= self.idle_time:
+                return
+            time.sleep(self.poll_interval)
+
+
+def create_chrome_driver(profile=None):
+    """Start a headless Chrome WebDriver for a BrowserProfile, or return None if Chrome is unavailable."""
+    try:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")  # Run in headless mode
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+
+        # Add additional Chrome options for stability
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-popup-blocking")
+        chrome_options.add_argument("--disable-notifications")
+
+        if profile is not None:
+            chrome_options.page_load_strategy = profile.page_load_strategy
+            # Network events, for counting blocked requests and loaded bytes per page
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+        # Try to locate Chrome binary
+        chrome_paths = [
+            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",  # macOS
+            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome Beta",  # macOS Beta
+            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome Canary",  # macOS Canary
+            "/usr/bin/google-chrome",  # Linux
+            "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",  # Windows
+            "C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe"  # Windows x86
+        ]
+
+        chrome_binary = None
+        for path in chrome_paths:
+            if os.path.exists(path):
+                chrome_binary = path
+                print(f"Found Chrome binary at: {path}")
+                break
+
+        if chrome_binary:
+            chrome_options.binary_location = chrome_binary
+        else:
+            print("Warning: Chrome browser not found in standard locations.")
+            print("Attempting to continue without specifying binary location...")
+
+        # Set up Chrome WebDriver using Selenium Manager
+        service = Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.set_page_load_timeout(profile.page_load_timeout if profile is not None else 30)
+        print("Chrome WebDriver initialized successfully")
+        return driver
+
+    except Exception as e:
+        print(f"Failed to initialize Chrome WebDriver: {str(e)}")
+        print("Please ensure Chrome browser is installed and up to date.")
+        print("You may need to manually install ChromeDriver or update Chrome.")
+        return None
+
+
+class StaticFetcher:
+    """Plain HTTP GETs over a pooled keep-alive session."""
+
+    backend = 'static'
+
+    def __init__(self, timeout=30, pool_size=10, retries=2):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': DEFAULT_USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        })
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, url, validators=None):
+        """GET a page, sending conditional headers when cached validators are given."""
+        response = self.session.get(url, timeout=self.timeout, headers=conditional_headers(validators))
+        if response.status_code == 304:
+            return FetchResult(response.url, None, self.backend, 304)
+        response.raise_for_status()
+        return FetchResult(response.url, response.text, self.backend, response.status_code,
+                           etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
+
+    @property
+    def request_errors(self):
+        """The exception raised for failed requests, for callers that don't import requests themselves."""
+        import requests
+        return requests.RequestException
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserFetcher:
+    """Renders pages in headless Chrome for sites that need JavaScript.
+
+    Drivers are borrowed from a shared DriverPool for each page rather than
+    owned by the fetcher, and are started for the fetcher's BrowserProfile.
+    """
+
+    backend = 'browser'
+
+    def __init__(self, driver_pool, wait_policy=None, profile=None):
+        self.driver_pool = driver_pool
+        self.wait_policy = wait_policy or WaitPolicy()
+        self.profile = profile or BrowserProfile.from_config(None)
+
+    def fetch(self, url):
+        from selenium.common.exceptions import TimeoutException
+
+        with self.driver_pool.driver(profile=self.profile) as driver:
+            self._block_resources(driver, url)
+            try:
+                driver.get(url)
+            except TimeoutException:
+                print(f"Loading {url} took over {self.profile.page_load_timeout}s, using what has rendered")
+                driver.execute_script("window.stop();")
+            waited = self.wait_policy.wait(driver, self.profile.ready_states)
+            html = driver.page_source
+            requests_blocked, bytes_loaded = self._network_usage(driver)
+            return FetchResult(driver.current_url or url, html, self.backend, wait_seconds=waited,
+                               requests_blocked=requests_blocked, bytes_loaded=bytes_loaded)
+
+    def _block_resources(self, driver, url):
+        """Set the URLs blocked for this page and drop network events left over from the last one."""
+        try:
+            driver.get_log('performance')
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.profile.blocked_urls(url)})
+        except Exception as e:
+            print(f"Could not set blocked URLs for {url}: {str(e)}")
+
+    def _network_usage(self, driver):
+        """Count blocked requests and downloaded bytes from Chrome's performance log.
+        Returns:
+            tuple: (requests blocked, bytes loaded), or (None, None) if the log isn't available
+        """
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            return None, None
+        blocked = 0
+        loaded = 0
+        for entry in entries:
+            raw = entry.get('message', '')
+            # Most events are neither; skip them without decoding the JSON
+            if '"Network.loadingFailed"' in raw:
+                params = json.loads(raw)['message'].get('params', {})
+                if params.get('blockedReason'):
+                    blocked += 1
+            elif '"Network.loadingFinished"' in raw:
+                params = json.loads(raw)['message'].get('params', {})
+                loaded += int(params.get('encodedDataLength') or 0)
+        return blocked, loaded
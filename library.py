@@ -0,0 +1,338 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    title TEXT,
+    url TEXT,
+    domain TEXT,
+    scraped_at TEXT,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_scraped ON documents (scraped_at);
+CREATE INDEX IF NOT EXISTS idx_documents_domain ON documents (domain, scraped_at);
+"""
+
+# Full-text index over document titles and bodies; rowid is documents.id
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    title, body, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+# Library sort options -> ORDER BY clause
+SORT_ORDERS = {
+    'Newest first': 'scraped_at DESC, filename DESC',
+    'Oldest first': 'scraped_at ASC, filename ASC',
+    'Title': 'title COLLATE NOCASE ASC, filename ASC',
+    'Domain': 'domain ASC, scraped_at DESC',
+    'Largest first': 'size DESC, filename ASC',
+}
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Titles count for more than body text when ranking search results
+TITLE_WEIGHT = 5.0
+
+# Maximum number of matches scored for relevance per query
+RANK_WINDOW = 5000
+
+
+def parse_header(text):
+    """Read the title, source URL and scrape date from the top of a scraped Markdown document.
+    Returns:
+        tuple: (title, url, scraped_at), with None for anything missing
+    """
+    title = url = scraped_at = None
+    for line in text.splitlines()[:6]:
+        if line.startswith('# ') and title is None:
+            title = line[2:].strip()
+        elif line.startswith('Source: '):
+            url = line[len('Source: '):].strip()
+        elif line.startswith('Date scraped: '):
+            scraped_at = line[len('Date scraped: '):].strip()
+    return title, url, scraped_at
+
+
+def document_body(text):
+    """Return a scraped Markdown document without its title/source/date header."""
+    header_end = text.find('\nDate scraped: ')
+    if header_end == -1:
+        return text
+    body_start = text.find('\n', header_end + 1)
+    return text[body_start + 1:] if body_start != -1 else ''
+
+
+def match_expression(query):
+    """Turn a free-text query into an FTS5 expression that matches all of its words.
+
+    Each word is quoted, so punctuation and FTS5 operators typed by the user
+    are searched for literally. A trailing '*' keeps prefix matching.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return ' '.join(terms)
+
+
+def _date_bound(value, end=False):
+    """Convert a date/datetime/'YYYY-MM-DD' bound to a comparable scraped_at string."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = datetime.strptime(value, '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    if end:
+        value += timedelta(days=1)  # Include the whole end day
+    return datetime.combine(value, datetime.min.time()).strftime(DATE_FORMAT)
+
+
+class LibraryIndex:
+    """Metadata and full-text index of the Markdown documents in the output directory.
+
+    The scraper adds a row whenever it writes a document, so the Library can
+    list, sort, page through and search documents without touching the files.
+    Bodies are read from disk only when a document is opened.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, "library.db")
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(documents)")]
+        if columns and 'id' not in columns:
+            # Index from before full-text search; the Library rebuilds it from the files on next use
+            self._conn.execute("DROP TABLE documents")
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.executescript(SEARCH_SCHEMA)
+            self.searchable = True
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search is unavailable (SQLite was built without FTS5): {str(e)}")
+            self.searchable = False
+        self._lock = threading.Lock()
+
+    def add(self, filepath, markdown_content):
+        """Index a document that was just written, using the Markdown already in memory."""
+        title, url, scraped_at = parse_header(markdown_content)
+        with self._lock, self._conn:
+            self._index(os.path.basename(filepath), title, url, scraped_at,
+                        len(markdown_content.encode('utf-8')), markdown_content)
+
+    def sync(self):
+        """Bring the index in line with the output directory.
+
+        Indexes Markdown files that were written without going through the
+        scraper and drops rows for files that no longer exist.
+        Returns:
+            tuple: (number of documents added, number removed)
+        """
+        on_disk = self._markdown_files()
+        with self._lock:
+            indexed = {row[0] for row in self._conn.execute("SELECT filename FROM documents")}
+        added = self._index_files(on_disk[name] for name in on_disk.keys() - indexed)
+
+        missing = indexed - on_disk.keys()
+        if missing:
+            with self._lock, self._conn:
+                for filename in missing:
+                    self._remove(filename)
+        return added, len(missing)
+
+    def rebuild(self):
+        """Discard the index and rebuild it from every Markdown file in the output directory.
+        Returns:
+            int: Number of documents indexed
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents")
+            if self.searchable:
+                self._conn.execute("DELETE FROM search")
+        added = self._index_files(self._markdown_files().values())
+        if self.searchable:
+            with self._lock, self._conn:
+                self._conn.execute("INSERT INTO search (search) VALUES ('optimize')")
+        return added
+
+    def count(self, domain=None):
+        with self._lock:
+            if domain:
+                return self._conn.execute("SELECT COUNT(*) FROM documents WHERE domain = ?", (domain,)).fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def domains(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT domain FROM documents WHERE domain IS NOT NULL ORDER BY domain"
+            )]
+
+    def page(self, offset=0, limit=50, sort='Newest first', domain=None):
+        """Return one page of document metadata as a list of dicts."""
+        order = SORT_ORDERS.get(sort, SORT_ORDERS['Newest first'])
+        where = "WHERE domain = ?" if domain else ""
+        params = ([domain] if domain else []) + [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT filename, title, url, domain, scraped_at, size FROM documents {where} "
+                f"ORDER BY {order} LIMIT ? OFFSET ?", params
+            ).fetchall()
+        return [self._document(row) for row in rows]
+
+    def search(self, query, domain=None, since=None, until=None, offset=0, limit=20):
+        """Find documents matching all words of query, best matches first.
+
+        Args:
+            query (str): Words to search for; 'word*' matches a prefix
+            domain (str): Only return documents from this domain
+            since, until (date or 'YYYY-MM-DD'): Inclusive scrape date range
+        When a query matches more than RANK_WINDOW documents, only the most
+        recently indexed RANK_WINDOW matches are ranked; the older matches
+        follow them, newest first. limit=0 only counts.
+        Returns:
+            tuple: (total number of matches, list of result dicts with a 'snippet')
+        """
+        expression = match_expression(query)
+        if not self.searchable or not expression:
+            return 0, []
+        where, params = self._search_filters(expression, domain, since, until)
+        # CROSS JOIN keeps the full-text match as the outer loop; letting SQLite start from
+        # the domain index re-evaluates the match expression for every candidate document
+        joined = f"FROM search CROSS JOIN documents d ON d.id = search.rowid WHERE {where}"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) {joined}", params).fetchone()[0]
+            if limit <= 0 or total == 0:
+                return total, []
+            columns = (f"SELECT d.filename, d.title, d.url, d.domain, d.scraped_at, d.size, "
+                       f"snippet(search, 1, '**', '**', ' ... ', 16)")
+            if total <= RANK_WINDOW:
+                rows = self._conn.execute(
+                    f"{columns} {joined} ORDER BY bm25(search, {TITLE_WEIGHT}, 1.0) LIMIT ? OFFSET ?",
+                    params + [limit, offset]
+                ).fetchall()
+            else:
+                # Words found in most documents barely separate them by relevance, and
+                # scoring every match is what makes such queries slow: rank only the
+                # newest RANK_WINDOW matches and list the older ones after them by date
+                floor = self._conn.execute(
+                    f"SELECT search.rowid {joined} ORDER BY search.rowid DESC LIMIT 1 OFFSET ?",
+                    params + [RANK_WINDOW - 1]
+                ).fetchone()[0]
+                rows = []
+                if offset < RANK_WINDOW:
+                    rows = self._conn.execute(
+                        f"{columns} {joined} AND search.rowid >= ? "
+                        f"ORDER BY bm25(search, {TITLE_WEIGHT}, 1.0) LIMIT ? OFFSET ?",
+                        params + [floor, min(limit, RANK_WINDOW - offset), offset]
+                    ).fetchall()
+                if len(rows) < limit:
+                    rows += self._conn.execute(
+                        f"{columns} {joined} AND search.rowid < ? "
+                        f"ORDER BY {SORT_ORDERS['Newest first']} LIMIT ? OFFSET ?",
+                        params + [floor, limit - len(rows), max(0, offset - RANK_WINDOW)]
+                    ).fetchall()
+        results = []
+        for row in rows:
+            result = self._document(row)
+            result['snippet'] = row[6]
+            results.append(result)
+        return total, results
+
+    def read(self, filename):
+        """Load the body of an indexed document, or None if it can't be read."""
+        try:
+            with open(os.path.join(self.output_dir, filename), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError as e:
+            print(f"Error reading {filename}: {str(e)}")
+            return None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _markdown_files(self):
+        return {entry.name: entry for entry in os.scandir(self.output_dir)
+                if entry.name.endswith('.md') and entry.is_file()}
+
+    def _index_files(self, entries, batch_size=500):
+        """Read and index directory entries, committing in batches. Returns the number indexed."""
+        added = 0
+        batch = []
+        for entry in entries:
+            try:
+                with open(entry.path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+                stat = entry.stat()
+            except OSError as e:
+                print(f"Error indexing {entry.path}: {str(e)}")
+                continue
+            title, url, scraped_at = parse_header(content)
+            if scraped_at is None:
+                scraped_at = datetime.fromtimestamp(stat.st_mtime).strftime(DATE_FORMAT)
+            batch.append((entry.name, title, url, scraped_at, stat.st_size, content))
+            if len(batch) >= batch_size:
+                added += self._index_batch(batch)
+                batch = []
+        return added + self._index_batch(batch)
+
+    def _index_batch(self, batch):
+        with self._lock, self._conn:
+            for document in batch:
+                self._index(*document)
+        return len(batch)
+
+    def _index(self, filename, title, url, scraped_at, size, content):
+        """Insert or replace one document and its search entry; the caller holds the lock and transaction."""
+        domain = urlparse(url).netloc if url else None
+        self._conn.execute(
+            "INSERT INTO documents (filename, title, url, domain, scraped_at, size) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(filename) DO UPDATE SET title = excluded.title, url = excluded.url, "
+            "domain = excluded.domain, scraped_at = excluded.scraped_at, size = excluded.size",
+            (filename, title, url, domain, scraped_at, size)
+        )
+        if not self.searchable:
+            return
+        doc_id = self._conn.execute("SELECT id FROM documents WHERE filename = ?", (filename,)).fetchone()[0]
+        self._conn.execute("DELETE FROM search WHERE rowid = ?", (doc_id,))
+        self._conn.execute("INSERT INTO search (rowid, title, body) VALUES (?, ?, ?)",
+                           (doc_id, title, document_body(content)))
+
+    def _remove(self, filename):
+        row = self._conn.execute("SELECT id FROM documents WHERE filename = ?", (filename,)).fetchone()
+        if row is None:
+            return
+        if self.searchable:
+            self._conn.execute("DELETE FROM search WHERE rowid = ?", (row[0],))
+        self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+    def _search_filters(self, expression, domain, since, until):
+        where = ["search MATCH ?"]
+        params = [expression]
+        if domain:
+            where.append("d.domain = ?")
+            params.append(domain)
+        since = _date_bound(since)
+        if since:
+            where.append("d.scraped_at >= ?")
+            params.append(since)
+        until = _date_bound(until, end=True)
+        if until:
+            where.append("d.scraped_at < ?")
+            params.append(until)
+        return ' AND '.join(where), params
+
+    @staticmethod
+    def _document(row):
+        return {'filename': row[0], 'title': row[1], 'url': row[2], 'domain': row[3],
+                'scraped_at': row[4], 'size': row[5]}
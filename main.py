@@ -1,32 +1,216 @@
 from scraper import WebScraper
-import time
+from driver_pool import get_driver_pool, shutdown_driver_pool
+from fetcher import BROWSER_PROFILES
+from crawl_store import CrawlStore
+from crawler import DomainRateLimiter
+from library import LibraryIndex
+from metrics import log_metrics_to, start_metrics_server
+from archive import PageArchive, reextract
+from analysis import PageAnalyzer
+from extraction import available_parser
+from pipeline import get_parse_pool
+from batch import BatchRunner, read_urls, source_jobs, dedupe_jobs
+from config_store import get_config_store
+from datetime import datetime
+import os
 import argparse
 
+def search(library, args):
+    """Print the documents that best match args.search."""
+    try:
+        total, results = library.search(args.search, domain=args.domain, since=args.since,
+                                         until=args.until, limit=args.limit)
+    except ValueError as e:
+        print(f"Invalid date: {str(e)}")
+        return
+    print(f"{total} matching document(s)")
+    for rank, result in enumerate(results, 1):
+        print(f"{rank}. {result['title']} ({result['domain']}, {result['scraped_at']})")
+        print(f"   {os.path.join(args.output_dir, result['filename'])}")
+        print(f"   {' '.join(result['snippet'].split())}")
+
+def collect_jobs(args):
+    """Gather the URLs to scrape from the command line, --urls and --sources, in that order."""
+    jobs = [{'url': url} for url in args.urls]
+    if args.url_file:
+        jobs.extend({'url': url} for url in read_urls(args.url_file))
+    if args.sources:
+        jobs.extend(source_jobs(get_config_store(args.sources, default=[]).get()))
+    return dedupe_jobs(jobs)
+
+def domain_rate(args):
+    """Requests per second allowed per domain: --rate, else one per --wait seconds, else one per --host-delay."""
+    if args.rate is not None:
+        return args.rate
+    if args.wait is not None:
+        return 1.0 / args.wait if args.wait > 0 else 0
+    return 1.0 / args.host_delay if args.host_delay > 0 else 0
+
+def mark_scraped(sources_path, url, scraped_at):
+    """Record a successful batch run of a configured source, like the dashboard does."""
+    with get_config_store(sources_path, default=[]).modify() as sources:
+        for source in sources:
+            if source.get('url') == url:
+                source['last_scraped'] = scraped_at.strftime('%Y-%m-%d %H:%M:%S')
+
 def main():
     # Set up command line argument parsing
     parser = argparse.ArgumentParser(description='Web scraper with configurable parameters')
     parser.add_argument('--depth', type=int, default=2, help='Maximum depth for recursive scraping')
     parser.add_argument('--days', type=int, default=7, help='Number of days to limit scraping (0 for no limit)')
-    parser.add_argument('--wait', type=int, default=2, help='Wait time between requests in seconds')
+    parser.add_argument('urls', nargs='*', help='URLs to scrape')
+    parser.add_argument('--urls', dest='url_file', metavar='FILE',
+                        help="Read URLs to scrape from FILE, one per line ('-' for stdin)")
+    parser.add_argument('--sources', nargs='?', const='scraper_config.json', metavar='CONFIG',
+                        help='Scrape the sources configured in the dashboard (default: scraper_config.json)')
+    parser.add_argument('--jobs', type=int, default=4, help='Number of URLs crawled at the same time')
+    parser.add_argument('--rate', type=float,
+                        help='Requests per second allowed to each domain across all jobs (default: 1 / --host-delay)')
+    parser.add_argument('--burst', type=int, default=1,
+                        help='Requests a domain may receive back to back before --rate applies')
+    parser.add_argument('--manifest', metavar='FILE',
+                        help='Append one JSON line per URL with its status, output files and timing to FILE')
+    parser.add_argument('--wait', type=float,
+                        help='Minimum seconds between requests to the same domain (deprecated, use --rate)')
+    parser.add_argument('--fetch-mode', choices=['auto', 'static', 'browser'], default='auto',
+                        help='Fetch backend: plain HTTP, headless Chrome, or auto (HTTP with browser fallback)')
+    parser.add_argument('--wait-strategy', choices=['ready', 'selector', 'network_idle', 'fixed'], default='ready',
+                        help='How to decide a browser-rendered page has finished loading')
+    parser.add_argument('--browser-profile', choices=list(BROWSER_PROFILES), default='text',
+                        help='text: block images, media, fonts and ads and read pages once their DOM is ready; '
+                             'full: load everything')
+    parser.add_argument('--page-timeout', type=float, default=5,
+                        help='Maximum seconds to wait for a browser-rendered page to become ready')
+    parser.add_argument('--browsers', type=int, default=2,
+                        help='Maximum number of Chrome instances kept warm in the driver pool')
+    parser.add_argument('--workers', type=int, default=4, help='Number of pages fetched concurrently')
+    parser.add_argument('--per-host', type=int, default=2, help='Maximum concurrent requests to a single host')
+    parser.add_argument('--host-delay', type=float, default=0.5,
+                        help='Minimum seconds between requests to the same host')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Use the asyncio crawler (plain HTTP only, for sites that do not need JavaScript)')
+    parser.add_argument('--concurrency', type=int, default=100,
+                        help='Maximum pages in flight with --async')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Pipeline fetching, parsing and writing, and parse pages in worker processes on every core')
+    parser.add_argument('--parse-workers', type=int,
+                        help='Worker processes for parsing with --pipeline (default: one per CPU core)')
+    parser.add_argument('--queue-size', type=int,
+                        help='Fetched pages allowed to wait for parsing with --pipeline before fetching pauses '
+                             '(default: twice --parse-workers)')
+    parser.add_argument('--discover', action='store_true',
+                        help="Crawl the new or changed pages listed in each site's robots.txt sitemaps and RSS/Atom "
+                             "feeds, following links only for sites without them")
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue interrupted crawls of these URLs from the crawl state database')
+    parser.add_argument('--parser', choices=['html.parser', 'lxml'], default='html.parser',
+                        help='HTML parser backend (lxml is faster but must be installed)')
+    parser.add_argument('--output-dir', default='scraped_data', help='Directory where scraped data is saved')
+    parser.add_argument('--search', metavar='QUERY',
+                        help='Search the scraped documents instead of scraping, and print the best matches')
+    parser.add_argument('--domain', help='With --search, only match documents from this domain')
+    parser.add_argument('--since', metavar='YYYY-MM-DD', help='With --search, only match documents scraped on or after this date')
+    parser.add_argument('--until', metavar='YYYY-MM-DD', help='With --search, only match documents scraped on or before this date')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum number of search results to print')
+    parser.add_argument('--archive', action='store_true',
+                        help='Keep the raw HTML of scraped pages in compressed archive segments in the output directory')
+    parser.add_argument('--reextract', action='store_true',
+                        help='Regenerate the Markdown of archived pages with the current extraction rules, '
+                             'without fetching them again (honors --domain and --parser)')
+    parser.add_argument('--reindex', action='store_true',
+                        help='Rebuild the library and search index from the files in the output directory')
+    parser.add_argument('--metrics-log', metavar='FILE',
+                        help='Append per-page stage timings and counters to this JSON lines file')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve crawl metrics in the Prometheus text format on this port')
     args = parser.parse_args()
 
-    # Create scraper instance with configured parameters
-    scraper = WebScraper(days_limit=args.days if args.days > 0 else None)
-    
-    urls = [
-        "https://example.com/forum/post1",
-        "https://example.com/forum/post2",
-        # Add your forum URLs here
-    ]
-    
-    for url in urls:
-        print(f"Scraping {url}...")
-        filepath = scraper.scrape_url(url, max_depth=args.depth)
-        if filepath:
-            print(f"Successfully saved to {filepath}")
+    if args.reindex or args.search or args.reextract:
+        os.makedirs(args.output_dir, exist_ok=True)
+        library = LibraryIndex(args.output_dir)
+        if args.reextract:
+            archive = PageArchive(os.path.join(args.output_dir, "archive"))
+            analyzer = PageAnalyzer(available_parser(args.parser))
+            rewritten = reextract(archive, library, analyzer, args.domain, get_parse_pool(args.parse_workers))
+            print(f"Re-extracted {rewritten} document(s) from {archive.count()} archived page(s)")
+            archive.close()
+        if args.reindex:
+            print(f"Indexed {library.rebuild()} document(s) in {args.output_dir}")
+        if args.search:
+            search(library, args)
+        library.close()
+        return
+
+    jobs = collect_jobs(args)
+    if not jobs:
+        parser.error("no URLs to scrape: pass URLs, --urls FILE or --sources")
+
+    get_driver_pool(max_size=args.browsers)
+    if args.metrics_log:
+        log_metrics_to(args.metrics_log)
+    if args.metrics_port:
+        server = start_metrics_server(args.metrics_port)
+        if server is not None:
+            print(f"Serving metrics at http://127.0.0.1:{server.port}/metrics")
+
+    # Every job shares the crawl state, the library and one rate limit per domain
+    os.makedirs(args.output_dir, exist_ok=True)
+    crawl_store = CrawlStore(os.path.join(args.output_dir, "crawl_state.db"))
+    library = LibraryIndex(args.output_dir)
+    archive = PageArchive(os.path.join(args.output_dir, "archive")) if args.archive else None
+    rate_limiter = DomainRateLimiter(domain_rate(args), args.burst)
+    default_days = args.days if args.days > 0 else None
+
+    def scrape(job):
+        days = job.get('days_limit', default_days)
+        # Sources from a config file are only checked for pages that changed since their last scrape
+        since = datetime.strptime(job['last_scraped'], '%Y-%m-%d %H:%M:%S') if job.get('last_scraped') else None
+        with WebScraper(output_dir=args.output_dir, days_limit=days if days and days > 0 else None,
+                        fetch_mode=job.get('fetch_mode', args.fetch_mode),
+                        wait_strategy=job.get('wait_strategy', args.wait_strategy),
+                        browser_profile=job.get('browser_profile', args.browser_profile),
+                        wait_timeout=args.page_timeout, crawl_store=crawl_store, library=library,
+                        parser=args.parser, rate_limiter=rate_limiter, archive=archive) as scraper:
+            if args.use_async:
+                files = scraper.crawl_async(job['url'], max_depth=args.depth, concurrency=args.concurrency,
+                                            per_host_limit=args.per_host, host_delay=args.host_delay,
+                                            resume=args.resume, discover=args.discover, since=since)
+            elif args.pipeline:
+                files = scraper.crawl_pipelined(job['url'], max_depth=args.depth, workers=args.workers,
+                                                per_host_limit=args.per_host, host_delay=args.host_delay,
+                                                resume=args.resume, parse_workers=args.parse_workers,
+                                                queue_size=args.queue_size, discover=args.discover, since=since)
+            else:
+                files = scraper.scrape_url(job['url'], max_depth=args.depth, workers=args.workers,
+                                           per_host_limit=args.per_host, host_delay=args.host_delay,
+                                           resume=args.resume, discover=args.discover, since=since)
+            return files, scraper.crawl_stats
+
+    source_urls = {job['url'] for job in jobs if job.get('source')}
+
+    def report(record):
+        if record['status'] in ('error', 'failed', 'empty'):
+            print(f"Failed to scrape or skipped {record['url']}{': ' + record['error'] if 'error' in record else ''}")
         else:
-            print(f"Failed to scrape or skipped {url}")
-        time.sleep(args.wait)  # Add a configurable delay between requests
+            print(f"{record['url']}: {record['status']}, {len(record['files'])} file(s) in {record['seconds']:.1f}s")
+            if record['url'] in source_urls:
+                mark_scraped(args.sources, record['url'], datetime.now())
+
+    print(f"Scraping {len(jobs)} URL(s) with {args.jobs} job(s)")
+    try:
+        records = BatchRunner(scrape, workers=args.jobs, manifest=args.manifest, on_result=report).run(jobs)
+    finally:
+        shutdown_driver_pool()
+        crawl_store.close()
+        library.close()
+        if archive is not None:
+            archive.close()
+    counts = {}
+    for record in records:
+        counts[record['status']] = counts.get(record['status'], 0) + 1
+    print("Done: " + ', '.join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if args.manifest:
+        print(f"Results written to {args.manifest}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
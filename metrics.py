@@ -0,0 +1,364 @@
+import atexit
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Per-page stages, in pipeline order
+STAGES = ('throttle', 'fetch', 'wait', 'archive', 'parse', 'links', 'dates', 'select', 'markdown', 'write', 'index')
+
+# Histogram bucket upper bounds for stage durations, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PREFIX = 'scraper_'
+
+# Counter descriptions for the Prometheus endpoint
+COUNTER_HELP = {
+    'pages': 'Pages processed, by outcome',
+    'links': 'Links seen on expanded pages, by what happened to them',
+    'errors': 'Failed pages, by exception type',
+    'bytes_fetched': 'Bytes of HTML fetched',
+    'bytes_written': 'Bytes of Markdown written',
+    'browser_requests_blocked': 'Requests the browser profile blocked',
+    'browser_bytes_loaded': 'Bytes the browser downloaded for pages and their resources',
+}
+
+
+class _Stage:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+
+class Metrics:
+    """Process-wide crawl counters and per-stage timings.
+
+    Spans time one stage of one page (fetch, parse, Markdown build ...) and
+    add it to a per-stage histogram. Work done inside page() is also
+    collected into a per-page record, which is handed to every sink when
+    the page finishes. Counters are keyed by name and labels. The registry
+    can be rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.sinks = []
+        self._counters = {}  # (name, (label pairs)) -> value
+        self._stages = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink):
+        with self._lock:
+            self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        with self._lock:
+            if sink in self.sinks:
+                self.sinks.remove(sink)
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter. Unlabelled counters also count towards the current page."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        record = getattr(self._local, 'page', None)
+        if record is not None and not labels:
+            record[name] = record.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        """Record the duration of a stage."""
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = _Stage()
+            self._stages[stage].observe(seconds)
+        record = getattr(self._local, 'page', None)
+        if record is not None:
+            record['spans'][stage] = record['spans'].get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def capture(self):
+        """Collect what this thread records into a dict, without emitting a page record.
+
+        For pages whose stages run on different threads: capture each part and
+        pass the results to emit_page().
+        """
+        record = {'spans': {}}
+        previous = getattr(self._local, 'page', None)
+        self._local.page = record
+        try:
+            yield record
+        finally:
+            self._local.page = previous
+
+    def emit_page(self, url, status, seconds, *captured, error=None):
+        """Emit a page record assembled from capture() results."""
+        record = {'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'url': url, 'status': status,
+                  'seconds': round(seconds, 6), 'spans': {}}
+        for part in captured:
+            for key, value in part.items():
+                if key == 'spans':
+                    for stage, stage_seconds in value.items():
+                        record['spans'][stage] = record['spans'].get(stage, 0.0) + stage_seconds
+                else:
+                    record[key] = record.get(key, 0) + value
+        record['spans'] = {stage: round(stage_seconds, 6) for stage, stage_seconds in record['spans'].items()}
+        if error is not None:
+            record['error'] = type(error).__name__
+        self._emit(record)
+
+    @contextmanager
+    def page(self, url, **spans):
+        """Collect the spans and counters of one page and emit them as a record.
+
+        Keyword arguments are stage durations measured elsewhere, e.g. an
+        asynchronous fetch, to include in the record. The caller may set
+        record['status']; an exception sets it to 'error'.
+        """
+        record = {'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'url': url, 'status': None,
+                  'seconds': 0.0, 'spans': dict(spans)}
+        previous = getattr(self._local, 'page', None)
+        self._local.page = record
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            self._local.page = previous
+            record['seconds'] = round(time.perf_counter() - start + sum(spans.values()), 6)
+            record['spans'] = {stage: round(seconds, 6) for stage, seconds in record['spans'].items()}
+            self._emit(record)
+
+    def snapshot(self):
+        """Return the counters and stage timings as plain dicts."""
+        with self._lock:
+            counters = {}
+            for (name, labels), value in self._counters.items():
+                label = ','.join(f"{key}={val}" for key, val in labels)
+                counters.setdefault(name, {})[label] = value
+            stages = {stage: {'count': data.count, 'seconds': data.seconds}
+                      for stage, data in self._stages.items()}
+        return {'uptime': time.time() - self.started, 'counters': counters, 'stages': stages}
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            stages = {stage: (data.count, data.seconds, list(data.buckets)) for stage, data in self._stages.items()}
+        described = set()
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}{name}_total"
+            if metric not in described:
+                described.add(metric)
+                lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+
+        metric = f"{PREFIX}stage_seconds"
+        if stages:
+            lines.append(f"# HELP {metric} Time spent per page in each crawl stage")
+            lines.append(f"# TYPE {metric} histogram")
+        for stage in sorted(stages, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES)):
+            count, seconds, buckets = stages[stage]
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{metric}_bucket{_labels((('stage', stage), ('le', bound)))} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels((('stage', stage), ('le', '+Inf')))} {count}")
+            lines.append(f"{metric}_sum{_labels((('stage', stage),))} {seconds}")
+            lines.append(f"{metric}_count{_labels((('stage', stage),))} {count}")
+        lines.append(f"# TYPE {PREFIX}uptime_seconds gauge")
+        lines.append(f"{PREFIX}uptime_seconds {time.time() - self.started:.1f}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._stages.clear()
+            self.started = time.time()
+
+    def _emit(self, record):
+        with self._lock:
+            sinks = list(self.sinks)
+        for sink in sinks:
+            try:
+                sink.emit(record)
+            except Exception as e:
+                print(f"Error writing metrics to {sink}: {str(e)}")
+
+
+@contextmanager
+def timed(spans, stage):
+    """Add the time spent in the block to spans[stage], for code that can't record to a Metrics registry."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans[stage] = spans.get(stage, 0.0) + time.perf_counter() - start
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+class JsonLinesSink:
+    """Appends one JSON object per finished page to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __repr__(self):
+        return f"JsonLinesSink({self.path!r})"
+
+
+class MemorySink:
+    """Keeps finished page records in a list, for benchmarks and the dashboard."""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.records = []
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self.limit and len(self.records) > self.limit:
+                del self.records[:len(self.records) - self.limit]
+
+    def recent(self, count):
+        """Return up to count records, newest first."""
+        with self._lock:
+            return list(reversed(self.records[-count:]))
+
+    def close(self):
+        pass
+
+
+class MetricsServer:
+    """Serves Metrics.render_prometheus() at /metrics from a background thread."""
+
+    def __init__(self, metrics, port=9108, host='127.0.0.1'):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = metrics_ref.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+_shared_metrics = Metrics()
+_metrics_server = None
+_page_history = None
+_sinks_by_path = {}
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    return _shared_metrics
+
+
+def get_page_history(limit=500):
+    """Return a MemorySink holding the most recent page records, attached on first use."""
+    global _page_history
+    with _metrics_lock:
+        if _page_history is None:
+            _page_history = MemorySink(limit)
+            _shared_metrics.add_sink(_page_history)
+        return _page_history
+
+
+def log_metrics_to(path):
+    """Append per-page records to a JSON lines file; repeated calls with the same path are ignored."""
+    with _metrics_lock:
+        if path and path not in _sinks_by_path:
+            _sinks_by_path[path] = JsonLinesSink(path)
+            _shared_metrics.add_sink(_sinks_by_path[path])
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Serve the process-wide metrics for Prometheus, once per process.
+    Returns:
+        MetricsServer or None: None if the port could not be opened
+    """
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is None:
+            try:
+                _metrics_server = MetricsServer(_shared_metrics, port, host)
+            except OSError as e:
+                print(f"Could not start metrics endpoint on port {port}: {str(e)}")
+        return _metrics_server
+
+
+def shutdown_metrics():
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is not None:
+            _metrics_server.close()
+            _metrics_server = None
+        for sink in _sinks_by_path.values():
+            _shared_metrics.remove_sink(sink)
+            sink.close()
+        _sinks_by_path.clear()
+
+
+atexit.register(shutdown_metrics)
@@ -0,0 +1,63 @@
+import atexit
+import os
+import threading
+from archive import PageArchive
+from crawl_store import CrawlStore
+from library import LibraryIndex
+
+
+class OutputStores:
+    """The crawl store, library index and raw HTML archive kept in one output directory.
+
+    Opened once per process and directory (see get_output_stores) and shared
+    by every dashboard session and scheduled run, since each of them holds
+    an SQLite connection and the archive an open segment file.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.crawl_store = CrawlStore(os.path.join(output_dir, "crawl_state.db"))
+        self.library = LibraryIndex(output_dir)
+        self.archive_dir = os.path.join(output_dir, "archive")
+        self._archive = None
+        self._lock = threading.Lock()
+
+    def archive(self, create=False):
+        """The raw HTML archive, or None if it doesn't exist yet and create is False."""
+        with self._lock:
+            if self._archive is None and (create or os.path.isdir(self.archive_dir)):
+                self._archive = PageArchive(self.archive_dir)
+            return self._archive
+
+    def close(self):
+        with self._lock:
+            self.crawl_store.close()
+            self.library.close()
+            if self._archive is not None:
+                self._archive.close()
+                self._archive = None
+
+
+_output_stores = {}
+_output_stores_lock = threading.Lock()
+
+
+def get_output_stores(output_dir):
+    """Return the process-wide stores for an output directory, opening them on first use."""
+    key = os.path.abspath(output_dir)
+    with _output_stores_lock:
+        if key not in _output_stores:
+            _output_stores[key] = OutputStores(output_dir)
+        return _output_stores[key]
+
+
+def shutdown_output_stores():
+    with _output_stores_lock:
+        stores = list(_output_stores.values())
+        _output_stores.clear()
+    for store in stores:
+        store.close()
+
+
+atexit.register(shutdown_output_stores)
@@ -0,0 +1,254 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from analysis import analyze_page
+from crawler import CrawlEngine, CrawlState
+
+# Event kinds passed from the stages back to the crawl loop
+FETCHED, PARSED, WRITTEN = 'fetched', 'parsed', 'written'
+
+
+class PipelineEngine(CrawlEngine):
+    """Crawler that runs fetch, parse/extract and write as separate stages.
+
+    Fetches run on a pool of threads, so the network and the browsers are
+    never idle while a page is parsed. Parsing, link and date extraction and
+    Markdown rendering run in a pool of worker processes, so they use every
+    core instead of contending for the GIL. Files, the library and the crawl
+    store are written by one writer thread. Only the crawl loop touches the
+    frontier.
+
+    Backpressure: at most queue_size fetched pages wait for or are in the
+    parse and write stages. While that many are waiting, no new fetches are
+    started, so fetched HTML never piles up in memory.
+
+    In 'auto' fetch mode, the parse workers also check whether the static
+    HTML has content. Pages without it go back to the front of their host's
+    queue to be fetched with the browser. If that fails, their static HTML is
+    saved after all. Pages are never parsed in the fetch threads.
+    """
+
+    def __init__(self, scraper, workers=4, per_host_limit=2, host_delay=0.5, parse_workers=None, queue_size=None):
+        super().__init__(scraper, workers=workers, per_host_limit=per_host_limit, host_delay=host_delay)
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        self.queue_size = max(1, queue_size or 2 * self.parse_workers)
+
+    def crawl(self, url, progress_callback=None, depth=1, max_depth=2, visited_urls=None, fetch_mode=None,
+              resume=False, skip_fetched_within=None, seed_urls=None):
+        """Crawl from url and return the paths of all files written; same semantics as CrawlEngine.crawl."""
+        self._paused.clear()
+        scraper = self.scraper
+        state = self.state = CrawlState(scraper.crawl_store, url, max_depth, visited_urls, skip_fetched_within,
+                                        scraper.metrics)
+        frontier = OrderedDict()
+        static_pages = {}  # URL -> page with no content in its static HTML, waiting for the browser
+
+        def add_to_frontier(links):
+            for link, link_depth in links:
+                frontier.setdefault(urlparse(link).netloc, deque()).append((link, link_depth))
+
+        add_to_frontier(state.start(url, depth, resume, seed_urls))
+        if progress_callback:
+            progress_callback(0.0 if state.total else 1.0)
+
+        events = queue.Queue()
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        writer = threading.Thread(target=self._write_loop, args=(write_queue, events), daemon=True)
+        writer.start()
+        parse_pool = get_parse_pool(self.parse_workers)
+        fetching = 0
+        backlog = 0  # Fetched pages waiting for or inside the parse and write stages
+
+        def finish(page, result=None, error=None):
+            if error is not None:
+                state.page_failed(page['url'], error)
+                status = 'error'
+            else:
+                links, filepath, change = result
+                add_to_frontier(state.page_done(page['url'], page['depth'], links, filepath, change))
+                status = change or 'expanded'
+            scraper.metrics.emit_page(page['url'], status, time.perf_counter() - page['start'], *page['captured'],
+                                      error=error)
+            print(f"Crawled {state.completed}/{state.total} pages")
+            if progress_callback:
+                progress_callback(state.completed / state.total)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as fetch_pool:
+            try:
+                while (frontier and not self._paused.is_set()) or fetching or backlog:
+                    # Start fetches while fetch workers are free and the later stages keep up
+                    for host in list(frontier):
+                        if fetching >= self.workers or backlog >= self.queue_size or self._paused.is_set():
+                            break
+                        host_queue = frontier[host]
+                        while (host_queue and fetching < self.workers and backlog < self.queue_size
+                               and self.throttle.try_acquire(host)):
+                            link, link_depth = host_queue.popleft()
+                            page = {'url': link, 'depth': link_depth, 'host': host, 'start': time.perf_counter(),
+                                    'captured': [], 'fetch_mode': fetch_mode}
+                            if link in static_pages:
+                                # A browser refetch is timed and recorded as part of the same page
+                                static_page = static_pages[link]
+                                page.update(start=static_page['start'], captured=static_page['captured'],
+                                            fetch_mode='browser')
+                            future = fetch_pool.submit(self._fetch_stage, page, max_depth)
+                            future.add_done_callback(lambda f, page=page: events.put((FETCHED, page, f)))
+                            fetching += 1
+                        if not host_queue:
+                            del frontier[host]
+
+                    if not fetching and not backlog:
+                        if self._paused.is_set():
+                            break
+                        # Every queued host is cooling down; sleep until the first one is ready
+                        with scraper.metrics.span('throttle'):
+                            time.sleep(self._next_dispatch_delay(frontier) or 0.05)
+                        continue
+
+                    can_fetch = fetching < self.workers and backlog < self.queue_size
+                    try:
+                        kind, page, future = events.get(timeout=self._next_dispatch_delay(frontier) if can_fetch
+                                                        else None)
+                    except queue.Empty:
+                        continue
+
+                    if kind == FETCHED:
+                        fetching -= 1
+                        self.throttle.release(page['host'])
+                        static_page = static_pages.pop(page['url'], None)
+                        try:
+                            done = future.result()
+                        except Exception as e:
+                            if static_page is None:
+                                finish(page, error=e)
+                                continue
+                            print(f"Browser fetch failed for {page['url']} ({str(e)}), using static HTML")
+                            backlog += 1
+                            write_queue.put(static_page)
+                            continue
+                        if done is not None:
+                            finish(page, done)  # Unchanged page; nothing to parse
+                            continue
+                        fetched = page['fetched']
+                        try:
+                            future = parse_pool.submit(analyze_page, scraper.analyzer, fetched.html, page['url'],
+                                                       fetched.url, page['depth'], max_depth, page['unchanged'],
+                                                       page['check_content'])
+                        except Exception as e:
+                            finish(page, error=e)
+                            continue
+                        backlog += 1
+                        future.add_done_callback(lambda f, page=page: events.put((PARSED, page, f)))
+                    elif kind == PARSED:
+                        try:
+                            page['analysis'] = future.result()
+                        except Exception as e:
+                            backlog -= 1
+                            finish(page, error=e)
+                            continue
+                        if page['analysis'].has_content is False:
+                            print(f"No extractable content in static HTML for {page['url']}, falling back to browser")
+                            backlog -= 1
+                            static_pages[page['url']] = page
+                            frontier.setdefault(page['host'], deque()).appendleft((page['url'], page['depth']))
+                            frontier.move_to_end(page['host'], last=False)
+                            continue
+                        if not page['check_content']:
+                            page['fetched'].html = None  # The writer only needs the headers
+                        write_queue.put(page)
+                    else:
+                        backlog -= 1
+                        result, error = future
+                        finish(page, result, error)
+            finally:
+                write_queue.put(None)
+                writer.join()
+
+        state.finish(sum(len(host_queue) for host_queue in frontier.values()))
+        return state.scraped_files
+
+    def _fetch_stage(self, page, max_depth):
+        """Fetch a page. Returns the crawl result if it needs no parsing, otherwise None.
+
+        The static HTML of 'auto' mode pages isn't checked for content here,
+        since that needs a full parse; the parse workers check it instead, and
+        such pages are archived by the writer once it's known which fetch is kept.
+        """
+        scraper = self.scraper
+        with scraper.metrics.capture() as captured:
+            page['captured'].append(captured)
+            fetched, cached, _ = scraper.fetch_page(page['url'], page['depth'], max_depth, page['fetch_mode'],
+                                                    check_content=False)
+            content_hash, unchanged = scraper.check_unchanged(fetched, cached)
+            if content_hash is None or (unchanged and page['depth'] >= max_depth):
+                return [], None, 'unchanged'
+            check_content = scraper.needs_content_check(fetched, page['fetch_mode'])
+            archive_id = None
+            if not unchanged and not check_content:
+                archive_id = scraper.archive_page(page['url'], fetched, content_hash)
+        page.update(fetched=fetched, cached=cached, content_hash=content_hash, unchanged=unchanged,
+                    archive_id=archive_id, check_content=check_content)
+        return None
+
+    def _write_loop(self, write_queue, events):
+        """Writer thread: save analyzed pages in arrival order and report back to the crawl loop."""
+        scraper = self.scraper
+        while True:
+            page = write_queue.get()
+            if page is None:
+                return
+            result, error = None, None
+            with scraper.metrics.capture() as captured:
+                page['captured'].append(captured)
+                try:
+                    if page['check_content']:
+                        if not page['unchanged']:
+                            page['archive_id'] = scraper.archive_page(page['url'], page['fetched'],
+                                                                      page['content_hash'])
+                        page['fetched'].html = None
+                    result = scraper.apply_analysis(page['analysis'], page['fetched'], page['url'], page['cached'],
+                                                    page['content_hash'], page['archive_id'])
+                except Exception as e:
+                    error = e
+            events.put((WRITTEN, page, (result, error)))
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool(max_workers=None):
+    """Return the process-wide pool of parse workers, creating it on first use.
+
+    max_workers configures the pool the first time it is created and is
+    ignored afterwards. Workers are started with forkserver (or spawn) rather
+    than fork, since the parent runs browser, scheduler and crawl threads.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        # A worker that crashed breaks the whole pool; start a fresh one
+        if _parse_pool is None or getattr(_parse_pool, '_broken', False):
+            # Imported here so that loading the module doesn't pull in multiprocessing
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _parse_pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context)
+        return _parse_pool
+
+
+def shutdown_parse_pool():
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(cancel_futures=True)
+            _parse_pool = None
+
+
+atexit.register(shutdown_parse_pool)
@@ -0,0 +1,226 @@
+import atexit
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class _Entry:
+    def __init__(self, url, interval, due):
+        self.url = url
+        self.interval = interval
+        self.due = due
+        self.last_scraped = None  # As last seen in the source config
+        self.version = 0
+
+
+class SourceScheduler:
+    """Runs periodic source scrapes when they fall due.
+
+    Sources wait in a priority queue ordered by next-due time. A dispatcher
+    thread sleeps until the earliest one is due, or until the schedule
+    changes, and hands due sources to a bounded pool of workers. A source is
+    never run twice at once. Each due time gets random jitter, so sources
+    added together don't all fire at the same moment.
+
+    The job is called as run_source(url) and returns True when the scrape
+    succeeded. Failed runs are retried after retry_delay seconds.
+    """
+
+    def __init__(self, run_source, workers=2, jitter=0.05, max_jitter=300, retry_delay=300, history_size=200):
+        self.run_source = run_source
+        self.workers = max(1, workers)
+        self.jitter = jitter
+        self.max_jitter = max_jitter
+        self.retry_delay = retry_delay
+        self._entries = {}  # url -> _Entry
+        self._heap = []  # (due, seq, url, version); stale versions are skipped
+        self._seq = itertools.count()
+        self._running = {}  # url -> (started, lag)
+        self._history = deque(maxlen=history_size)
+        self._last_lag = 0.0
+        self._lock = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scheduler')
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def sync(self, sources):
+        """Bring the schedule in line with the configured sources.
+
+        New sources, and sources whose interval or last_scraped time changed,
+        are scheduled from their last_scraped time. Sources without an
+        interval are dropped. Sources that are running are rescheduled when
+        their run finishes.
+        """
+        now = time.time()
+        with self._lock:
+            configured = set()
+            for source in sources:
+                interval = (source.get('interval_hours') or 0) * 3600
+                if interval <= 0:
+                    continue
+                url = source['url']
+                configured.add(url)
+                if url in self._running:
+                    continue
+                entry = self._entries.get(url)
+                last_scraped = source.get('last_scraped')
+                # Keep the current due time (and any pending retry) unless the config changed
+                if entry is not None and entry.interval == interval and entry.last_scraped == last_scraped:
+                    continue
+                due = self._due_from(last_scraped, interval, now)
+                self._schedule(url, interval, due + self._random_jitter(interval))
+                self._entries[url].last_scraped = last_scraped
+            for url in list(self._entries):
+                if url not in configured:
+                    del self._entries[url]
+            self._lock.notify()
+
+    def stats(self):
+        """Queue depth, due backlog, lag and worker usage for the dashboard."""
+        now = time.time()
+        with self._lock:
+            waiting = [entry for url, entry in self._entries.items() if url not in self._running]
+            overdue = [now - entry.due for entry in waiting if entry.due <= now]
+            next_due = min((entry.due for entry in waiting if entry.due > now), default=None)
+            return {
+                'scheduled': len(self._entries),
+                'due': len(overdue),
+                'running': len(self._running),
+                'workers': self.workers,
+                'lag': max(overdue, default=0.0),
+                'last_lag': self._last_lag,
+                'next_due': datetime.fromtimestamp(next_due).strftime(DATE_FORMAT) if next_due else None,
+            }
+
+    def queue(self):
+        """Scheduled sources in due order, as dicts."""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: entry.due)
+            return [{'url': entry.url, 'due': datetime.fromtimestamp(entry.due).strftime(DATE_FORMAT),
+                     'running': entry.url in self._running} for entry in entries]
+
+    def history(self):
+        """Finished runs, newest first."""
+        with self._lock:
+            return list(reversed(self._history))
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._executor.shutdown(wait=False)
+
+    def _dispatch(self):
+        with self._lock:
+            while not self._closed:
+                now = time.time()
+                # Drop heap items for entries that were rescheduled or removed
+                while self._heap:
+                    due, _, url, version = self._heap[0]
+                    entry = self._entries.get(url)
+                    if entry is not None and entry.version == version and url not in self._running:
+                        break
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._lock.wait()
+                    continue
+                due = self._heap[0][0]
+                if due > now:
+                    self._lock.wait(due - now)
+                    continue
+                if len(self._running) >= self.workers:
+                    self._lock.wait()  # Woken when a run finishes
+                    continue
+                _, _, url, _ = heapq.heappop(self._heap)
+                self._last_lag = now - due
+                self._running[url] = (now, self._last_lag)
+                self._executor.submit(self._run, url, now, self._last_lag)
+
+    def _run(self, url, started, lag):
+        succeeded = False
+        error = None
+        try:
+            succeeded = bool(self.run_source(url))
+        except Exception as e:
+            error = str(e)
+            print(f"Scheduled scrape of {url} failed: {error}")
+        finished = time.time()
+        with self._lock:
+            del self._running[url]
+            self._history.append({
+                'url': url,
+                'started': datetime.fromtimestamp(started).strftime(DATE_FORMAT),
+                'duration': round(finished - started, 1),
+                'lag': round(lag, 1),
+                'succeeded': succeeded,
+                'error': error,
+            })
+            entry = self._entries.get(url)
+            if entry is not None:
+                if succeeded:
+                    due = started + entry.interval + self._random_jitter(entry.interval)
+                else:
+                    due = finished + min(self.retry_delay, entry.interval)
+                self._schedule(url, entry.interval, due)
+            self._lock.notify()
+
+    def _schedule(self, url, interval, due):
+        """Set an entry's due time; the caller holds the lock."""
+        entry = self._entries.get(url)
+        if entry is None:
+            entry = self._entries[url] = _Entry(url, interval, due)
+        entry.interval = interval
+        entry.due = due
+        entry.version += 1
+        heapq.heappush(self._heap, (due, next(self._seq), url, entry.version))
+
+    def _due_from(self, last_scraped, interval, now):
+        if not last_scraped:
+            return now
+        try:
+            return datetime.strptime(last_scraped, DATE_FORMAT).timestamp() + interval
+        except ValueError:
+            return now
+
+    def _jitter_for(self, interval):
+        return min(interval * self.jitter, self.max_jitter)
+
+    def _random_jitter(self, interval):
+        return random.uniform(0, self._jitter_for(interval))
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(run_source, **kwargs):
+    """Return the process-wide scheduler, creating it on first use.
+
+    Every dashboard session shares this scheduler, so each source is
+    scheduled once per process. Arguments configure the scheduler the first
+    time it is created and are ignored afterwards.
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None or _shared_scheduler._closed:
+            _shared_scheduler = SourceScheduler(run_source, **kwargs)
+        return _shared_scheduler
+
+
+def shutdown_scheduler():
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is not None:
+            _shared_scheduler.close()
+            _shared_scheduler = None
+
+
+atexit.register(shutdown_scheduler)
@@ -1,284 +1,472 @@
-import requests
-from bs4 import BeautifulSoup
 import os
+import hashlib
 from datetime import datetime, timedelta
-from urllib.parse import urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import re
+import threading
 import time
-import platform
+from urllib.parse import urlparse, urlsplit
+from fetcher import FETCH_MODES, StaticFetcher, BrowserFetcher, BrowserProfile, WaitPolicy
+from driver_pool import get_driver_pool
+from crawler import CrawlEngine
+from crawl_store import CrawlStore
+from library import LibraryIndex
+from urls import normalize_url, LinkFilter
+from extraction import CONTENT_SELECTORS, ContentExtractor, available_parser
+from dates import DateExtractor
+from analysis import PageAnalyzer
+from metrics import get_metrics
+
+# Characters of a host name that are kept in file names; ports and anything else become '_'
+UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9.-]')
+
+
+def markdown_filename(url, scraped_at):
+    """Name the Markdown file for a page: domain, scrape time and a hash of the URL.
+
+    Pages of one domain saved within the same second get different names,
+    and the same page saved twice in one second is the only possible clash.
+    """
+    domain = UNSAFE_FILENAME_CHARS.sub('_', urlparse(url).netloc) or 'page'
+    url_hash = hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()[:10]
+    return f"{domain}_{scraped_at.strftime('%Y%m%d_%H%M%S')}_{url_hash}"
+
+
+def content_selector_css():
+    """Return CONTENT_SELECTORS as CSS selectors, for waiting on them in the browser."""
+    css = []
+    for selector in CONTENT_SELECTORS:
+        if 'class_' in selector:
+            css.append(f"{selector['tag']}.{selector['class_']}")
+        elif 'id' in selector:
+            css.append(f"{selector['tag']}#{selector['id']}")
+        else:
+            css.append(selector['tag'])
+    return css
 
 class WebScraper:
-    def __init__(self, output_dir="scraped_data", days_limit=7):
+    def __init__(self, output_dir="scraped_data", days_limit=7, fetch_mode="auto",
+                 wait_strategy="ready", wait_timeout=5, driver_pool=None, crawl_store=None,
+                 parser="html.parser", link_filter=None, library=None, metrics=None,
+                 rate_limiter=None, archive=None, browser_profile=None):
         self.output_dir = output_dir
         self.days_limit = days_limit
         self.cutoff_date = datetime.now() - timedelta(days=days_limit) if days_limit else None
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        # Setup Selenium with robust error handling
-        try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")  # Run in headless mode
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            
-            # Add additional Chrome options for stability
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-popup-blocking")
-            chrome_options.add_argument("--disable-notifications")
-            
-            # Try to locate Chrome binary
-            chrome_paths = [
-                "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",  # macOS
-                "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome Beta",  # macOS Beta
-                "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome Canary",  # macOS Canary
-                "/usr/bin/google-chrome",  # Linux
-                "C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",  # Windows
-                "C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe"  # Windows x86
-            ]
-            
-            chrome_binary = None
-            for path in chrome_paths:
-                if os.path.exists(path):
-                    chrome_binary = path
-                    print(f"Found Chrome binary at: {path}")
-                    break
-                    
-            if chrome_binary:
-                chrome_options.binary_location = chrome_binary
-            else:
-                print("Warning: Chrome browser not found in standard locations.")
-                print("Attempting to continue without specifying binary location...")
-            
-            # Set up Chrome WebDriver using Selenium Manager
-            service = Service()
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.set_page_load_timeout(30)
-            print("Chrome WebDriver initialized successfully")
-                
-        except Exception as e:
-            print(f"Failed to initialize Chrome WebDriver: {str(e)}")
-            print("Please ensure Chrome browser is installed and up to date.")
-            print("You may need to manually install ChromeDriver or update Chrome.")
-            self.driver = None
-        except Exception as e:
-            print(f"Error setting up Chrome options: {str(e)}")
-            self.driver = None
+        self.fetch_mode = fetch_mode if fetch_mode in FETCH_MODES else 'auto'
+        self.page_stats = []
+        self.parser = available_parser(parser)
+        self.extractor = ContentExtractor()
+        self.date_extractor = DateExtractor()
+        self.link_filter = link_filter or LinkFilter()
+        # Stage timings and counters go to the process-wide registry unless the caller brings its own
+        self.metrics = metrics or get_metrics()
+        # Optional DomainRateLimiter shared with other scrapers, e.g. by the batch CLI
+        self.rate_limiter = rate_limiter
+        # Parsing and extraction settings, in a form that can be shipped to worker processes
+        self.analyzer = PageAnalyzer(self.parser, self.link_filter, self.cutoff_date, days_limit,
+                                     self.extractor, self.date_extractor)
+        self._stats_lock = threading.Lock()
+        self._reset_link_stats()
+        # Stores opened here are closed with the scraper; stores passed in belong to the caller
+        self._owned_stores = []
+        # Crawl frontier and seen URLs persist across runs so crawls can be resumed
+        if crawl_store is None:
+            crawl_store = CrawlStore(os.path.join(output_dir, "crawl_state.db"))
+            self._owned_stores.append(crawl_store)
+        self.crawl_store = crawl_store
+        self.active_crawl = None
+        # Every saved document is indexed so the Library never has to scan the output directory
+        if library is None:
+            library = LibraryIndex(output_dir)
+            self._owned_stores.append(library)
+        self.library = library
+        # Optional PageArchive that keeps the raw HTML of every changed page for re-extraction
+        self.archive = archive
+
+        # Fetch backends are created on first fetch, so a scraper that never fetches costs no
+        # HTTP session, browser pool or requests/selenium import. Chrome drivers come from the
+        # shared pool and are only started when a page needs the browser.
+        self.wait_policy = WaitPolicy(wait_strategy, timeout=wait_timeout, selectors=content_selector_css())
+        self.driver_pool = driver_pool
+        # What Chrome blocks and how long it waits for; a BrowserProfile or a source's browser_profile setting
+        self.browser_profile = (browser_profile if isinstance(browser_profile, BrowserProfile)
+                                else BrowserProfile.from_config(browser_profile))
+        self._static_fetcher = None
+        self._browser_fetcher = None
+        self._fetcher_lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def static_fetcher(self):
+        """The HTTP fetcher, created on first use."""
+        if self._static_fetcher is None:
+            with self._fetcher_lock:
+                if self._closed:
+                    raise RuntimeError("Scraper is closed")
+                if self._static_fetcher is None:
+                    self._static_fetcher = StaticFetcher()
+        return self._static_fetcher
+
+    @property
+    def browser_fetcher(self):
+        """The browser fetcher, created on first use, or None when the scraper only fetches static HTML."""
+        if self.fetch_mode == 'static':
+            return None
+        if self._browser_fetcher is None:
+            with self._fetcher_lock:
+                if self._closed:
+                    raise RuntimeError("Scraper is closed")
+                if self._browser_fetcher is None:
+                    self._browser_fetcher = BrowserFetcher(self.driver_pool or get_driver_pool(), self.wait_policy,
+                                                           self.browser_profile)
+        return self._browser_fetcher
+
+    def close(self):
+        """Release the HTTP session and the crawl store and library the scraper opened itself.
+
+        Browsers belong to the shared driver pool and are left running, and
+        stores passed in by the caller are left open. crawl_stats stays readable.
+        """
+        with self._fetcher_lock:
+            self._closed = True
+            static_fetcher, self._static_fetcher = self._static_fetcher, None
+            owned_stores, self._owned_stores = self._owned_stores, []
+        if static_fetcher is not None:
+            static_fetcher.close()
+        for store in owned_stores:
+            store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def __del__(self):
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+        if getattr(self, '_static_fetcher', None) is not None:
+            self._static_fetcher.close()
 
-    def _is_valid_link(self, link, base_url):
-        """Check if a link should be followed based on various criteria."""
+    def _fetch(self, url, fetch_mode=None, validators=None, check_content=True):
+        """Fetch a page, choosing the backend by fetch mode.
+
+        In 'auto' mode a plain HTTP GET is tried first and the browser is
+        only used when the static HTML has no extractable content. Cached
+        validators turn the plain GET into a conditional request. With
+        check_content=False the static HTML is returned unchecked; the caller
+        checks it (see needs_content_check) and refetches with the browser.
+        Returns:
+            tuple: (FetchResult, BeautifulSoup or None if the page wasn't parsed yet)
+        """
+        mode = fetch_mode or self.fetch_mode
+        static_result = None
+        if mode != 'browser':
+            try:
+                with self.metrics.span('fetch'):
+                    result = self.static_fetcher.fetch(url, validators)
+                if result.not_modified or mode == 'static' or self.browser_fetcher is None or not check_content:
+                    return result, None
+                from bs4 import BeautifulSoup
+                with self.metrics.span('parse'):
+                    soup = BeautifulSoup(result.html, self.parser)
+                if self.analyzer.has_content(soup, url):
+                    return result, soup
+                print(f"No extractable content in static HTML for {url}, falling back to browser")
+                static_result = (result, soup)
+            except self.static_fetcher.request_errors as e:
+                if mode == 'static' or self.browser_fetcher is None:
+                    raise
+                print(f"Static fetch failed for {url} ({str(e)}), falling back to browser")
+
+        if self.browser_fetcher is None:
+            raise RuntimeError("Browser backend is disabled for this scraper")
+        start = time.perf_counter()
         try:
-            parsed_link = urlparse(link)
-            parsed_base = urlparse(base_url)
-            
-            # Check if the link is from the same domain
-            if parsed_link.netloc != parsed_base.netloc:
-                return False
-            
-            # Ignore common file types that aren't likely to contain content
-            ignored_extensions = ('.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.pdf')
-            if any(parsed_link.path.endswith(ext) for ext in ignored_extensions):
-                return False
-            
-            # Ignore common non-content paths
-            ignored_paths = ('login', 'logout', 'signup', 'register', 'search')
-            path_parts = parsed_link.path.strip('/').split('/')
-            if any(part in ignored_paths for part in path_parts):
-                return False
-            
-            return True
-            
-        except Exception:
-            return False
-
-    def scrape_url(self, url, progress_callback=None, depth=1, max_depth=2, visited_urls=None):
-        if visited_urls is None:
-            visited_urls = set()
-        
-        if depth > max_depth or url in visited_urls:
+            result = self.browser_fetcher.fetch(url)
+        except Exception as e:
+            self.metrics.observe('fetch', time.perf_counter() - start)
+            if static_result is None:
+                raise
+            print(f"Browser fetch failed for {url} ({str(e)}), using static HTML")
+            return static_result
+        # The browser's wait for the page to settle is reported apart from the load itself
+        self.metrics.observe('wait', result.wait_seconds)
+        self.metrics.observe('fetch', max(0.0, time.perf_counter() - start - result.wait_seconds))
+        if result.requests_blocked is not None:
+            self.metrics.inc('browser_requests_blocked', result.requests_blocked)
+            self.metrics.inc('browser_bytes_loaded', result.bytes_loaded)
+        return result, None
+
+    def _count_links(self, **counts):
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.link_stats[key] += value
+        for key, value in counts.items():
+            if value:
+                self.metrics.inc('links', value, kind=key)
+
+    def _print_link_stats(self):
+        stats = self.link_stats
+        if stats['discovered'] or stats['filtered']:
+            print(f"Links: {stats['discovered']} followable, {stats['filtered']} filtered out, "
+                  f"{stats['collapsed']} duplicate spellings collapsed")
+        if stats['outdated']:
+            print(f"Skipped {stats['outdated']} links to posts older than {self.days_limit} days")
+
+    def _reset_link_stats(self):
+        with self._stats_lock:
+            self.link_stats = {'discovered': 0, 'filtered': 0, 'collapsed': 0, 'outdated': 0}
+
+    def scrape_url(self, url, progress_callback=None, depth=1, max_depth=2, visited_urls=None, fetch_mode=None,
+                   workers=4, per_host_limit=2, host_delay=0.5, resume=False, skip_fetched_within=None,
+                   discover=False, since=None):
+        """Crawl a URL breadth-first, following links up to max_depth.
+
+        Pages that have links and sit above max_depth are treated as listing
+        pages and expanded; all other pages are extracted and saved.
+        Args:
+            url (str): The start URL
+            progress_callback (callable): Called with the fraction of discovered pages completed
+            depth (int): Depth of the start URL
+            max_depth (int): Maximum depth to follow links to
+            visited_urls (set): URLs to skip; updated in place with every URL crawled
+            fetch_mode (str): Override the scraper's fetch mode for this crawl
+            workers (int): Number of pages fetched concurrently
+            per_host_limit (int): Maximum concurrent requests to one host
+            host_delay (float): Minimum seconds between request starts on one host
+            resume (bool): Continue a paused or interrupted crawl of url from the crawl store
+            skip_fetched_within (float): Don't refetch pages this crawl saved in the last N seconds
+            discover (bool): Crawl the pages the site's sitemaps and feeds list as new or changed,
+                following links only if it has none (see discover_urls)
+            since (datetime): With discover, when the source was last scraped
+        Returns:
+            list: Paths of all files written
+        """
+        self._reset_link_stats()
+        seed_urls = self._seed_urls(url, depth, max_depth, resume, discover, since)
+        self.active_crawl = CrawlEngine(self, workers=workers, per_host_limit=per_host_limit, host_delay=host_delay)
+        scraped_files = self.active_crawl.crawl(url, progress_callback=progress_callback, depth=depth,
+                                                max_depth=max_depth, visited_urls=visited_urls, fetch_mode=fetch_mode,
+                                                resume=resume, skip_fetched_within=skip_fetched_within,
+                                                seed_urls=seed_urls)
+        self._print_link_stats()
+        return scraped_files
+
+    def _seed_urls(self, url, depth, max_depth, resume, discover, since):
+        """Discovered pages to start a crawl from, or None to follow links (or continue a resumable frontier)."""
+        if not discover or depth >= max_depth:
             return None
-            
-        visited_urls.add(url)
-        
-        if self.driver is None:
-            print("Chrome driver not initialized properly")
+        if resume and self.crawl_store.is_resumable(normalize_url(url)):
             return None
+        return self.discover_urls(url, since)
 
-        try:
-            if progress_callback:
-                progress_callback(0.1)
-
-            self.driver.get(url)
-            time.sleep(5)
-            
-            if progress_callback:
-                progress_callback(0.2)
-            
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Extract all links from the page
-            all_links = []
-            for a in soup.find_all('a', href=True):
-                href = a['href']
-                if not href.startswith('http'):
-                    href = url + href if href.startswith('/') else url + '/' + href
-                if self._is_valid_link(href, url):
-                    all_links.append(href)
-            
-            # Check if this is a forum main page
-            post_links = self.extract_post_links(soup, url)
-            all_links.extend(post_links)
-            
-            if all_links and depth < max_depth:
-                print(f"Found {len(all_links)} links to scrape at depth {depth}")
-                scraped_files = []
-                
-                for idx, link_url in enumerate(all_links):
-                    if link_url not in visited_urls:
-                        if progress_callback:
-                            progress = 0.2 + (0.8 * (idx / len(all_links)))
-                            progress_callback(progress)
-                        
-                        print(f"Scraping link {idx+1}/{len(all_links)}: {link_url}")
-                        result = self.scrape_url(link_url, progress_callback=None, depth=depth+1, max_depth=max_depth, visited_urls=visited_urls)
-                        if result:
-                            scraped_files.append(result)
-                
-                if progress_callback:
-                    progress_callback(1.0)
-                
-                return scraped_files[0] if scraped_files else None
-            
-            else:
-                # Handle single page content
-                title = soup.title.string if soup.title else "Untitled"
-            
-                # Try to find the main article content using common article selectors
-                main_content = None
-                content_selectors = [
-                    {'tag': 'article'},
-                    {'tag': 'main'},
-                    {'tag': 'div', 'class_': 'article-content'},
-                    {'tag': 'div', 'class_': 'post-content'},
-                    {'tag': 'div', 'class_': 'entry-content'},
-                    {'tag': 'div', 'id': 'article-body'},
-                    {'tag': 'div', 'class_': 'content'},
-                    {'tag': 'div', 'id': 'content'}
-                ]
-
-                for selector in content_selectors:
-                    if 'class_' in selector:
-                        main_content = soup.find(selector['tag'], class_=selector['class_'])
-                    elif 'id' in selector:
-                        main_content = soup.find(selector['tag'], id=selector['id'])
-                    else:
-                        main_content = soup.find(selector['tag'])
-                    
-                    if main_content:
-                        break
-
-                # If no specific content area found, fall back to body but try to clean it
-                if not main_content:
-                    main_content = soup.find('body')
-                    if main_content:
-                        # Remove common non-content elements
-                        for element in main_content.find_all(['nav', 'header', 'footer', 'aside', 'script', 'style', 'iframe']):
-                            element.decompose()
-                        
-                        # Remove elements with common ad-related classes or IDs
-                        ad_indicators = ['ad', 'advertisement', 'banner', 'sidebar', 'popup', 'modal', 'newsletter']
-                        for indicator in ad_indicators:
-                            for element in main_content.find_all(class_=lambda x: x and indicator in x.lower()):
-                                element.decompose()
-                            for element in main_content.find_all(id=lambda x: x and indicator in x.lower()):
-                                element.decompose()
-            
-                markdown_content = f"# {title}\n\n"
-                markdown_content += f"Source: {url}\n"
-                markdown_content += f"Date scraped: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                
-                if main_content:
-                    # Extract text from content elements, maintaining hierarchy
-                    for element in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p']):
-                        text = element.get_text().strip()
-                        if text and len(text) > 20:  # Filter out very short snippets
-                            if element.name.startswith('h'):
-                                markdown_content += f"\n{'#' * int(element.name[1:])} {text}\n"
-                            else:
-                                markdown_content += f"\n{text}\n"
-                
-                domain = urlparse(url).netloc
-                filename = f"{domain}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-                filepath = os.path.join(self.output_dir, filename)
-                
-                if progress_callback:
-                    progress_callback(0.8)  # Content extracted
-                
-                # Save to file
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(markdown_content)
-                
-                if progress_callback:
-                    progress_callback(1.0)  # Complete
-                
-                return filepath
-                
-        except Exception as e:
-            print(f"Error scraping {url}: {str(e)}")
-            if progress_callback:
-                progress_callback(0.0)
+    def discover_urls(self, url, since=None):
+        """Find the pages to crawl in the site's sitemaps and feeds instead of by following links.
+
+        Pages dated after since are queued, and so are undated pages this
+        crawl has never fetched; pages dated before the days limit are not.
+        Args:
+            url (str): The start URL; only pages below it are considered
+            since (datetime): When the source was last scraped, or None to take every dated page
+        Returns:
+            list: URLs to crawl, possibly empty, or None if the site has no sitemap or feed to use
+        """
+        from discovery import SiteDiscovery
+        discovery = SiteDiscovery(self.static_fetcher.session, self.crawl_store, self.rate_limiter)
+        with self.metrics.span('fetch'):
+            entries = discovery.discover(url)
+        if entries is None:
+            print(f"No sitemap or feed lists pages below {url}, following links instead")
             return None
+        crawl_id = normalize_url(url)
+        base_netloc = urlsplit(crawl_id).netloc
+        entries = [(link, date) for link, date in entries if self.link_filter.allows(link, base_netloc)]
+        undated = [link for link, date in entries if date is None]
+        fetched_before = self.crawl_store.fetched_before(crawl_id, undated) if undated else set()
+        urls = []
+        outdated = 0
+        for link, date in entries:
+            if date is None:
+                if link not in fetched_before:
+                    urls.append(link)
+            elif self.cutoff_date and date < self.cutoff_date:
+                outdated += 1
+            elif since is None or date > since:
+                urls.append(link)
+        print(f"Sitemaps and feeds list {len(entries)} pages below {url} ({discovery.requests} requests): "
+              f"{len(urls)} new or changed" + (f", {outdated} older than {self.days_limit} days" if outdated else ""))
+        return urls
+
+    @property
+    def crawl_stats(self):
+        """Counts for the most recent crawl: pages, errors, skipped, new/refreshed/unchanged/outdated pages and links."""
+        if self.active_crawl is None or self.active_crawl.state is None:
+            return {}
+        return dict(self.active_crawl.state.summary(), links=dict(self.link_stats))
+
+    def pause(self):
+        """Pause the running crawl; resume it later with resume=True."""
+        if self.active_crawl is not None:
+            self.active_crawl.pause()
 
-    def extract_post_links(self, soup, base_url):
-        """Extract forum post links from a page.
+    def crawl_async(self, url, progress_callback=None, depth=1, max_depth=2, visited_urls=None,
+                    concurrency=100, per_host_limit=8, host_delay=0.0, resume=False, skip_fetched_within=None,
+                    discover=False, since=None):
+        """Crawl a static site with the asyncio crawler; same semantics and return value as scrape_url.
+
+        Pages are fetched with plain HTTP only, so use this for sources that don't need JavaScript.
+        """
+        from async_crawler import AsyncCrawler
+        self._reset_link_stats()
+        seed_urls = self._seed_urls(url, depth, max_depth, resume, discover, since)
+        self.active_crawl = AsyncCrawler(self, concurrency=concurrency, per_host_limit=per_host_limit,
+                                         host_delay=host_delay)
+        scraped_files = self.active_crawl.run(url, progress_callback=progress_callback, depth=depth,
+                                              max_depth=max_depth, visited_urls=visited_urls, resume=resume,
+                                              skip_fetched_within=skip_fetched_within, seed_urls=seed_urls)
+        self._print_link_stats()
+        return scraped_files
+
+    def crawl_pipelined(self, url, progress_callback=None, depth=1, max_depth=2, visited_urls=None, fetch_mode=None,
+                        workers=4, per_host_limit=2, host_delay=0.5, resume=False, skip_fetched_within=None,
+                        parse_workers=None, queue_size=None, discover=False, since=None):
+        """Crawl with fetching, parsing and writing pipelined; same semantics and return value as scrape_url.
+
+        Pages are parsed and rendered to Markdown in a pool of worker processes.
         Args:
-            soup (BeautifulSoup): The parsed HTML content
-            base_url (str): The base URL of the page
+            workers (int): Number of pages fetched concurrently
+            parse_workers (int): Worker processes for parsing and extraction (default: one per core)
+            queue_size (int): Fetched pages allowed to wait for parsing or writing before fetching pauses
+        """
+        from pipeline import PipelineEngine
+        self._reset_link_stats()
+        seed_urls = self._seed_urls(url, depth, max_depth, resume, discover, since)
+        self.active_crawl = PipelineEngine(self, workers=workers, per_host_limit=per_host_limit, host_delay=host_delay,
+                                           parse_workers=parse_workers, queue_size=queue_size)
+        scraped_files = self.active_crawl.crawl(url, progress_callback=progress_callback, depth=depth,
+                                                max_depth=max_depth, visited_urls=visited_urls, fetch_mode=fetch_mode,
+                                                resume=resume, skip_fetched_within=skip_fetched_within,
+                                                seed_urls=seed_urls)
+        self._print_link_stats()
+        return scraped_files
+
+    def process_page(self, url, depth=1, max_depth=2, fetch_mode=None):
+        """Fetch a single page and either expand it or save its content.
         Returns:
-            list: List of extracted post URLs
+            tuple: (links to follow, saved file path or None, change status)
         """
-        post_links = []
-        
-        # Common forum post link patterns
-        post_indicators = [
-            {'tag': 'div', 'class_': 'post'},
-            {'tag': 'div', 'class_': 'thread'},
-            {'tag': 'div', 'class_': 'topic'},
-            {'tag': 'article', 'class_': 'forum-post'},
-            {'tag': 'div', 'class_': 'message'},
-            {'tag': 'div', 'class_': 'discussion'}
-        ]
-        
-        # Look for links within elements that match forum post patterns
-        for indicator in post_indicators:
-            elements = soup.find_all(indicator['tag'], class_=indicator.get('class_'))
-            for element in elements:
-                links = element.find_all('a', href=True)
-                for link in links:
-                    href = link['href']
-                    if not href.startswith('http'):
-                        href = base_url + href if href.startswith('/') else base_url + '/' + href
-                    if self._is_valid_link(href, base_url):
-                        post_links.append(href)
-        
-        # Also look for links with common forum URL patterns
-        forum_patterns = ['topic', 'thread', 'discussion', 'post', 'forum']
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if any(pattern in href.lower() for pattern in forum_patterns):
-                if not href.startswith('http'):
-                    href = base_url + href if href.startswith('/') else base_url + '/' + href
-                if self._is_valid_link(href, base_url):
-                    post_links.append(href)
-        
-        # Remove duplicates while preserving order
-        return list(dict.fromkeys(post_links))
\ No newline at end of file
+        with self.metrics.page(url) as record:
+            fetched, cached, soup = self.fetch_page(url, depth, max_depth, fetch_mode)
+            result = self.process_fetched(fetched, url, depth, max_depth, cached, soup)
+            record['status'] = result[2] or 'expanded'
+            return result
+
+    def fetch_page(self, url, depth=1, max_depth=2, fetch_mode=None, check_content=True):
+        """Fetch a page, honoring the rate limiter and sending cached validators for leaf pages.
+
+        check_content=False skips the 'auto' mode check for content in static HTML (see _fetch).
+        Returns:
+            tuple: (FetchResult, cached validators or None, BeautifulSoup or None)
+        """
+        if self.rate_limiter is not None:
+            with self.metrics.span('throttle'):
+                self.rate_limiter.acquire(urlsplit(url).netloc)
+        cached = self.cached_validators(url)
+        # Only pages that can't be expanded are sent conditionally; listing pages always need a body
+        fetched, soup = self._fetch(url, fetch_mode, cached if depth >= max_depth else None, check_content)
+        print(f"Fetched {url} via {fetched.backend} (waited {fetched.wait_seconds:.2f}s)")
+        self.page_stats.append({'url': url, 'backend': fetched.backend, 'wait_seconds': fetched.wait_seconds,
+                                'requests_blocked': fetched.requests_blocked, 'bytes_loaded': fetched.bytes_loaded})
+        return fetched, cached, soup
+
+    def needs_content_check(self, fetched, fetch_mode=None):
+        """Whether a page fetched with check_content=False would fall back to the browser if it had no content."""
+        return ((fetch_mode or self.fetch_mode) == 'auto' and fetched.backend == 'static'
+                and not fetched.not_modified and self.browser_fetcher is not None)
+
+    def cached_validators(self, url):
+        """Return cached response metadata for url if its saved copy still exists."""
+        cached = self.crawl_store.get_validators(normalize_url(url))
+        if cached and cached['output_file'] and os.path.exists(cached['output_file']):
+            return cached
+        return None
+
+    def process_fetched(self, fetched, url, depth=1, max_depth=2, cached=None, soup=None):
+        """Expand or save a fetched page, skipping extraction when it hasn't changed.
+
+        The change status is 'new' or 'refreshed' for saved pages, 'unchanged'
+        when the server answered 304 or the content hash matches the cached one,
+        'outdated' for pages older than days_limit, and None for listing pages
+        that were expanded.
+        Returns:
+            tuple: (links to follow, saved file path or None, change status)
+        """
+        content_hash, unchanged = self.check_unchanged(fetched, cached)
+        if content_hash is None or (unchanged and depth >= max_depth):
+            return [], None, 'unchanged'
+        archive_id = None if unchanged else self.archive_page(url, fetched, content_hash)
+        analysis = self.analyzer.analyze(fetched.html, url, fetched.url, depth, max_depth, unchanged, soup)
+        return self.apply_analysis(analysis, fetched, url, cached, content_hash, archive_id)
+
+    def check_unchanged(self, fetched, cached):
+        """Hash a fetched page and compare it with the cached copy.
+        Returns:
+            tuple: (content hash or None for a 304 response, whether the content is unchanged)
+        """
+        if fetched.not_modified:
+            return None, True
+        html_bytes = fetched.html.encode('utf-8')
+        self.metrics.inc('bytes_fetched', len(html_bytes))
+        content_hash = hashlib.sha256(html_bytes).hexdigest()
+        return content_hash, cached is not None and cached['content_hash'] == content_hash
+
+    def archive_page(self, url, fetched, content_hash):
+        """Append a fetched page to the archive, if there is one. Returns the record id or None."""
+        if self.archive is None:
+            return None
+        with self.metrics.span('archive'):
+            return self.archive.append(url, fetched, content_hash)
+
+    def apply_analysis(self, analysis, fetched, url, cached, content_hash, archive_id=None):
+        """Record a PageAnalysis and write the page if it has Markdown to save.
+        Returns:
+            tuple: (links to follow, saved file path or None, change status)
+        """
+        for message in analysis.messages:
+            print(message)
+        for stage, seconds in analysis.spans.items():
+            self.metrics.observe(stage, seconds)
+        self._count_links(**analysis.link_counts)
+        if analysis.markdown is None:
+            return analysis.links, None, analysis.status
+        filepath = self.write_markdown(analysis.markdown, url)
+        self.crawl_store.save_validators(normalize_url(url), fetched.etag, fetched.last_modified,
+                                         content_hash, filepath)
+        if archive_id is not None:
+            self.archive.set_output(archive_id, filepath)
+        return [], filepath, 'refreshed' if cached else 'new'
+
+    def write_markdown(self, markdown_content, url):
+        """Save a page's Markdown under a new file name and add it to the library.
+        Returns:
+            str: Path of the written file
+        """
+        basename = markdown_filename(url, datetime.now())
+
+        # Never overwrite an existing file, even if the same page is saved twice in one second
+        suffix = 0
+        with self.metrics.span('write'):
+            while True:
+                filename = f"{basename}.md" if suffix == 0 else f"{basename}_{suffix}.md"
+                filepath = os.path.join(self.output_dir, filename)
+                try:
+                    with open(filepath, 'x', encoding='utf-8') as f:
+                        f.write(markdown_content)
+                    break
+                except FileExistsError:
+                    suffix += 1
+        self.metrics.inc('bytes_written', len(markdown_content.encode('utf-8')))
+        with self.metrics.span('index'):
+            self.library.add(filepath, markdown_content)
+        return filepath
@@ -0,0 +1,28 @@
+from batch import dedupe_jobs, job_status, source_jobs
+
+
+def test_job_status():
+    assert job_status(['a.md'], {'errors': 3}) == 'saved'
+    assert job_status([], {'unchanged': 2, 'errors': 1}) == 'unchanged'
+    assert job_status([], {'discovered': 0}) == 'unchanged'
+    assert job_status([], {'outdated': 4}) == 'outdated'
+    assert job_status([], {'errors': 1}) == 'failed'
+    assert job_status([], {}) == 'empty'
+    # Discovery that did find pages isn't a success by itself
+    assert job_status([], {'discovered': 5, 'errors': 5}) == 'failed'
+
+
+def test_dedupe_jobs_keeps_the_first_spelling():
+    jobs = [{'url': 'http://Example.com/forum/#top'}, {'url': 'http://example.com:80/forum/', 'source': True},
+            {'url': 'http://example.com/other'}]
+    assert dedupe_jobs(jobs) == [jobs[0], jobs[2]]
+
+
+def test_source_jobs_keep_per_source_settings():
+    sources = [
+        {'url': 'http://example.com/', 'days_limit': 0, 'fetch_mode': 'static', 'interval_hours': 6,
+         'last_scraped': '2024-06-01 12:00:00', 'browser_profile': None},
+        {'url': ''},
+    ]
+    assert source_jobs(sources) == [{'url': 'http://example.com/', 'source': True, 'days_limit': 0,
+                                     'fetch_mode': 'static', 'last_scraped': '2024-06-01 12:00:00'}]
@@ -0,0 +1,38 @@
+import crawler
+from crawler import DomainRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_spaces_requests_per_domain(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(crawler.time, 'monotonic', clock)
+    limiter = DomainRateLimiter(rate=2)
+    assert limiter.reserve('a.com') == 0
+    # Callers queue behind each other: each waits one more interval
+    assert limiter.reserve('a.com') == 0.5
+    assert limiter.reserve('a.com') == 1.0
+    # Other domains have buckets of their own
+    assert limiter.reserve('b.com') == 0
+
+
+def test_rate_limiter_refills_up_to_burst(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(crawler.time, 'monotonic', clock)
+    limiter = DomainRateLimiter(rate=1, burst=3)
+    assert [limiter.reserve('a.com') for _ in range(4)] == [0, 0, 0, 1.0]
+    # Idle time earns tokens back, but never more than burst
+    clock.now += 60
+    assert [limiter.reserve('a.com') for _ in range(4)] == [0, 0, 0, 1.0]
+
+
+def test_rate_limiter_without_rate_never_waits():
+    limiter = DomainRateLimiter(rate=0)
+    assert all(limiter.reserve('a.com') == 0 for _ in range(10))
+    assert limiter.acquire('a.com') == 0
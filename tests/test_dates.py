@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+from dates import parse_date
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def local(*args, offset=timedelta(0)):
+    return datetime(*args, tzinfo=timezone(offset)).astimezone().replace(tzinfo=None)
+
+
+def test_iso_dates_with_and_without_time():
+    assert parse_date('2024-03-05') == datetime(2024, 3, 5)
+    assert parse_date('2024-03-05T10:20:30') == datetime(2024, 3, 5, 10, 20, 30)
+    assert parse_date('Posted 2024-03-05 10:20') == datetime(2024, 3, 5, 10, 20)
+
+
+def test_iso_dates_with_timezone_become_naive_local_time():
+    assert parse_date('2024-03-05T10:00:00Z') == local(2024, 3, 5, 10)
+    assert parse_date('2024-03-05T10:00:00+02:00') == local(2024, 3, 5, 10, offset=timedelta(hours=2))
+    assert parse_date('2024-03-05T10:00:00-0530') == local(2024, 3, 5, 10, offset=-timedelta(hours=5, minutes=30))
+
+
+def test_month_names():
+    assert parse_date('Mar 5, 2024') == datetime(2024, 3, 5)
+    assert parse_date('September 21st 2023') == datetime(2023, 9, 21)
+    assert parse_date('5 January 2024') == datetime(2024, 1, 5)
+
+
+def test_numeric_dates():
+    assert parse_date('05.03.2024') == datetime(2024, 3, 5)  # Dots are day first
+    assert parse_date('03/05/2024') == datetime(2024, 3, 5)  # Slashes are month first
+    assert parse_date('25/12/2023') == datetime(2023, 12, 25)  # ...unless that isn't a date
+
+
+def test_relative_dates():
+    assert parse_date('3 days ago', now=NOW) == NOW - timedelta(days=3)
+    assert parse_date('an hour ago', now=NOW) == NOW - timedelta(hours=1)
+    assert parse_date('2 weeks ago', now=NOW) == NOW - timedelta(weeks=2)
+    assert parse_date('Yesterday, 10:15', now=NOW) == NOW - timedelta(days=1)
+    assert parse_date('Today', now=NOW) == NOW
+
+
+def test_unix_timestamps():
+    assert parse_date('1700000000') == datetime.fromtimestamp(1700000000)
+    assert parse_date('1700000000000') == datetime.fromtimestamp(1700000000)
+
+
+def test_unparseable_values():
+    assert parse_date(None) is None
+    assert parse_date('') is None
+    assert parse_date('no date here') is None
+    assert parse_date('2024-02-30') is None
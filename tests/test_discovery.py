@@ -0,0 +1,57 @@
+import gzip
+
+from discovery import feed_links, parse_document
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>http://forum.test/sitemap-1.xml</loc><lastmod>2024-06-01</lastmod></sitemap>
+  <sitemap><loc> http://forum.test/sitemap-2.xml.gz </loc></sitemap>
+</sitemapindex>"""
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>http://forum.test/t/1</loc><lastmod>2024-05-30T08:15:00</lastmod></url>
+  <url><loc>http://forum.test/t/2</loc></url>
+  <url><lastmod>2024-05-30</lastmod></url>
+</urlset>"""
+
+
+def test_sitemap_index_lists_sitemaps():
+    assert parse_document(SITEMAP_INDEX) == {
+        'sitemaps': [['http://forum.test/sitemap-1.xml', '2024-06-01T00:00:00'],
+                     ['http://forum.test/sitemap-2.xml.gz', None]],
+        'pages': [],
+    }
+
+
+def test_urlset_lists_pages_with_lastmod_and_may_be_gzipped():
+    expected = {'sitemaps': [], 'pages': [['http://forum.test/t/1', '2024-05-30T08:15:00'],
+                                          ['http://forum.test/t/2', None]]}
+    assert parse_document(URLSET) == expected
+    assert parse_document(gzip.compress(URLSET)) == expected
+
+
+def test_rss_and_atom_items_use_their_dates():
+    rss = b"""<rss version="2.0"><channel><item><link>http://forum.test/t/3</link>
+        <pubDate>Sat, 01 Jun 2024 10:00:00 GMT</pubDate></item></channel></rss>"""
+    atom = b"""<feed xmlns="http://www.w3.org/2005/Atom"><entry>
+        <link rel="alternate" href="http://forum.test/t/4"/><updated>2024-06-01T10:00:00Z</updated></entry></feed>"""
+    rss_pages = parse_document(rss)['pages']
+    atom_pages = parse_document(atom)['pages']
+    assert [page for page, _ in rss_pages] == ['http://forum.test/t/3']
+    assert [page for page, _ in atom_pages] == ['http://forum.test/t/4']
+    # Both dates are the same instant, in local time
+    assert rss_pages[0][1] == atom_pages[0][1]
+
+
+def test_other_documents_list_nothing():
+    assert parse_document(b'<html><body>Not a sitemap</body></html>') == {'sitemaps': [], 'pages': []}
+    assert parse_document(b'not xml at all') == {'sitemaps': [], 'pages': []}
+
+
+def test_feed_links_finds_advertised_feeds():
+    html = """<head><link rel="stylesheet" href="/site.css">
+        <link rel="alternate" type="application/rss+xml" href="/forum/index.rss">
+        <link href='https://forum.test/atom' type='application/atom+xml' rel='alternate'></head>"""
+    assert feed_links(html, 'http://forum.test/forum/') == ['http://forum.test/forum/index.rss',
+                                                          'https://forum.test/atom']
@@ -0,0 +1,96 @@
+import os
+from datetime import datetime, timedelta
+
+import library
+from analysis import PageAnalyzer, render_page
+from library import LibraryIndex
+from scraper import markdown_filename
+
+START = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def page_html(title, words):
+    return (f'<html><head><title>{title}</title></head><body><article>'
+            f'<p>{words} in this thread about the forum.</p></article></body></html>')
+
+
+def add_document(index, directory, url, title, words, scraped_at):
+    """Render and save a page the way the scraper does, and index it."""
+    markdown = render_page(PageAnalyzer(), page_html(title, words), url, scraped_at)
+    filepath = os.path.join(str(directory), markdown_filename(url, scraped_at) + '.md')
+    with open(filepath, 'x', encoding='utf-8') as f:
+        f.write(markdown)
+    index.add(filepath, markdown)
+    return os.path.basename(filepath)
+
+
+def make_library(directory, count):
+    """count documents, alternating between two domains, one day apart (document 0 is the oldest)."""
+    index = LibraryIndex(str(directory))
+    filenames = []
+    for number in range(count):
+        domain = 'a.forum.test' if number % 2 == 0 else 'b.forum.test'
+        filenames.append(add_document(index, directory, f'http://{domain}/t/{number}', f'Thread {number}',
+                                      'Gearbox noise ' + 'gearbox ' * (number % 5),
+                                      START + timedelta(days=number)))
+    return index, filenames
+
+
+def test_documents_are_indexed_with_their_header(tmp_path):
+    index, filenames = make_library(tmp_path, 1)
+    _, results = index.search('gearbox')
+    assert results[0]['filename'] == filenames[0]
+    assert results[0]['title'] == 'Thread 0'
+    assert results[0]['url'] == 'http://a.forum.test/t/0'
+    assert results[0]['domain'] == 'a.forum.test'
+    assert results[0]['scraped_at'] == '2024-06-01 12:00:00'
+    assert '**Gearbox**' in results[0]['snippet']
+    index.close()
+
+
+def test_search_filters_by_domain_and_date(tmp_path):
+    index, _ = make_library(tmp_path, 10)
+    total, results = index.search('gearbox', domain='b.forum.test')
+    assert total == 5
+    assert {result['domain'] for result in results} == {'b.forum.test'}
+    # Dates are inclusive: 2024-06-03 to 2024-06-05 are documents 2, 3 and 4
+    total, results = index.search('gearbox', since='2024-06-03', until='2024-06-05')
+    assert total == 3
+    assert sorted(result['title'] for result in results) == ['Thread 2', 'Thread 3', 'Thread 4']
+    total, results = index.search('gearbox', domain='a.forum.test', since='2024-06-08')
+    assert [result['title'] for result in results] == ['Thread 8']
+    assert index.search('missing')[0] == 0
+    index.close()
+
+
+def test_library_pages_sort_by_date(tmp_path):
+    index, _ = make_library(tmp_path, 5)
+    assert [document['title'] for document in index.page(sort='Newest first')] == [
+        'Thread 4', 'Thread 3', 'Thread 2', 'Thread 1', 'Thread 0']
+    assert [document['title'] for document in index.page(sort='Oldest first', limit=2)] == ['Thread 0', 'Thread 1']
+    index.close()
+
+
+def test_search_pages_reach_every_match_beyond_the_rank_window(tmp_path, monkeypatch):
+    monkeypatch.setattr(library, 'RANK_WINDOW', 20)
+    index, filenames = make_library(tmp_path, 50)
+    seen = []
+    for offset in range(0, 60, 15):
+        total, results = index.search('gearbox', offset=offset, limit=15)
+        assert total == 50
+        seen += [result['filename'] for result in results]
+    assert sorted(seen) == sorted(filenames)
+    index.close()
+
+
+def test_matches_beyond_the_rank_window_are_listed_newest_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(library, 'RANK_WINDOW', 3)
+    index = LibraryIndex(str(tmp_path))
+    # Indexed out of date order, so date order and index order differ
+    for number in (2, 0, 4, 1, 3, 5, 6, 7):
+        add_document(index, tmp_path, f'http://a.forum.test/t/{number}', f'Thread {number}', 'Gearbox noise',
+                     START + timedelta(days=number))
+    _, results = index.search('gearbox', offset=3, limit=10)
+    assert [result['scraped_at'][:10] for result in results] == [
+        '2024-06-05', '2024-06-04', '2024-06-03', '2024-06-02', '2024-06-01']
+    index.close()
@@ -0,0 +1,41 @@
+import os
+
+from output_stores import get_output_stores, shutdown_output_stores
+
+
+def test_stores_are_opened_once_per_directory(tmp_path):
+    try:
+        stores = get_output_stores(str(tmp_path / 'out'))
+        assert get_output_stores(os.path.join(str(tmp_path), 'out', '.')) is stores
+        assert get_output_stores(str(tmp_path / 'other')) is not stores
+    finally:
+        shutdown_output_stores()
+    assert get_output_stores(str(tmp_path / 'out')) is not stores
+    shutdown_output_stores()
+
+
+def test_archive_is_opened_only_when_enabled_or_present(tmp_path):
+    try:
+        stores = get_output_stores(str(tmp_path))
+        assert stores.archive() is None
+        archive = stores.archive(create=True)
+        assert archive is not None
+        assert stores.archive() is archive
+    finally:
+        shutdown_output_stores()
+    try:
+        assert get_output_stores(str(tmp_path)).archive() is not None
+    finally:
+        shutdown_output_stores()
+
+
+def test_a_crawl_is_claimed_by_one_run_at_a_time(tmp_path):
+    try:
+        crawl_store = get_output_stores(str(tmp_path)).crawl_store
+        assert crawl_store.claim('http://forum.test/')
+        assert not crawl_store.claim('http://forum.test/')
+        assert crawl_store.claim('http://other.test/')
+        crawl_store.release('http://forum.test/')
+        assert crawl_store.claim('http://forum.test/')
+    finally:
+        shutdown_output_stores()
@@ -0,0 +1,71 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from scheduler import DATE_FORMAT, SourceScheduler
+
+
+def make_scheduler(results, **kwargs):
+    ran = []
+    done = threading.Event()
+
+    def run_source(url):
+        ran.append(url)
+        done.set()
+        return results.get(url, True)
+
+    scheduler = SourceScheduler(run_source, jitter=0, **kwargs)
+    return scheduler, ran, done
+
+
+def wait_for_history(scheduler, count, timeout=5):
+    deadline = time.time() + timeout
+    while len(scheduler.history()) < count and time.time() < deadline:
+        time.sleep(0.01)
+    return scheduler.history()
+
+
+def test_never_scraped_source_runs_now_and_is_rescheduled():
+    scheduler, ran, done = make_scheduler({})
+    try:
+        scheduler.sync([{'url': 'http://a.com/', 'interval_hours': 1, 'last_scraped': None}])
+        assert done.wait(5)
+        history = wait_for_history(scheduler, 1)
+        assert ran == ['http://a.com/']
+        assert history[0]['succeeded']
+        queue = scheduler.queue()
+        assert [entry['url'] for entry in queue] == ['http://a.com/']
+        due = datetime.strptime(queue[0]['due'], DATE_FORMAT)
+        assert timedelta(minutes=59) < due - datetime.now() <= timedelta(hours=1)
+    finally:
+        scheduler.close()
+
+
+def test_failed_run_is_retried_after_retry_delay():
+    scheduler, ran, done = make_scheduler({'http://a.com/': False}, retry_delay=120)
+    try:
+        scheduler.sync([{'url': 'http://a.com/', 'interval_hours': 24, 'last_scraped': None}])
+        assert done.wait(5)
+        assert not wait_for_history(scheduler, 1)[0]['succeeded']
+        due = datetime.strptime(scheduler.queue()[0]['due'], DATE_FORMAT)
+        assert timedelta(seconds=110) < due - datetime.now() <= timedelta(seconds=120)
+    finally:
+        scheduler.close()
+
+
+def test_recent_sources_wait_and_unscheduled_sources_are_dropped():
+    scheduler, ran, _ = make_scheduler({})
+    try:
+        last_scraped = (datetime.now() - timedelta(hours=1)).strftime(DATE_FORMAT)
+        scheduler.sync([
+            {'url': 'http://a.com/', 'interval_hours': 6, 'last_scraped': last_scraped},
+            {'url': 'http://manual.com/', 'interval_hours': 0, 'last_scraped': None},
+        ])
+        assert [entry['url'] for entry in scheduler.queue()] == ['http://a.com/']
+        assert scheduler.stats()['due'] == 0
+        scheduler.sync([])
+        assert scheduler.queue() == []
+        time.sleep(0.1)
+        assert ran == []
+    finally:
+        scheduler.close()
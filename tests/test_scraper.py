@@ -0,0 +1,48 @@
+from crawl_store import CrawlStore
+from scraper import WebScraper
+from urls import normalize_url
+
+URL = 'http://forum.test/forum/'
+
+
+def make_scraper(tmp_path, monkeypatch):
+    scraper = WebScraper(output_dir=str(tmp_path), fetch_mode='static')
+    calls = []
+    monkeypatch.setattr(scraper, 'discover_urls', lambda url, since=None: calls.append(url) or [])
+    return scraper, calls
+
+
+def test_discovery_runs_on_resume_when_nothing_is_left_to_resume(tmp_path, monkeypatch):
+    scraper, calls = make_scraper(tmp_path, monkeypatch)
+    assert scraper._seed_urls(URL, 1, 2, resume=True, discover=True, since=None) == []
+    assert calls == [URL]
+    scraper.close()
+
+
+def test_resumable_crawl_continues_instead_of_discovering(tmp_path, monkeypatch):
+    scraper, calls = make_scraper(tmp_path, monkeypatch)
+    crawl = normalize_url(URL)
+    scraper.crawl_store.start_crawl(crawl, 2)
+    scraper.crawl_store.enqueue(crawl, [('http://forum.test/forum/thread/1', 2)])
+    assert scraper._seed_urls(URL, 1, 2, resume=True, discover=True, since=None) is None
+    assert calls == []
+    # A fresh run still discovers
+    assert scraper._seed_urls(URL, 1, 2, resume=False, discover=True, since=None) == []
+    assert calls == [URL]
+    scraper.close()
+
+
+def test_no_discovery_when_disabled_or_at_max_depth(tmp_path, monkeypatch):
+    scraper, calls = make_scraper(tmp_path, monkeypatch)
+    assert scraper._seed_urls(URL, 1, 2, resume=False, discover=False, since=None) is None
+    assert scraper._seed_urls(URL, 2, 2, resume=False, discover=True, since=None) is None
+    assert calls == []
+    scraper.close()
+
+
+def test_close_releases_owned_stores_only(tmp_path):
+    shared = CrawlStore(str(tmp_path / 'shared.db'))
+    scraper = WebScraper(output_dir=str(tmp_path), crawl_store=shared)
+    scraper.close()
+    assert shared.get_state('anything') is None  # Still open
+    shared.close()
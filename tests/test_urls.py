@@ -0,0 +1,80 @@
+from urls import LinkFilter, normalize_url, resolve_link
+
+
+def test_normalize_lowercases_scheme_and_host_but_not_path():
+    assert normalize_url('HTTP://Forum.Example.COM/Thread/A') == 'http://forum.example.com/Thread/A'
+
+
+def test_normalize_drops_default_ports_only():
+    assert normalize_url('http://example.com:80/a') == 'http://example.com/a'
+    assert normalize_url('https://example.com:443/a') == 'https://example.com/a'
+    assert normalize_url('http://example.com:443/a') == 'http://example.com:443/a'
+    assert normalize_url('http://example.com:8080/a') == 'http://example.com:8080/a'
+
+
+def test_normalize_drops_fragment():
+    assert normalize_url('http://example.com/thread/1#post-5') == 'http://example.com/thread/1'
+
+
+def test_normalize_drops_tracking_params_and_keeps_the_rest_in_order():
+    assert (normalize_url('http://example.com/t?page=2&utm_source=x&b=1&fbclid=abc&a=')
+            == 'http://example.com/t?page=2&b=1&a=')
+    assert normalize_url('http://example.com/t?utm_medium=mail') == 'http://example.com/t'
+    assert normalize_url('http://example.com/t?PHPSESSID=1f&t=5') == 'http://example.com/t?t=5'
+
+
+def test_normalize_keeps_path_style_queries():
+    assert (normalize_url('http://example.com/index.php?/topic/123-foo/')
+            == 'http://example.com/index.php?/topic/123-foo/')
+    assert (normalize_url('http://example.com/index.php?/topic/123-foo/&utm_source=feed')
+            == 'http://example.com/index.php?/topic/123-foo/')
+
+
+def test_normalize_keeps_valueless_params():
+    assert normalize_url('http://example.com/a?b') == 'http://example.com/a?b'
+    assert normalize_url('http://example.com/a?b&c=') == 'http://example.com/a?b&c='
+
+
+def test_normalize_keeps_repeated_keys_in_order():
+    assert normalize_url('http://example.com/a?b=1&b=0') == 'http://example.com/a?b=1&b=0'
+
+
+def test_normalize_keeps_encoding_as_written():
+    assert normalize_url('http://example.com/s?q=a%20b+c&x=%2F') == 'http://example.com/s?q=a%20b+c&x=%2F'
+
+
+def test_normalize_keeps_sid():
+    assert normalize_url('http://example.com/story.php?sid=4021') == 'http://example.com/story.php?sid=4021'
+
+
+def test_normalize_defaults_empty_path_and_keeps_trailing_slash():
+    assert normalize_url('http://example.com') == 'http://example.com/'
+    assert normalize_url('http://example.com/forum/') == 'http://example.com/forum/'
+    assert normalize_url('http://example.com/forum') == 'http://example.com/forum'
+
+
+def test_normalize_strips_trailing_dot_and_whitespace():
+    assert normalize_url('  http://example.com./a  ') == 'http://example.com/a'
+
+
+def test_resolve_link_makes_relative_links_absolute():
+    assert resolve_link('../b?x=1#top', 'http://example.com/forum/a/') == 'http://example.com/forum/b?x=1'
+    assert resolve_link('//cdn.example.com/p', 'https://example.com/') == 'https://cdn.example.com/p'
+
+
+def test_resolve_link_rejects_fragments_and_other_schemes():
+    assert resolve_link('#reply', 'http://example.com/') is None
+    assert resolve_link('   ', 'http://example.com/') is None
+    assert resolve_link('mailto:admin@example.com', 'http://example.com/') is None
+    assert resolve_link('javascript:void(0)', 'http://example.com/') is None
+
+
+def test_link_filter_same_domain_extensions_and_paths():
+    link_filter = LinkFilter()
+    assert link_filter.allows('http://example.com/forum/thread/1', 'example.com')
+    assert not link_filter.allows('http://other.com/forum/thread/1', 'example.com')
+    assert not link_filter.allows('http://example.com/static/site.CSS', 'example.com')
+    assert not link_filter.allows('http://example.com/forum/login/', 'example.com')
+    # Ignored paths match whole path segments only
+    assert link_filter.allows('http://example.com/forum/login-help-thread', 'example.com')
+    assert LinkFilter(same_domain=False).allows('http://other.com/a', 'example.com')
@@ -0,0 +1,94 @@
+from urllib.parse import urljoin, urlsplit, urlunsplit, unquote_plus
+
+# Query parameters that only track the visitor and never change page content. 'sid' is left
+# alone: on many forums it identifies a post or story rather than a session
+TRACKING_PARAMS = frozenset([
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+    'phpsessid', 'jsessionid', 'sessionid',
+])
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+DEFAULT_IGNORED_PATHS = ('login', 'logout', 'signup', 'register', 'search')
+DEFAULT_IGNORED_EXTENSIONS = ('.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.pdf')
+
+
+def normalize_url(url):
+    """Return the canonical spelling of an absolute URL.
+
+    Lowercases the scheme and host, drops default ports, the fragment and
+    tracking query parameters, and defaults an empty path to '/'. The rest
+    of the query is kept as written, in its original order, since the
+    result is the URL that gets fetched: forums use queries like
+    '?/topic/123-foo/' or '?b' that mean something else once re-encoded.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"  # IPv6 literal
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if parts.username or parts.password:
+        credentials = parts.username or ''
+        if parts.password:
+            credentials += ':' + parts.password
+        netloc = f"{credentials}@{host}"
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+
+    query = '&'.join(segment for segment in parts.query.split('&') if not _is_tracking(segment))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def _is_tracking(segment):
+    key = unquote_plus(segment.split('=', 1)[0]).lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def resolve_link(href, base_url):
+    """Resolve an href found on base_url to a canonical absolute http(s) URL, or None."""
+    href = href.strip()
+    if not href or href.startswith('#'):
+        return None
+    absolute = urljoin(base_url, href)
+    if urlsplit(absolute).scheme not in DEFAULT_PORTS:
+        return None  # mailto:, javascript:, tel: ...
+    return normalize_url(absolute)
+
+
+class LinkFilter:
+    """Decides which links to follow, compiled once from the link-filtering settings."""
+
+    def __init__(self, same_domain=True, ignored_paths=DEFAULT_IGNORED_PATHS,
+                 ignored_extensions=DEFAULT_IGNORED_EXTENSIONS):
+        self.same_domain = same_domain
+        self.ignored_paths = frozenset(p.strip().strip('/').lower() for p in ignored_paths if p.strip())
+        self.ignored_extensions = tuple(e.strip().lower() for e in ignored_extensions if e.strip())
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            same_domain=settings.get('filter_same_domain', True),
+            ignored_paths=settings.get('ignored_paths', DEFAULT_IGNORED_PATHS),
+            ignored_extensions=settings.get('ignored_extensions', DEFAULT_IGNORED_EXTENSIONS),
+        )
+
+    def allows(self, link, base_netloc):
+        """Check a canonical link against the filter; base_netloc is the canonical host of the page."""
+        parts = urlsplit(link)
+        # Check if the link is from the same domain
+        if self.same_domain and parts.netloc != base_netloc:
+            return False
+        path = parts.path.lower()
+        # Ignore common file types that aren't likely to contain content
+        if self.ignored_extensions and path.endswith(self.ignored_extensions):
+            return False
+        # Ignore common non-content paths
+        if self.ignored_paths and not self.ignored_paths.isdisjoint(path.strip('/').split('/')):
+            return False
+        return True